@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from datetime import timedelta
+
+from models import db, RegistroAlteracao
+from utils.change_log import listar_alteracoes, marca_de_corte, ultima_seq
+
+# Blueprint do feed de alterações, consumido por indexadores e caches externos
+changes_api = Blueprint('changes_api', __name__)
+
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 5000
+
+@changes_api.route('/api/changes', methods=['GET'])
+@login_required
+def listar_changes():
+    """
+    Alterações em chamados e respostas depois de uma sequência (apenas administradores)
+
+    Parâmetros:
+    - since: última seq já processada (0 ou ausente para começar do início)
+    - limit: máximo de entradas (padrão 500, máximo 5000)
+
+    Cada entrada traz tabela, operação, id do registro e chamado_id; o estado
+    atual deve ser relido do banco/API. Mudanças de nome de usuário vêm como
+    tabela `usuario` (afetam os chamados e respostas dele). Para continuar, envie next_since como
+    since; has_more indica se há mais entradas disponíveis agora. Se o log já
+    foi podado além de `since`, responde 410 e o consumidor deve recarregar
+    tudo e recomeçar a partir de resync_since.
+    """
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permissão negada'}), 403
+
+    try:
+        since = int(request.args.get('since', 0))
+        limite = int(request.args.get('limit', LIMITE_PADRAO))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'since e limit devem ser números inteiros'}), 400
+    if since < 0 or not 1 <= limite <= LIMITE_MAXIMO:
+        return jsonify({'success': False, 'message': f'since deve ser >= 0 e limit entre 1 e {LIMITE_MAXIMO}'}), 400
+
+    atraso = timedelta(seconds=current_app.config.get('CHANGE_LOG_SAFETY_LAG', 2))
+
+    # Exclusões anteriores a `since` podem ter sido removidas pela retenção.
+    # resync_since é a mesma marca segura do feed (o que ainda não pode ser
+    # entregue fica depois dela), nunca abaixo do corte
+    corte = marca_de_corte(db.session, RegistroAlteracao)
+    if since < corte:
+        return jsonify({
+            'success': False,
+            'message': 'Log de alterações já foi compactado além de since: recarregue tudo',
+            'resync_since': max(ultima_seq(db.session, RegistroAlteracao, atraso), corte)
+        }), 410
+
+    entradas = listar_alteracoes(db.session, RegistroAlteracao, since, limite + 1, atraso)
+    has_more = len(entradas) > limite
+    entradas = entradas[:limite]
+
+    return jsonify({
+        'changes': [entrada.to_dict() for entrada in entradas],
+        'next_since': entradas[-1].seq if entradas else since,
+        'has_more': has_more
+    })
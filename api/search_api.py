@@ -1,9 +1,19 @@
-from flask import Blueprint, request, jsonify
-from sqlalchemy import or_
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import current_user
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 import logging
 
 # Importando dos modelos separados
 from models import db, Chamado, Usuario
+from utils.pagination import chaves_ordenacao_chamados, paginar_keyset, CursorInvalido
+from utils.search_cache import contagem_cache, chave_busca, resultados_cache, predicado_busca, normalizar_termo
+from utils.suggest_index import garantir_prefixos_carregados
+from utils.snippets import gerar_trecho
+from utils.search_backends import backend_configurado, backend_trigramas
+from utils.query_parser import interpretar_consulta, aplicar_consulta, ConsultaInvalida
+from utils.fieldsets import campos_pedidos, colunas_necessarias, CamposInvalidos
+from utils.rate_limit import limiter
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -12,21 +22,87 @@ logger = logging.getLogger("search_api")
 # Criação do Blueprint para a API de busca
 search_api = Blueprint('search_api', __name__)
 
+# Modos de contagem aceitos no parâmetro `count`
+MODOS_CONTAGEM = ('exact', 'estimate', 'none')
+
+# Acima deste número de resultados o modo `estimate` para de contar
+LIMITE_ESTIMATIVA = 1000
+
+# Maior página aceita; acima disso use cursor e páginas menores
+MAX_POR_PAGINA = 100
+
+# Campos que podem ser pedidos em `fields`; a descrição completa só vai na
+# resposta quando pedida explicitamente (o padrão é o trecho destacado)
+CAMPOS_BUSCA = ('id', 'titulo', 'descricao', 'trecho', 'status', 'criticidade',
+                'data_criacao', 'autor_id', 'autor_nome', 'resposta_encontrada')
+CAMPOS_PADRAO = tuple(campo for campo in CAMPOS_BUSCA if campo != 'descricao')
+
+# Colunas de Chamado lidas para cada campo (autor_nome vem do JOIN com o autor)
+COLUNAS_CAMPOS_BUSCA = {
+    'titulo': (Chamado.titulo,),
+    'descricao': (Chamado.descricao,),
+    'trecho': (Chamado.descricao,),
+    'status': (Chamado.status,),
+    'criticidade': (Chamado.criticidade,),
+    'data_criacao': (Chamado.data_criacao,),
+    'autor_id': (Chamado.autor_id,),
+}
+
+def _obter_total(search_query, termo, filtros, modo):
+    """
+    Retorna a tupla (total, estimado) conforme o modo de contagem.
+    
+    - exact: COUNT completo, guardado no cache para as próximas páginas
+    - estimate: usa o cache se houver; senão conta no máximo LIMITE_ESTIMATIVA
+      linhas (estimado=True indica que o total real é maior ou igual)
+    - none: não conta (útil para scroll infinito)
+    """
+    if modo == 'none':
+        return None, False
+    
+    chave = chave_busca(termo, filtros)
+    total = contagem_cache.obter(chave)
+    if total is not None:
+        return total, False
+    
+    if modo == 'exact':
+        total = search_query.count()
+        contagem_cache.guardar(chave, total)
+        return total, False
+    
+    limitada = search_query.with_entities(Chamado.id).limit(LIMITE_ESTIMATIVA + 1).subquery()
+    total = db.session.query(func.count()).select_from(limitada).scalar()
+    if total > LIMITE_ESTIMATIVA:
+        return LIMITE_ESTIMATIVA, True
+    
+    # Abaixo do limite a contagem é exata e pode ir para o cache
+    contagem_cache.guardar(chave, total)
+    return total, False
+
 @search_api.route('/api/search', methods=['GET', 'OPTIONS'])
 def search_chamados():
     """
-    API de busca full-text para chamados - será substituída pela implementação em Go no futuro
+    API de busca full-text para chamados
     
-    Esta é uma implementação temporária que simula a funcionalidade de alta performance
-    que teríamos com a implementação em Go + Elasticsearch.
+    O texto é resolvido pelo backend configurado em SEARCH_BACKEND (sql, index
+    ou go - ver utils/search_backends.py); filtros, paginação e formatação
+    são os mesmos para todos. O cabeçalho X-Search-Backend indica quem atendeu.
     
     Parâmetros:
-    - q: termo de busca (texto)
+    - q: termo de busca; aceita filtros no próprio texto, ex.:
+      `status:Aberto criticidade:Urgente autor:maria impressora desde:2026-01-01`
+      (ver utils/query_parser.py)
     - page: número da página
+    - cursor: paginação por cursor (vazio na primeira página, depois o next_cursor recebido)
+    - fields: campos de cada resultado, separados por vírgula (padrão: todos
+      exceto descricao, que é substituída pelo trecho destacado)
+    - fuzzy: 1 para busca aproximada (tolera erros de digitação); padrão é exata
+    - count: exact (padrão), estimate (contagem limitada) ou none (sem total)
+    - sort/order: ordenação (id, data ou criticidade); padrão é relevância
     - status: filtro por status
     - criticidade: filtro por criticidade
-    - data_inicio: filtro por data de início
-    - data_fim: filtro por data de fim
+    - data_inicio: filtro por data de início (AAAA-MM-DD)
+    - data_fim: filtro por data de fim (AAAA-MM-DD, inclusiva)
     """
     # Tratamento de CORS
     if request.method == 'OPTIONS':
@@ -42,65 +118,204 @@ def search_chamados():
     per_page = int(request.args.get('per_page', 10))
     status = request.args.get('status', None)
     criticidade = request.args.get('criticidade', None)
+    sort = request.args.get('sort', None)
+    order = request.args.get('order', 'desc')
+    cursor = request.args.get('cursor', None)
+    count_mode = request.args.get('count', 'exact')
+    fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true')
+    
+    if count_mode not in MODOS_CONTAGEM:
+        resp = jsonify({'success': False, 'message': 'Parâmetro count deve ser estimate, exact ou none'})
+        resp.headers.add('Access-Control-Allow-Origin', '*')
+        return resp, 400
+    
+    try:
+        campos = campos_pedidos(request.args.get('fields'), CAMPOS_BUSCA, CAMPOS_PADRAO)
+    except CamposInvalidos as e:
+        resp = jsonify({'success': False, 'message': str(e)})
+        resp.headers.add('Access-Control-Allow-Origin', '*')
+        return resp, 400
+    if not 1 <= per_page <= MAX_POR_PAGINA:
+        resp = jsonify({'success': False, 'message': f'per_page deve estar entre 1 e {MAX_POR_PAGINA}'})
+        resp.headers.add('Access-Control-Allow-Origin', '*')
+        return resp, 400
+    
+    # Filtros digitados no texto (status:, autor:, desde: ...) + parâmetros avulsos
+    try:
+        consulta = interpretar_consulta(query, status, criticidade,
+                                        request.args.get('data_inicio'), request.args.get('data_fim'))
+    except ConsultaInvalida as e:
+        resp = jsonify({'success': False, 'message': str(e)})
+        resp.headers.add('Access-Control-Allow-Origin', '*')
+        return resp, 400
+    termo = consulta.texto
+    status, criticidade = consulta.status, consulta.criticidade
     
     logger.info(f"Busca recebida: '{query}' (página {page})")
     
+    # Usuários comuns só enxergam os próprios chamados
+    autor_id = None if current_user.is_admin else current_user.id
+    
+    # Páginas já calculadas para a mesma busca vêm do cache
+    grupo_cache = (normalizar_termo(query), status or '', criticidade or '', autor_id, fuzzy)
+    chave_cache = (grupo_cache, tuple(sorted(
+        (k, v) for k, v in request.args.items(multi=True) if k not in ('q', 'status', 'criticidade', 'fuzzy')
+    )))
+    geracao_cache = resultados_cache.geracao()
+    response = resultados_cache.obter(chave_cache)
+    if response is not None:
+        resp = jsonify(response)
+        resp.headers.add('Access-Control-Allow-Origin', '*')
+        resp.headers.add('X-Cache', 'HIT')
+        return resp
+    
     # Base da query
     search_query = db.session.query(Chamado, Usuario.nome.label('autor_nome')) \
                    .join(Usuario, Chamado.autor_id == Usuario.id)
     
-    # Aplicando filtros de busca
-    if query:
-        search_query = search_query.filter(
-            or_(
-                Chamado.titulo.ilike(f'%{query}%'),
-                Chamado.descricao.ilike(f'%{query}%')
-            )
-        )
+    if autor_id is not None:
+        search_query = search_query.filter(Chamado.autor_id == autor_id)
+    
+    # Restrição pelo texto, feita pelo backend configurado (SEARCH_BACKEND) ou,
+    # com fuzzy=1, pela busca aproximada por trigramas
+    filtro = None
+    if termo:
+        backend = backend_trigramas if fuzzy else backend_configurado(current_app, db.session)
+        filtro = backend.filtrar(current_app, db.session, search_query, termo)
+        search_query = filtro.query
     
-    # Filtros adicionais
-    if status:
-        search_query = search_query.filter(Chamado.status == status)
+    # Só as colunas dos campos pedidos são carregadas (a descrição, que pode
+    # ter dezenas de KB, apenas para descricao/trecho)
+    search_query = search_query.options(load_only(
+        *colunas_necessarias(campos, COLUNAS_CAMPOS_BUSCA, sempre=(Chamado.id,))
+    ))
     
-    if criticidade:
-        search_query = search_query.filter(Chamado.criticidade == criticidade)
+    # Filtros de campo (status, criticidade, autor e datas) na mesma query
+    search_query = aplicar_consulta(search_query, consulta, Chamado, Usuario)
     
-    # Contagem total para paginação
-    total = search_query.count()
+    # Contagem total para paginação (reaproveitada do cache quando possível)
+    total, total_estimado = _obter_total(search_query, query, {
+        'status': status,
+        'criticidade': criticidade,
+        'autor_id': autor_id,
+        'fuzzy': fuzzy,
+        'data_inicio': request.args.get('data_inicio'),
+        'data_fim': request.args.get('data_fim')
+    }, count_mode)
     
-    # Aplicando paginação
-    search_query = search_query.order_by(Chamado.data_criacao.desc()) \
-                  .offset((page - 1) * per_page) \
-                  .limit(per_page)
+    # Ordenação: relevância (FTS5 ou similaridade) e depois data, a menos
+    # que o cliente peça explicitamente uma das ordenações do dashboard
+    if sort:
+        chaves = chaves_ordenacao_chamados(Chamado, sort, order)
+    elif filtro is not None and filtro.chaves_relevancia is not None:
+        chaves = filtro.chaves_relevancia
+    else:
+        chaves = chaves_ordenacao_chamados(Chamado, 'data', 'desc')
     
-    # Executar a query
-    results = search_query.all()
+    next_cursor = None
+    if cursor is not None:
+        # Paginação por cursor: custo constante independente da página
+        try:
+            results, next_cursor = paginar_keyset(search_query, chaves, cursor, per_page)
+        except CursorInvalido as e:
+            resp = jsonify({'success': False, 'message': str(e)})
+            resp.headers.add('Access-Control-Allow-Origin', '*')
+            return resp, 400
+    else:
+        # Aplicando paginação
+        search_query = search_query.order_by(*[
+            expressao.desc() if descendente else expressao.asc()
+            for expressao, descendente in chaves
+        ])
+        search_query = search_query.offset((page - 1) * per_page) \
+                      .limit(per_page)
+        
+        # Executar a query
+        results = search_query.all()
     
-    # Formatando resultados
+    # Resposta que casou com a busca em cada chamado da página (no máximo uma)
+    encontradas = {}
+    if filtro is not None and filtro.respostas and results and 'resposta_encontrada' in campos:
+        encontradas = filtro.respostas(db.session, [chamado.id for chamado, _ in results], termo)
+    
+    # Formatando resultados (apenas os campos pedidos)
     chamados = []
     for chamado, autor_nome in results:
-        chamados.append({
-            'id': chamado.id,
-            'titulo': chamado.titulo,
-            'descricao': chamado.descricao,
-            'status': chamado.status,
-            'criticidade': chamado.criticidade,
-            'data_criacao': chamado.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
-            'autor_id': chamado.autor_id,
-            'autor_nome': autor_nome
-        })
+        item = {}
+        for campo in campos:
+            if campo == 'trecho':
+                item['trecho'] = gerar_trecho(chamado.descricao, termo)
+            elif campo == 'data_criacao':
+                item['data_criacao'] = chamado.data_criacao.strftime('%Y-%m-%d %H:%M:%S')
+            elif campo == 'autor_nome':
+                item['autor_nome'] = autor_nome
+            elif campo == 'resposta_encontrada':
+                resposta = encontradas.get(chamado.id)
+                item['resposta_encontrada'] = {'id': resposta[0], 'trecho': resposta[1]} if resposta else None
+            else:
+                item[campo] = getattr(chamado, campo)
+        chamados.append(item)
     
     # Retornando resposta formatada
     response = {
         'chamados': chamados,
         'total': total,
+        'total_is_estimate': total_estimado,
+        'count_mode': count_mode,
+        'fuzzy': fuzzy,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': (total + per_page - 1) // per_page if total is not None else None
     }
+    if cursor is not None:
+        response['next_cursor'] = next_cursor
+    
+    resultados_cache.guardar(
+        chave_cache, grupo_cache,
+        predicado_busca(termo, status, criticidade, autor_id,
+                        filtro.inclui_respostas if filtro else False,
+                        filtro.confere_texto if filtro else True),
+        response, [chamado.id for chamado, _ in results], geracao_cache
+    )
     
     resp = jsonify(response)
     resp.headers.add('Access-Control-Allow-Origin', '*')
+    resp.headers.add('X-Cache', 'MISS')
+    if filtro is not None:
+        resp.headers.add('X-Search-Backend', filtro.backend)
+    return resp
+
+@search_api.route('/api/search/cache-stats', methods=['GET'])
+def search_cache_stats():
+    """Contadores do cache de resultados da busca (apenas administradores)"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permissão negada'}), 403
+    
+    return jsonify({
+        'results': resultados_cache.estatisticas(),
+        'counts': contagem_cache.estatisticas()
+    })
+
+@search_api.route('/api/search/suggest', methods=['GET'])
+@limiter.limit("120 per minute")  # uma requisição a cada pausa na digitação
+def suggest_titulos():
+    """
+    Sugestões de títulos para o campo de busca (autocompletar)
+    
+    Parâmetros:
+    - prefix: início de alguma palavra do título (sem diferenciar acentos/maiúsculas)
+    - limit: quantidade máxima de sugestões (padrão 8, máximo 20)
+    
+    Usuários comuns recebem apenas sugestões dos próprios chamados.
+    """
+    prefixo = request.args.get('prefix', '')
+    limite = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    
+    indice = garantir_prefixos_carregados(db.session, Chamado)
+    autor_id = None if current_user.is_admin else current_user.id
+    
+    resp = jsonify({'suggestions': indice.sugerir(prefixo, autor_id, limite)})
+    resp.headers.add('Access-Control-Allow-Origin', '*')
     return resp
 
 # Rota de health check
@@ -8,19 +8,25 @@ import json
 from werkzeug.security import generate_password_hash, check_password_hash
 import secrets
 from flask_talisman import Talisman
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 import pytz
 from routes.email_routes import email_bp
 from api.pdf_api import pdf_api
 from api.search_api import search_api  # Importando a nova API de busca
+from api.changes_api import changes_api
 from config import DevelopmentConfig, ProductionConfig
 from io import BytesIO
 from utils.pdf_generator import PDFGenerator
-from sqlalchemy import case
+from sqlalchemy.orm import load_only, joinedload
+from utils.pagination import chaves_ordenacao_chamados, chaves_ordenacao_notificacoes, paginar_keyset, CursorInvalido
+from utils.text_normalizer import filtro_busca_normalizada
+from utils.stats_service import estatisticas_chamados
+from utils.enum_types import CRITICIDADES
+from utils.fieldsets import campos_pedidos, colunas_necessarias, CamposInvalidos
+from utils.change_log import ultima_seq, listar_alteracoes, marca_de_corte
+from utils.rate_limit import limiter
 
 # Importando modelos do arquivo models.py
-from models import db, Usuario, Chamado, Resposta, Notificacao
+from models import db, Usuario, Chamado, Resposta, Notificacao, ContadorChamado, RegistroAlteracao
 
 # Configurações do Flask (otimizado para inicialização mais rápida)
 app = Flask(__name__, 
@@ -52,6 +58,9 @@ app.register_blueprint(pdf_api)
 # Registra o blueprint da API de busca
 app.register_blueprint(search_api)  # Registrando a nova API de busca
 
+# Registra o blueprint do feed de alterações
+app.register_blueprint(changes_api)
+
 # Configurações de segurança
 talisman = Talisman(
     app,
@@ -67,11 +76,7 @@ talisman = Talisman(
 )
 
 # Rate limiting
-limiter = Limiter(
-    app=app,
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
-)
+limiter.init_app(app)
 
 # Configurar exceções para rotas específicas
 @limiter.request_filter
@@ -86,6 +91,12 @@ def inject_csrf_token():
 # Configuração do fuso horário
 TIMEZONE = pytz.timezone('America/Sao_Paulo')
 
+# Quantidade padrão de chamados por página nas listagens
+ITENS_POR_PAGINA = 50
+
+# Máximo de alterações aplicadas por /dashboard/delta; acima disso a página é recarregada
+LIMITE_DELTA_DASHBOARD = 500
+
 # Filtro para formatar data e hora
 @app.template_filter('format_datetime')
 def format_datetime(value):
@@ -120,6 +131,81 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def opcoes_listagem_chamados(com_autor=True):
+    """
+    Opções de carregamento das tabelas de chamados (dashboard.html,
+    meus_chamados.html): só as colunas exibidas (sem a descrição) e, se
+    `com_autor`, o nome do autor no mesmo SELECT, em vez de um SELECT por linha.
+    """
+    opcoes = [load_only(Chamado.id, Chamado.titulo, Chamado.status, Chamado.criticidade,
+                        Chamado.data_criacao, Chamado.autor_id)]
+    if com_autor:
+        opcoes.append(joinedload(Chamado.autor).load_only(Usuario.id, Usuario.nome))
+    return opcoes
+
+def aplicar_filtros_chamados(query, args):
+    """
+    Filtros das tabelas de chamados (status, criticidade, data_inicio,
+    data_fim, busca), lidos de `args`. Datas inválidas levantam ValueError.
+    """
+    status = args.get('status', '')
+    criticidade = args.get('criticidade', '')
+    data_inicio = args.get('data_inicio', '')
+    data_fim = args.get('data_fim', '')
+    busca = args.get('busca', '')
+    
+    if status:
+        query = query.filter(Chamado.status == status)
+    
+    if criticidade:
+        query = query.filter(Chamado.criticidade == criticidade)
+    
+    if data_inicio:
+        data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d')
+        query = query.filter(Chamado.data_criacao >= data_inicio_obj)
+    
+    if data_fim:
+        data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d')
+        # Adicionar um dia para incluir todo o último dia
+        data_fim_obj = data_fim_obj + timedelta(days=1)
+        query = query.filter(Chamado.data_criacao <= data_fim_obj)
+    
+    if busca:
+        query = query.filter(filtro_busca_normalizada(Chamado, busca))
+    
+    return query
+
+def pagina_tabela_chamados(query, args, cursor=None):
+    """
+    Uma página (itens, próximo cursor) das tabelas de dashboard() e
+    meus_chamados(): filtros, ordenação (sort/order) e per_page lidos de
+    `args`. Levanta CursorInvalido para cursores inválidos e ValueError para
+    datas inválidas.
+    """
+    query = aplicar_filtros_chamados(query, args)
+    chaves = chaves_ordenacao_chamados(Chamado, args.get('sort', 'data'), args.get('order', 'desc'))
+    per_page = min(max(args.get('per_page', ITENS_POR_PAGINA, type=int), 1), 200)
+    return paginar_keyset(query, chaves, cursor, per_page)
+
+def linhas_tabela_chamados(query, template_linha):
+    """
+    Fragmento HTML com as linhas (<tr>) de uma página da tabela, para a
+    rolagem infinita (static/js/infinite_scroll.js). O cursor da página
+    seguinte vai no cabeçalho X-Proximo-Cursor, ausente na última página.
+    """
+    try:
+        chamados, next_cursor = pagina_tabela_chamados(query, request.args, request.args.get('cursor', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Cursor ou filtros inválidos'}), 400
+    
+    resposta = app.response_class(
+        render_template('chamados_linhas.html', chamados=chamados, template_linha=template_linha),
+        mimetype='text/html'
+    )
+    if next_cursor:
+        resposta.headers['X-Proximo-Cursor'] = next_cursor
+    return resposta
+
 @app.errorhandler(404)
 def page_not_found(e):
     return render_template('404.html'), 404
@@ -142,16 +228,13 @@ def index():
 @app.route('/home')
 @login_required
 def home():
-    total_chamados = Chamado.query.count()
-    chamados_abertos = Chamado.query.filter_by(status='Aberto').count()
-    chamados_encerrados = Chamado.query.filter_by(status='Encerrado').count()
-    chamados_reprovados = Chamado.query.filter_by(status='Reprovado').count()
+    stats = estatisticas_chamados(db.session, ContadorChamado, app.config.get('STATS_CACHE_TTL'))
     
     return render_template('home.html', 
-                         total_chamados=total_chamados,
-                         chamados_abertos=chamados_abertos,
-                         chamados_encerrados=chamados_encerrados,
-                         chamados_reprovados=chamados_reprovados)
+                         total_chamados=stats.total,
+                         chamados_abertos=stats.por_status['Aberto'],
+                         chamados_encerrados=stats.por_status['Encerrado'],
+                         chamados_reprovados=stats.por_status['Reprovado'])
 
 @app.route('/sistema-chamados')
 @login_required
@@ -234,88 +317,104 @@ def dashboard():
     if not current_user.has_role('ADM'):
         return redirect(url_for('meus_chamados'))
     
-    # Obter parâmetros de filtro da requisição
-    status = request.args.get('status', '')
-    criticidade = request.args.get('criticidade', '')
-    data_inicio = request.args.get('data_inicio', '')
-    data_fim = request.args.get('data_fim', '')
-    busca = request.args.get('busca', '')
-    sort = request.args.get('sort', 'data')
-    order = request.args.get('order', 'desc')
-    
-    # Iniciar a consulta base
-    query = Chamado.query
-    
-    # Aplicar filtros
-    if status:
-        query = query.filter(Chamado.status == status)
+    # Ponto de partida de /dashboard/delta, lido antes dos chamados: o que for
+    # alterado enquanto a página é montada vem de novo na primeira atualização
+    versao_sync = ultima_seq(db.session, RegistroAlteracao, atraso_log_alteracoes())
     
-    if criticidade:
-        query = query.filter(Chamado.criticidade == criticidade)
-    
-    if data_inicio:
-        data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d')
-        query = query.filter(Chamado.data_criacao >= data_inicio_obj)
-    
-    if data_fim:
-        data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d')
-        # Adicionar um dia para incluir todo o último dia
-        data_fim_obj = data_fim_obj + timedelta(days=1)
-        query = query.filter(Chamado.data_criacao <= data_fim_obj)
-    
-    if busca:
-        query = query.filter(
-            db.or_(
-                Chamado.titulo.ilike(f'%{busca}%'),
-                Chamado.descricao.ilike(f'%{busca}%')
-            )
-        )
-    
-    # Aplicar ordenação
-    if sort == 'id':
-        if order == 'asc':
-            query = query.order_by(Chamado.id.asc())
-        else:
-            query = query.order_by(Chamado.id.desc())
-    elif sort == 'data':
-        if order == 'asc':
-            query = query.order_by(Chamado.data_criacao.asc())
-        else:
-            query = query.order_by(Chamado.data_criacao.desc())
-    elif sort == 'criticidade':
-        # Ordenação personalizada para criticidade
-        criticidade_ordem = case(
-            [
-                (Chamado.criticidade == 'Baixa', 1),
-                (Chamado.criticidade == 'Média', 2),
-                (Chamado.criticidade == 'Alta', 3),
-                (Chamado.criticidade == 'Urgente', 4)
-            ],
-            else_=0
-        )
-        if order == 'asc':
-            query = query.order_by(criticidade_ordem.asc())
-        else:
-            query = query.order_by(criticidade_ordem.desc())
-    else:
-        # Ordenação padrão
-        query = query.order_by(Chamado.data_criacao.desc())
-    
-    # Executar a consulta
-    chamados = query.all()
+    # Filtros, ordenação e paginação por cursor (keyset) da requisição; as
+    # páginas seguintes vêm de /dashboard/linhas (rolagem infinita)
+    query = Chamado.query.options(*opcoes_listagem_chamados())
+    try:
+        chamados, next_cursor = pagina_tabela_chamados(query, request.args, request.args.get('cursor', ''))
+    except CursorInvalido:
+        flash('Link de paginação inválido. Exibindo a primeira página.', 'error')
+        chamados, next_cursor = pagina_tabela_chamados(query, request.args)
     
-    # Calcular estatísticas para os cards
-    total_chamados = Chamado.query.count()
-    em_andamento = Chamado.query.filter_by(status='Em Andamento').count()
-    urgentes = Chamado.query.filter_by(criticidade='Urgente').count()
-    concluidos = Chamado.query.filter_by(status='Encerrado').count()
+    # Estatísticas para os cards (uma consulta agrupada, em cache)
+    stats = estatisticas_chamados(db.session, ContadorChamado, app.config.get('STATS_CACHE_TTL'))
     
     return render_template('dashboard.html', 
                           chamados=chamados,
-                          total_chamados=total_chamados,
-                          em_andamento=em_andamento,
-                          urgentes=urgentes,
-                          concluidos=concluidos)
+                          next_cursor=next_cursor,
+                          total_chamados=stats.total,
+                          em_andamento=stats.por_status['Em Andamento'],
+                          urgentes=stats.por_criticidade['Urgente'],
+                          concluidos=stats.por_status['Encerrado'],
+                          versao_sync=versao_sync,
+                          intervalo_sync=app.config.get('DASHBOARD_SYNC_INTERVAL'))
+
+def atraso_log_alteracoes():
+    """Idade mínima das entradas do log lidas pelo dashboard (ver CHANGE_LOG_SAFETY_LAG)"""
+    return timedelta(seconds=app.config.get('CHANGE_LOG_SAFETY_LAG', 2))
+
+def limite_delta_dashboard():
+    """Limite de /dashboard/delta: folga para 20 abas por IP no intervalo DASHBOARD_SYNC_INTERVAL"""
+    intervalo = max(app.config.get('DASHBOARD_SYNC_INTERVAL', 30), 1)
+    return f"{20 * max(60 // intervalo, 1)} per minute"
+
+@app.route('/dashboard/linhas')
+@login_required
+@admin_required
+@limiter.limit("60 per minute")  # rolagem infinita: uma requisição por página
+def dashboard_linhas():
+    """Página seguinte da tabela de dashboard(), só as linhas (HTML)"""
+    return linhas_tabela_chamados(Chamado.query.options(*opcoes_listagem_chamados()), 'dashboard_linha.html')
+
+@app.route('/dashboard/delta')
+@login_required
+@admin_required
+@limiter.limit(limite_delta_dashboard)
+def dashboard_delta():
+    """
+    Atualização incremental do dashboard: chamados criados, alterados ou
+    excluídos depois da versão `since` (seq do log de alterações), com os
+    mesmos filtros de dashboard(), e os contadores dos cards.
+    
+    - chamados: linhas da tabela (HTML) dos chamados alterados que atendem aos
+      filtros; `novo` indica os criados depois de `since`
+    - removidos: ids excluídos ou que deixaram de atender aos filtros
+    - versao: valor a enviar como `since` na próxima chamada
+    
+    Responde 410 (recarregue a página) se houver alterações demais ou se o
+    log já tiver sido podado além de `since`.
+    """
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'success': False, 'message': 'since deve ser um número inteiro >= 0'}), 400
+    
+    if since < marca_de_corte(db.session, RegistroAlteracao):
+        return jsonify({'success': False, 'message': 'Log de alterações já foi podado: recarregue a página'}), 410
+    
+    entradas = listar_alteracoes(db.session, RegistroAlteracao, since,
+                                 LIMITE_DELTA_DASHBOARD + 1, atraso_log_alteracoes())
+    if len(entradas) > LIMITE_DELTA_DASHBOARD:
+        return jsonify({'success': False, 'message': 'Alterações demais: recarregue a página'}), 410
+    
+    # Só as escritas em chamados mudam as linhas da tabela
+    alterados = {e.registro_id for e in entradas if e.tabela == 'chamado'}
+    criados = {e.registro_id for e in entradas if e.tabela == 'chamado' and e.operacao == 'insert'}
+    chamados = []
+    if alterados:
+        try:
+            query = aplicar_filtros_chamados(Chamado.query.options(*opcoes_listagem_chamados()), request.args)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Data inválida: use o formato AAAA-MM-DD'}), 400
+        chamados = query.filter(Chamado.id.in_(alterados)).all()
+    
+    stats = estatisticas_chamados(db.session, ContadorChamado, app.config.get('STATS_CACHE_TTL'))
+    
+    return jsonify({
+        'success': True,
+        'versao': entradas[-1].seq if entradas else since,
+        'chamados': [{'id': chamado.id, 'novo': chamado.id in criados,
+                      'html': render_template('dashboard_linha.html', chamado=chamado)}
+                     for chamado in chamados],
+        'removidos': sorted(alterados - {chamado.id for chamado in chamados}),
+        'total_chamados': stats.total,
+        'em_andamento': stats.por_status['Em Andamento'],
+        'urgentes': stats.por_criticidade['Urgente'],
+        'concluidos': stats.por_status['Encerrado']
+    })
 
 @app.route('/meus_chamados')
 @login_required
@@ -324,77 +423,26 @@ def meus_chamados():
     if current_user.is_admin:
         return redirect(url_for('dashboard'))
     
-    # Obter parâmetros de filtro da requisição
-    status = request.args.get('status', '')
-    criticidade = request.args.get('criticidade', '')
-    data_inicio = request.args.get('data_inicio', '')
-    data_fim = request.args.get('data_fim', '')
-    busca = request.args.get('busca', '')
-    sort = request.args.get('sort', 'data')
-    order = request.args.get('order', 'desc')
-    
-    # Iniciar a consulta base
-    query = Chamado.query.filter_by(autor_id=current_user.id)
-    
-    # Aplicar filtros
-    if status:
-        query = query.filter(Chamado.status == status)
-    
-    if criticidade:
-        query = query.filter(Chamado.criticidade == criticidade)
-    
-    if data_inicio:
-        data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d')
-        query = query.filter(Chamado.data_criacao >= data_inicio_obj)
-    
-    if data_fim:
-        data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d')
-        # Adicionar um dia para incluir todo o último dia
-        data_fim_obj = data_fim_obj + timedelta(days=1)
-        query = query.filter(Chamado.data_criacao <= data_fim_obj)
-    
-    if busca:
-        query = query.filter(
-            db.or_(
-                Chamado.titulo.ilike(f'%{busca}%'),
-                Chamado.descricao.ilike(f'%{busca}%')
-            )
-        )
-    
-    # Aplicar ordenação
-    if sort == 'id':
-        if order == 'asc':
-            query = query.order_by(Chamado.id.asc())
-        else:
-            query = query.order_by(Chamado.id.desc())
-    elif sort == 'data':
-        if order == 'asc':
-            query = query.order_by(Chamado.data_criacao.asc())
-        else:
-            query = query.order_by(Chamado.data_criacao.desc())
-    elif sort == 'criticidade':
-        # Ordenação personalizada para criticidade
-        criticidade_ordem = case(
-            [
-                (Chamado.criticidade == 'Baixa', 1),
-                (Chamado.criticidade == 'Média', 2),
-                (Chamado.criticidade == 'Alta', 3),
-                (Chamado.criticidade == 'Urgente', 4)
-            ],
-            else_=0
-        )
-        if order == 'asc':
-            query = query.order_by(criticidade_ordem.asc())
-        else:
-            query = query.order_by(criticidade_ordem.desc())
-    else:
-        # Ordenação padrão
-        query = query.order_by(Chamado.data_criacao.desc())
-    
-    # Executar a consulta
-    chamados = query.all()
+    # Filtros, ordenação e paginação por cursor (keyset) da requisição; as
+    # páginas seguintes vêm de /meus_chamados/linhas (rolagem infinita)
+    query = Chamado.query.options(*opcoes_listagem_chamados(com_autor=False)) \
+                         .filter_by(autor_id=current_user.id)
+    try:
+        chamados, next_cursor = pagina_tabela_chamados(query, request.args, request.args.get('cursor', ''))
+    except CursorInvalido:
+        flash('Link de paginação inválido. Exibindo a primeira página.', 'error')
+        chamados, next_cursor = pagina_tabela_chamados(query, request.args)
     
-    return render_template('meus_chamados.html', chamados=chamados)
+    return render_template('meus_chamados.html', chamados=chamados, next_cursor=next_cursor)
+
+@app.route('/meus_chamados/linhas')
+@login_required
+@limiter.limit("60 per minute")  # rolagem infinita: uma requisição por página
+def meus_chamados_linhas():
+    """Página seguinte da tabela de meus_chamados(), só as linhas (HTML)"""
+    query = Chamado.query.options(*opcoes_listagem_chamados(com_autor=False)) \
+                         .filter_by(autor_id=current_user.id)
+    return linhas_tabela_chamados(query, 'meus_chamados_linha.html')
 
 @app.route('/novo-chamado', methods=['GET', 'POST'])
 @login_required
@@ -408,6 +456,10 @@ def novo_chamado():
             flash('Por favor, preencha todos os campos obrigatórios.', 'error')
             return redirect(url_for('novo_chamado'))
         
+        if criticidade and criticidade not in CRITICIDADES:
+            flash('Criticidade inválida.', 'error')
+            return redirect(url_for('novo_chamado'))
+        
         novo = Chamado(
             titulo=titulo,
             descricao=descricao,
@@ -520,7 +572,8 @@ def responder_chamado(id):
     db.session.add(resposta)
     
     # Criar notificação para o autor do chamado
-    if current_user.id != chamado.autor_id:
+    notificar_autor = current_user.id != chamado.autor_id
+    if notificar_autor:
         notificacao = Notificacao(
             usuario_id=chamado.autor_id,
             chamado_id=id,
@@ -528,12 +581,13 @@ def responder_chamado(id):
             mensagem=f'Nova resposta no chamado #{id}'
         )
         db.session.add(notificacao)
-        
-        # Enviar email de notificação
-        autor = Usuario.query.get(chamado.autor_id)
-        enviar_notificacao_email(autor, chamado, "resposta")
     
     db.session.commit()
+    
+    # Enviar email de notificação (depois do commit: ver utils/change_log.py)
+    if notificar_autor:
+        autor = Usuario.query.get(chamado.autor_id)
+        enviar_notificacao_email(autor, chamado, "resposta")
     flash('Resposta enviada com sucesso!', 'success')
     return redirect(url_for('visualizar_chamado', id=id))
 
@@ -557,12 +611,11 @@ def encerrar_chamado(id):
             mensagem=f'Chamado #{id} foi encerrado'
         )
         db.session.add(notificacao)
+        db.session.commit()
         
-        # Enviar email de notificação
+        # Enviar email de notificação (depois do commit: ver utils/change_log.py)
         autor = Usuario.query.get(chamado.autor_id)
         enviar_notificacao_email(autor, chamado, "encerramento")
-        
-        db.session.commit()
         return jsonify({'success': True, 'message': 'Chamado encerrado com sucesso!'})
     except Exception as e:
         db.session.rollback()
@@ -593,12 +646,11 @@ def reprovar_chamado(id):
             mensagem=f'Chamado #{id} foi reprovado. Justificativa: {justificativa}'
         )
         db.session.add(notificacao)
+        db.session.commit()
         
-        # Enviar email de notificação
+        # Enviar email de notificação (depois do commit: ver utils/change_log.py)
         autor = Usuario.query.get(chamado.autor_id)
         email_params = enviar_notificacao_email(autor, chamado, "reprovacao")
-        
-        db.session.commit()
         return jsonify({
             'success': True, 
             'message': 'Chamado reprovado com sucesso!',
@@ -688,23 +740,29 @@ def redefinir_senha(token):
 @app.route('/listar_chamados/<status>')
 @login_required
 def listar_chamados_por_status(status):
+    query = Chamado.query.options(*opcoes_listagem_chamados())
     if status == 'todos':
-        chamados = Chamado.query.all()
+        chamados = query.all()
     elif status == 'abertos':
-        chamados = Chamado.query.filter_by(status='Aberto').all()
+        chamados = query.filter_by(status='Aberto').all()
     elif status == 'encerrados':
-        chamados = Chamado.query.filter_by(status='Encerrado').all()
+        chamados = query.filter_by(status='Encerrado').all()
     elif status == 'reprovados':
-        chamados = Chamado.query.filter_by(status='Reprovado').all()
+        chamados = query.filter_by(status='Reprovado').all()
     else:
         chamados = []
     
+    stats = estatisticas_chamados(db.session, ContadorChamado, app.config.get('STATS_CACHE_TTL'))
+    
     return render_template('dashboard.html', 
                          chamados=chamados,
-                         total_chamados=Chamado.query.count(),
-                         chamados_abertos=Chamado.query.filter_by(status='Aberto').count(),
-                         chamados_encerrados=Chamado.query.filter_by(status='Encerrado').count(),
-                         chamados_reprovados=Chamado.query.filter_by(status='Reprovado').count())
+                         total_chamados=stats.total,
+                         em_andamento=stats.por_status['Em Andamento'],
+                         urgentes=stats.por_criticidade['Urgente'],
+                         concluidos=stats.por_status['Encerrado'],
+                         chamados_abertos=stats.por_status['Aberto'],
+                         chamados_encerrados=stats.por_status['Encerrado'],
+                         chamados_reprovados=stats.por_status['Reprovado'])
 
 @app.route('/get-notifications')
 @login_required
@@ -751,21 +809,64 @@ def mark_notification_read(id):
 def documentacao():
     return render_template('documentacao.html')
 
+# Campos de /api/notifications (fields=...) -> colunas de Notificacao necessárias
+COLUNAS_CAMPOS_NOTIFICACAO = {
+    'id': (Notificacao.id,),
+    'message': (Notificacao.mensagem,),
+    'time': (Notificacao.data_criacao,),
+    'read': (Notificacao.lida,),
+}
+
 @app.route('/api/notifications')
 @login_required
 def get_notifications_api():
-    notifications = Notificacao.query.filter_by(
-        usuario_id=current_user.id
-    ).order_by(Notificacao.data_criacao.desc()).all()
+    """
+    Notificações do usuário, mais recentes primeiro, uma página por vez
+    
+    Parâmetros: limit (padrão ITENS_POR_PAGINA, máximo 200), cursor
+    (next_cursor da página anterior) e fields. unread_count é contado no
+    banco, sobre todas as notificações do usuário.
+    """
+    try:
+        campos = campos_pedidos(request.args.get('fields'), tuple(COLUNAS_CAMPOS_NOTIFICACAO))
+    except CamposInvalidos as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    limite = request.args.get('limit', ITENS_POR_PAGINA, type=int)
+    if not 1 <= limite <= 200:
+        return jsonify({'success': False, 'message': 'limit deve estar entre 1 e 200'}), 400
+    
+    # Só as colunas pedidas, uma página por vez (keyset sobre ix_notificacao_usuario_data)
+    colunas = colunas_necessarias(campos, COLUNAS_CAMPOS_NOTIFICACAO)
+    query = Notificacao.query.options(load_only(*colunas)) \
+                             .filter(Notificacao.usuario_id == current_user.id)
+    try:
+        notifications, next_cursor = paginar_keyset(query, chaves_ordenacao_notificacoes(Notificacao),
+                                                    request.args.get('cursor'), limite)
+    except CursorInvalido as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    # Contagem no banco (índice ix_notificacao_usuario_lida_data)
+    unread_count = db.session.query(db.func.count(Notificacao.id)) \
+        .filter(Notificacao.usuario_id == current_user.id, Notificacao.lida == False) \
+        .scalar()
+    
+    def para_dict(n):
+        item = {}
+        if 'id' in campos:
+            item['id'] = n.id
+        if 'message' in campos:
+            item['message'] = n.mensagem
+        if 'time' in campos:
+            item['time'] = n.data_criacao.strftime('%d/%m/%Y %H:%M')
+        if 'read' in campos:
+            item['read'] = n.lida
+        return item
     
     return jsonify({
-        'notifications': [{
-            'id': n.id,
-            'message': n.mensagem,
-            'time': n.data_criacao.strftime('%d/%m/%Y %H:%M'),
-            'read': n.lida
-        } for n in notifications],
-        'unread_count': len([n for n in notifications if not n.lida])
+        'notifications': [para_dict(n) for n in notifications],
+        'unread_count': unread_count,
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/notifications/<int:id>', methods=['DELETE'])
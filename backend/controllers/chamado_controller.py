@@ -3,10 +3,34 @@ from flask_login import current_user
 from backend.models.chamado import Chamado
 from backend.models.resposta import Resposta
 from backend.models.notificacao import Notificacao
+from backend.models.usuario import Usuario
+from backend.models.anexo import Anexo
+from backend.models.registro_alteracao import RegistroAlteracao
 from backend.utils.email_service import email_service
-from datetime import datetime
+from utils.text_normalizer import filtro_busca_normalizada
+from utils.fieldsets import colunas_necessarias
+from utils.versionamento import assinatura_versoes, assinaturas_listagem
+from utils.change_log import marca_alteracoes
+from sqlalchemy import func, select, exists
+from sqlalchemy.orm import load_only
+from datetime import datetime, timedelta
 import os
 
+# Campos aceitos em `fields` na listagem (/api/chamados) e no detalhe (/api/chamados/<id>)
+CAMPOS_LISTAGEM = ('id', 'titulo', 'descricao', 'status', 'criticidade', 'data_criacao',
+                   'autor_id', 'autor_nome', 'num_respostas', 'tem_anexos')
+CAMPOS_DETALHE = ('id', 'titulo', 'descricao', 'status', 'criticidade', 'data_criacao',
+                  'autor_id', 'autor_nome', 'anexos', 'respostas')
+
+# Colunas de Chamado carregadas para cada campo do detalhe
+COLUNAS_DETALHE = {
+    'titulo': (Chamado.titulo,),
+    'descricao': (Chamado.descricao,),
+    'status': (Chamado.status,),
+    'criticidade': (Chamado.criticidade,),
+    'data_criacao': (Chamado.data_criacao,),
+}
+
 class ChamadoController:
     """
     Controlador para operações relacionadas a chamados
@@ -15,60 +39,86 @@ class ChamadoController:
     def __init__(self, db):
         self.db = db
     
-    def get_chamados(self, filtros=None):
+    # Linhas lidas do banco por vez em iterar_chamados
+    LOTE_STREAMING = 500
+    
+    def _query_chamados(self, filtros=None, campos=CAMPOS_LISTAGEM):
+        """
+        Query da listagem de chamados, já filtrada e ordenada, com uma coluna
+        (rotulada com o nome do campo) por campo pedido. Nome do autor, número
+        de respostas e existência de anexos vêm no mesmo SELECT (JOIN e
+        subconsultas correlacionadas), e só quando pedidos.
+        """
+        expressoes = {
+            'id': Chamado.id,
+            'titulo': Chamado.titulo,
+            'descricao': Chamado.descricao,
+            'status': Chamado.status,
+            'criticidade': Chamado.criticidade,
+            'data_criacao': Chamado.data_criacao,
+            'autor_id': Chamado.autor_id,
+            'autor_nome': Usuario.nome,
+            'num_respostas': select(func.count(Resposta.id))
+                .where(Resposta.chamado_id == Chamado.id)
+                .scalar_subquery(),
+            'tem_anexos': exists().where(Anexo.chamado_id == Chamado.id),
+        }
+        query = self.db.session.query(*[expressoes[campo].label(campo) for campo in campos]) \
+            .select_from(Chamado)
+        if 'autor_nome' in campos:
+            query = query.outerjoin(Usuario, Chamado.autor_id == Usuario.id)
+        
+        # Aplicar filtros, se fornecidos
+        if filtros:
+            if 'status' in filtros and filtros['status']:
+                query = query.filter(Chamado.status == filtros['status'])
+            
+            if 'criticidade' in filtros and filtros['criticidade']:
+                query = query.filter(Chamado.criticidade == filtros['criticidade'])
+            
+            if 'data_inicio' in filtros and filtros['data_inicio']:
+                data_inicio = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d')
+                query = query.filter(Chamado.data_criacao >= data_inicio)
+            
+            if 'data_fim' in filtros and filtros['data_fim']:
+                data_fim = datetime.strptime(filtros['data_fim'], '%Y-%m-%d')
+                query = query.filter(Chamado.data_criacao <= data_fim)
+            
+            if 'texto' in filtros and filtros['texto']:
+                query = query.filter(filtro_busca_normalizada(Chamado, filtros['texto']))
+        
+        # Filtrar por usuário, a menos que seja admin
+        if not current_user.is_admin:
+            query = query.filter(Chamado.autor_id == current_user.id)
+        
+        # Ordenar por ID decrescente (mais recentes primeiro)
+        return query.order_by(Chamado.id.desc())
+    
+    @staticmethod
+    def _chamado_para_dict(linha, campos=CAMPOS_LISTAGEM):
+        """Converte uma linha de _query_chamados para o formato da API"""
+        item = {}
+        for campo in campos:
+            valor = getattr(linha, campo)
+            if campo == 'data_criacao':
+                valor = valor.strftime('%Y-%m-%d %H:%M:%S')
+            elif campo == 'autor_nome':
+                valor = valor or 'Desconhecido'
+            elif campo == 'tem_anexos':
+                valor = bool(valor)
+            item[campo] = valor
+        return item
+    
+    def get_chamados(self, filtros=None, campos=CAMPOS_LISTAGEM):
         """
-        Obtém a lista de chamados com filtros opcionais
+        Obtém a lista de chamados com filtros opcionais; `campos` limita as
+        colunas lidas e devolvidas (ver CAMPOS_LISTAGEM)
         """
         try:
-            # Construir a query base
-            query = Chamado.query
-            
-            # Aplicar filtros, se fornecidos
-            if filtros:
-                if 'status' in filtros and filtros['status']:
-                    query = query.filter(Chamado.status == filtros['status'])
-                
-                if 'criticidade' in filtros and filtros['criticidade']:
-                    query = query.filter(Chamado.criticidade == filtros['criticidade'])
-                
-                if 'data_inicio' in filtros and filtros['data_inicio']:
-                    data_inicio = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d')
-                    query = query.filter(Chamado.data_criacao >= data_inicio)
-                
-                if 'data_fim' in filtros and filtros['data_fim']:
-                    data_fim = datetime.strptime(filtros['data_fim'], '%Y-%m-%d')
-                    query = query.filter(Chamado.data_criacao <= data_fim)
-                
-                if 'texto' in filtros and filtros['texto']:
-                    search_term = f"%{filtros['texto']}%"
-                    query = query.filter(
-                        (Chamado.titulo.ilike(search_term)) | 
-                        (Chamado.descricao.ilike(search_term))
-                    )
-            
-            # Filtrar por usuário, a menos que seja admin
-            if not current_user.is_admin:
-                query = query.filter(Chamado.autor_id == current_user.id)
-            
-            # Ordenar por ID decrescente (mais recentes primeiro)
-            chamados = query.order_by(Chamado.id.desc()).all()
+            chamados = self._query_chamados(filtros, campos).all()
             
             # Converter para dicionários
-            result = []
-            for chamado in chamados:
-                chamado_dict = {
-                    'id': chamado.id,
-                    'titulo': chamado.titulo,
-                    'descricao': chamado.descricao,
-                    'status': chamado.status,
-                    'criticidade': chamado.criticidade,
-                    'data_criacao': chamado.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
-                    'autor_id': chamado.autor_id,
-                    'autor_nome': chamado.autor.nome if chamado.autor else 'Desconhecido',
-                    'num_respostas': len(chamado.respostas),
-                    'tem_anexos': bool(chamado.anexos)
-                }
-                result.append(chamado_dict)
+            result = [self._chamado_para_dict(linha, campos) for linha in chamados]
             
             return {'success': True, 'chamados': result}
             
@@ -76,54 +126,88 @@ class ChamadoController:
             current_app.logger.error(f"Erro ao obter chamados: {str(e)}")
             return {'success': False, 'message': f"Erro ao obter chamados: {str(e)}"}
     
-    def get_chamado(self, chamado_id):
+    def iterar_chamados(self, filtros=None, campos=CAMPOS_LISTAGEM):
         """
-        Obtém os detalhes de um chamado específico
+        Mesma listagem de get_chamados, como gerador de dicionários. As
+        linhas são lidas do banco em lotes (yield_per), então a memória usada
+        não depende do número de chamados. Filtros inválidos levantam
+        ValueError na chamada, antes de qualquer linha ser lida.
+        """
+        linhas = self._query_chamados(filtros, campos).yield_per(self.LOTE_STREAMING)
+        return (self._chamado_para_dict(linha, campos) for linha in linhas)
+    
+    def versao_chamados(self, filtros=None):
+        """
+        Assinatura das versões dos chamados da listagem (ver
+        utils/versionamento.py): lê só id e versão, com os mesmos filtros e
+        ordem, e só quando o log de alterações mudou desde o último cálculo
+        para este usuário e filtros. Filtros inválidos levantam ValueError.
+        """
+        query = self._query_chamados(filtros, ('id',))
+        atraso = timedelta(seconds=current_app.config.get('CHANGE_LOG_SAFETY_LAG', 2))
+        marca = marca_alteracoes(self.db.session, RegistroAlteracao, atraso)
+        escopo = 'admin' if current_user.is_admin else current_user.id
+        chave = (escopo, tuple(sorted((campo, str(valor)) for campo, valor in (filtros or {}).items() if valor)))
+        return assinaturas_listagem.obter(chave, marca, lambda: assinatura_versoes(query, Chamado))
+    
+    def versao_chamado(self, chamado_id):
+        """
+        Versão do chamado, ou None se ele não existir ou o usuário não puder
+        vê-lo (nesses casos a resposta vem de get_chamado)
+        """
+        linha = self.db.session.query(Chamado.versao, Chamado.autor_id) \
+            .filter(Chamado.id == chamado_id).first()
+        if linha is None or (not current_user.is_admin and linha.autor_id != current_user.id):
+            return None
+        return linha.versao
+    
+    @staticmethod
+    def _anexos_para_lista(anexos):
+        return [
+            {
+                'id': anexo.id,
+                'nome': anexo.nome,
+                'tipo': anexo.tipo,
+                'tamanho': anexo.tamanho
+            } for anexo in anexos
+        ]
+    
+    def get_chamado(self, chamado_id, campos=CAMPOS_DETALHE):
+        """
+        Obtém os detalhes de um chamado específico; `campos` limita as colunas
+        lidas e as consultas feitas (autor, anexos e respostas só se pedidos)
         """
         try:
-            # Buscar o chamado
-            chamado = Chamado.query.get_or_404(chamado_id)
+            # Buscar o chamado (autor_id sempre, para a verificação de permissão)
+            colunas = colunas_necessarias(campos, COLUNAS_DETALHE, sempre=(Chamado.id, Chamado.autor_id))
+            chamado = Chamado.query.options(load_only(*colunas)).get_or_404(chamado_id)
             
             # Verificar permissão
             if not current_user.is_admin and chamado.autor_id != current_user.id:
                 return {'success': False, 'message': 'Você não tem permissão para visualizar este chamado'}, 403
             
-            # Converter para dicionário
-            chamado_dict = {
-                'id': chamado.id,
-                'titulo': chamado.titulo,
-                'descricao': chamado.descricao,
-                'status': chamado.status,
-                'criticidade': chamado.criticidade,
-                'data_criacao': chamado.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
-                'autor_id': chamado.autor_id,
-                'autor_nome': chamado.autor.nome if chamado.autor else 'Desconhecido',
-                'anexos': [
-                    {
-                        'id': anexo.id,
-                        'nome': anexo.nome,
-                        'tipo': anexo.tipo,
-                        'tamanho': anexo.tamanho
-                    } for anexo in chamado.anexos
-                ],
-                'respostas': [
-                    {
-                        'id': resposta.id,
-                        'conteudo': resposta.conteudo,
-                        'data_criacao': resposta.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
-                        'usuario_id': resposta.usuario_id,
-                        'usuario_nome': resposta.usuario.nome if resposta.usuario else 'Desconhecido',
-                        'anexos': [
-                            {
-                                'id': anexo.id,
-                                'nome': anexo.nome,
-                                'tipo': anexo.tipo,
-                                'tamanho': anexo.tamanho
-                            } for anexo in resposta.anexos
-                        ]
-                    } for resposta in chamado.respostas
-                ]
-            }
+            # Converter para dicionário (apenas os campos pedidos)
+            chamado_dict = {}
+            for campo in campos:
+                if campo == 'data_criacao':
+                    chamado_dict[campo] = chamado.data_criacao.strftime('%Y-%m-%d %H:%M:%S')
+                elif campo == 'autor_nome':
+                    chamado_dict[campo] = chamado.autor.nome if chamado.autor else 'Desconhecido'
+                elif campo == 'anexos':
+                    chamado_dict[campo] = self._anexos_para_lista(chamado.anexos)
+                elif campo == 'respostas':
+                    chamado_dict[campo] = [
+                        {
+                            'id': resposta.id,
+                            'conteudo': resposta.conteudo,
+                            'data_criacao': resposta.data_resposta.strftime('%Y-%m-%d %H:%M:%S'),
+                            'usuario_id': resposta.autor_id,
+                            'usuario_nome': resposta.autor_resposta.nome if resposta.autor_resposta else 'Desconhecido',
+                            'anexos': self._anexos_para_lista(resposta.anexos)
+                        } for resposta in chamado.respostas
+                    ]
+                else:
+                    chamado_dict[campo] = getattr(chamado, campo)
             
             return {'success': True, 'chamado': chamado_dict}
             
@@ -172,6 +256,9 @@ class ChamadoController:
                         )
                         self.db.session.add(anexo)
             
+            # Os anexos são confirmados antes dos e-mails (ver utils/change_log.py)
+            self.db.session.commit()
+            
             # Notificar administradores
             if current_app.config.get('NOTIFICAR_ADMINS_NOVOS_CHAMADOS', False):
                 admins = Usuario.query.filter_by(admin=True).all()
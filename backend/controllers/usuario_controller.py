@@ -3,8 +3,16 @@ from flask_login import current_user, login_user, logout_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from backend.models.usuario import Usuario
 from backend.models.notificacao import Notificacao
+from utils.pagination import (chaves_ordenacao_usuarios, chaves_ordenacao_notificacoes,
+                              paginar_keyset, CursorInvalido)
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from datetime import datetime
 
+# Tamanho de página das listagens de usuários e notificações
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
 class UsuarioController:
     """
     Controlador para operações relacionadas a usuários
@@ -13,38 +21,47 @@ class UsuarioController:
     def __init__(self, db):
         self.db = db
     
-    def get_usuarios(self):
+    def get_usuarios(self, limite=LIMITE_PADRAO, cursor=None, sort='nome', order='asc'):
         """
-        Obtém a lista de usuários (apenas para administradores)
+        Obtém uma página da lista de usuários (apenas para administradores),
+        ordenada por nome, email ou id. Para a página seguinte, envie
+        next_cursor como `cursor` (None na última página).
         """
         try:
             # Verificar se é admin
             if not current_user.is_admin:
                 return {'success': False, 'message': 'Permissão negada'}, 403
             
-            # Buscar todos os usuários
-            usuarios = Usuario.query.all()
-            
-            # Converter para dicionários
-            result = []
-            for usuario in usuarios:
-                usuario_dict = {
-                    'id': usuario.id,
-                    'nome': usuario.nome,
-                    'email': usuario.email,
-                    'admin': usuario.admin,
-                    'ativo': usuario.ativo,
-                    'setor': usuario.setor,
-                    'data_criacao': usuario.data_criacao.strftime('%Y-%m-%d %H:%M:%S') if usuario.data_criacao else None
-                }
-                result.append(usuario_dict)
-            
-            return {'success': True, 'usuarios': result}
+            if not 1 <= limite <= LIMITE_MAXIMO:
+                return {'success': False, 'message': f'limit deve estar entre 1 e {LIMITE_MAXIMO}'}, 400
+            
+            # Só as colunas exibidas, uma página por vez (keyset sobre o índice da ordenação)
+            query = Usuario.query.options(load_only(Usuario.id, Usuario.nome, Usuario.email, Usuario.is_admin))
+            chaves = chaves_ordenacao_usuarios(Usuario, sort, order)
+            try:
+                usuarios, next_cursor = paginar_keyset(query, chaves, cursor, limite)
+            except CursorInvalido as e:
+                return {'success': False, 'message': str(e)}, 400
+            
+            return {
+                'success': True,
+                'usuarios': [self._usuario_para_dict(usuario) for usuario in usuarios],
+                'next_cursor': next_cursor
+            }
             
         except Exception as e:
             current_app.logger.error(f"Erro ao obter usuários: {str(e)}")
             return {'success': False, 'message': f"Erro ao obter usuários: {str(e)}"}
     
+    @staticmethod
+    def _usuario_para_dict(usuario):
+        return {
+            'id': usuario.id,
+            'nome': usuario.nome,
+            'email': usuario.email,
+            'admin': usuario.is_admin
+        }
+    
     def get_usuario(self, usuario_id):
         """
         Obtém os detalhes de um usuário específico
@@ -57,18 +74,7 @@ class UsuarioController:
             # Buscar o usuário
             usuario = Usuario.query.get_or_404(usuario_id)
             
-            # Converter para dicionário
-            usuario_dict = {
-                'id': usuario.id,
-                'nome': usuario.nome,
-                'email': usuario.email,
-                'admin': usuario.admin,
-                'ativo': usuario.ativo,
-                'setor': usuario.setor,
-                'data_criacao': usuario.data_criacao.strftime('%Y-%m-%d %H:%M:%S') if usuario.data_criacao else None
-            }
-            
-            return {'success': True, 'usuario': usuario_dict}
+            return {'success': True, 'usuario': self._usuario_para_dict(usuario)}
             
         except Exception as e:
             current_app.logger.error(f"Erro ao obter usuário: {str(e)}")
@@ -237,13 +243,27 @@ class UsuarioController:
             current_app.logger.error(f"Erro ao realizar logout: {str(e)}")
             return {'success': False, 'message': f"Erro ao realizar logout: {str(e)}"}
     
-    def get_notificacoes(self):
+    def get_notificacoes(self, limite=LIMITE_PADRAO, cursor=None):
         """
-        Obtém as notificações do usuário atual
+        Obtém uma página das notificações do usuário atual, mais recentes
+        primeiro, e o total de não lidas (contado no banco)
         """
         try:
-            # Buscar notificações do usuário
-            notificacoes = Notificacao.query.filter_by(usuario_id=current_user.id).order_by(Notificacao.data_criacao.desc()).all()
+            if not 1 <= limite <= LIMITE_MAXIMO:
+                return {'success': False, 'message': f'limit deve estar entre 1 e {LIMITE_MAXIMO}'}, 400
+            
+            query = Notificacao.query.filter_by(usuario_id=current_user.id)
+            try:
+                notificacoes, next_cursor = paginar_keyset(
+                    query, chaves_ordenacao_notificacoes(Notificacao), cursor, limite
+                )
+            except CursorInvalido as e:
+                return {'success': False, 'message': str(e)}, 400
+            
+            # Contagem no banco (índice ix_notificacao_usuario_lida_data)
+            nao_lidas = self.db.session.query(func.count(Notificacao.id)) \
+                .filter(Notificacao.usuario_id == current_user.id, Notificacao.lida == False) \
+                .scalar()
             
             # Converter para dicionários
             result = []
@@ -251,14 +271,14 @@ class UsuarioController:
                 notificacao_dict = {
                     'id': notificacao.id,
                     'tipo': notificacao.tipo,
-                    'conteudo': notificacao.conteudo,
-                    'lido': notificacao.lido,
+                    'conteudo': notificacao.mensagem,
+                    'lido': notificacao.lida,
                     'data_criacao': notificacao.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
                     'chamado_id': notificacao.chamado_id
                 }
                 result.append(notificacao_dict)
             
-            return {'success': True, 'notificacoes': result}
+            return {'success': True, 'notificacoes': result, 'nao_lidas': nao_lidas, 'next_cursor': next_cursor}
             
         except Exception as e:
             current_app.logger.error(f"Erro ao obter notificações: {str(e)}")
@@ -277,7 +297,7 @@ class UsuarioController:
                 return {'success': False, 'message': 'Permissão negada'}, 403
             
             # Marcar como lida
-            notificacao.lido = True
+            notificacao.lida = True
             self.db.session.commit()
             
             return {'success': True, 'message': 'Notificação marcada como lida'}
@@ -10,3 +10,18 @@ from backend.models.chamado import Chamado
 from backend.models.resposta import Resposta
 from backend.models.notificacao import Notificacao
 from backend.models.anexo import Anexo
+from backend.models.registro_alteracao import RegistroAlteracao
+from backend.models.contador_chamado import ContadorChamado
+
+# Log de alterações gravado na mesma transação das escritas
+from utils.change_log import monitorar_alteracoes, monitorar_nomes
+monitorar_alteracoes(RegistroAlteracao.__table__, Chamado, Resposta, Anexo)
+monitorar_nomes(RegistroAlteracao.__table__, Usuario)
+
+# Contadores por status/criticidade/autor, ajustados na mesma transação
+from utils.contadores import monitorar_contadores
+monitorar_contadores(ContadorChamado.__table__, Chamado)
+
+# Versão por chamado (ETags), incrementada na mesma transação
+from utils.versionamento import monitorar_versao
+monitorar_versao(Chamado, Resposta, Usuario, Anexo)
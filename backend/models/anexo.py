@@ -18,6 +18,12 @@ class Anexo(db.Model):
     chamado_id = db.Column(db.Integer, db.ForeignKey('chamado.id'), nullable=True)
     resposta_id = db.Column(db.Integer, db.ForeignKey('resposta.id'), nullable=True)
     
+    __table_args__ = (
+        # Anexos de um chamado / de uma resposta
+        db.Index('ix_anexo_chamado', 'chamado_id'),
+        db.Index('ix_anexo_resposta', 'resposta_id'),
+    )
+    
     # Um anexo pode pertencer a um chamado ou a uma resposta, mas não a ambos
     chamado = db.relationship('Chamado', backref=db.backref('anexos', lazy='dynamic'), foreign_keys=[chamado_id])
     resposta = db.relationship('Resposta', backref=db.backref('anexos', lazy='dynamic'), foreign_keys=[resposta_id])
@@ -1,5 +1,9 @@
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import validates
 from backend.models import db
+from utils.text_normalizer import normalizar_texto
+from utils.enum_types import EnumInteiro, STATUS_CHAMADO, CRITICIDADES, validar_rotulo
 
 class Chamado(db.Model):
     """Modelo para armazenar informações dos chamados"""
@@ -7,8 +11,36 @@ class Chamado(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(100), nullable=False)
     descricao = db.Column(db.Text, nullable=False)
-    status = db.Column(db.String(20), default='Aberto')
-    criticidade = db.Column(db.String(20), default='Média')
+    # Guardados como SMALLINT; o ORM vê os rótulos (ver utils/enum_types.py)
+    status = db.Column(EnumInteiro(STATUS_CHAMADO), default='Aberto')
+    criticidade = db.Column(EnumInteiro(CRITICIDADES), default='Média')
     data_criacao = db.Column(db.DateTime, default=datetime.now)
     autor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    # Versões em minúsculas e sem acentos de titulo/descricao, usadas nas buscas.
+    # Sem índice: o LIKE '%termo%' do fallback sem FTS5 lê a tabela de qualquer jeito
+    titulo_norm = db.Column(db.String(200))
+    descricao_norm = db.Column(db.Text)
+    # Incrementada a cada alteração do chamado, de suas respostas ou anexos (ETags)
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     respostas = db.relationship('Resposta', backref='chamado', lazy=True)
+
+    __table_args__ = (
+        # Filtros da busca estruturada (status:, criticidade:, autor:, desde:/ate:),
+        # todos combinados com a ordenação/intervalo por data de criação
+        db.Index('ix_chamado_data_criacao', 'data_criacao'),
+        db.Index('ix_chamado_status_data', 'status', 'data_criacao'),
+        db.Index('ix_chamado_criticidade_data', 'criticidade', 'data_criacao'),
+        db.Index('ix_chamado_autor_data', 'autor_id', 'data_criacao'),
+    )
+
+    @validates('status', 'criticidade')
+    def validar_enum(self, campo, valor):
+        """Só aceita os rótulos conhecidos de status/criticidade"""
+        return validar_rotulo(self.__table__.c[campo].type, campo, valor)
+
+@event.listens_for(Chamado, 'before_insert')
+@event.listens_for(Chamado, 'before_update')
+def normalizar_campos_busca(mapper, connection, target):
+    """Mantém as colunas normalizadas em sincronia com titulo/descricao"""
+    target.titulo_norm = normalizar_texto(target.titulo)
+    target.descricao_norm = normalizar_texto(target.descricao)
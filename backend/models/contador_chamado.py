@@ -0,0 +1,9 @@
+from backend.models import db
+
+class ContadorChamado(db.Model):
+    """Quantidade de chamados por status, criticidade e autor (ver utils/contadores.py)"""
+    __tablename__ = 'contador_chamado'
+    status = db.Column(db.String(20), primary_key=True)
+    criticidade = db.Column(db.String(20), primary_key=True)
+    autor_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
@@ -11,3 +11,9 @@ class Notificacao(db.Model):
     mensagem = db.Column(db.String(200), nullable=False)
     lida = db.Column(db.Boolean, default=False)
     data_criacao = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        # Notificações do usuário (todas ou só as não lidas), mais recentes primeiro
+        db.Index('ix_notificacao_usuario_data', 'usuario_id', 'data_criacao'),
+        db.Index('ix_notificacao_usuario_lida_data', 'usuario_id', 'lida', 'data_criacao'),
+    )
@@ -0,0 +1,27 @@
+from datetime import datetime
+from backend.models import db
+
+class RegistroAlteracao(db.Model):
+    """Log append-only das escritas em chamados, respostas e anexos (ver utils/change_log.py)"""
+    __tablename__ = 'registro_alteracao'
+    seq = db.Column(db.Integer, primary_key=True)
+    tabela = db.Column(db.String(30), nullable=False)
+    operacao = db.Column(db.String(10), nullable=False)
+    registro_id = db.Column(db.Integer, nullable=False)
+    chamado_id = db.Column(db.Integer)
+    data = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_registro_alteracao_registro', 'tabela', 'registro_id', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'tabela': self.tabela,
+            'operacao': self.operacao,
+            'id': self.registro_id,
+            'chamado_id': self.chamado_id,
+            'data': self.data.strftime('%Y-%m-%d %H:%M:%S')
+        }
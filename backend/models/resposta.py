@@ -1,5 +1,7 @@
 from datetime import datetime
+from sqlalchemy import event
 from backend.models import db
+from utils.text_normalizer import normalizar_texto
 
 class Resposta(db.Model):
     """Modelo para armazenar as respostas dos chamados"""
@@ -9,3 +11,16 @@ class Resposta(db.Model):
     data_resposta = db.Column(db.DateTime, default=datetime.now)
     chamado_id = db.Column(db.Integer, db.ForeignKey('chamado.id'), nullable=False)
     autor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    # Conteúdo em minúsculas e sem acentos, usado na busca sem FTS5
+    conteudo_norm = db.Column(db.Text)
+
+    __table_args__ = (
+        # Respostas de um chamado, contagem e última resposta (max id) por chamado
+        db.Index('ix_resposta_chamado', 'chamado_id', 'id'),
+    )
+
+@event.listens_for(Resposta, 'before_insert')
+@event.listens_for(Resposta, 'before_update')
+def normalizar_conteudo_busca(mapper, connection, target):
+    """Mantém conteudo_norm em sincronia com conteudo"""
+    target.conteudo_norm = normalizar_texto(target.conteudo)
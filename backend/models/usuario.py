@@ -14,5 +14,10 @@ class Usuario(UserMixin, db.Model):
     respostas = db.relationship('Resposta', backref='autor_resposta', lazy=True)
     notificacoes = db.relationship('Notificacao', backref='usuario', lazy=True)
 
+    __table_args__ = (
+        # Listagem de usuários ordenada por nome (paginação por cursor)
+        db.Index('ix_usuario_nome', 'nome', 'id'),
+    )
+
     def has_role(self, role):
         return self.is_admin if role == 'ADM' else True
@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, current_app
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, current_app, Response, stream_with_context, json
 from flask_login import login_required, current_user
-from backend.controllers.chamado_controller import ChamadoController
+from backend.controllers.chamado_controller import ChamadoController, CAMPOS_LISTAGEM, CAMPOS_DETALHE
 from backend.models.chamado import Chamado
 from backend.models.resposta import Resposta
 from backend.utils.pdf_generator import PDFGenerator
+from utils.fieldsets import campos_pedidos, CamposInvalidos
+from utils.versionamento import gerar_etag
 import os
 from datetime import datetime
 
@@ -198,12 +200,72 @@ def exportar_chamado(chamado_id):
     )
 
 # Rotas da API para chamados
+# Tamanho aproximado (caracteres) de cada pedaço enviado no modo streaming
+TAMANHO_PEDACO = 64 * 1024
+
+def _json_em_partes(chamados):
+    """
+    Gera o JSON {"chamados": [...], "success": true} aos poucos, sem montar
+    a lista inteira. "success" vem no final: se a leitura falhar no meio, a
+    resposta termina com "success": false e a mensagem de erro.
+    """
+    partes, tamanho = ['{"chamados":['], 0
+    try:
+        for i, chamado in enumerate(chamados):
+            item = json.dumps(chamado, separators=(',', ':'))
+            partes.append(',' + item if i else item)
+            tamanho += len(item)
+            if tamanho >= TAMANHO_PEDACO:
+                yield ''.join(partes)
+                partes, tamanho = [], 0
+    except Exception as e:
+        current_app.logger.error(f"Erro ao obter chamados: {str(e)}")
+        partes.append('],"success":false,"message":' + json.dumps(f"Erro ao obter chamados: {str(e)}") + '}')
+        yield ''.join(partes)
+        return
+    partes.append('],"success":true}')
+    yield ''.join(partes)
+
+def _com_etag(resposta, etag):
+    """Marca a resposta com a ETag; o navegador guarda, mas sempre revalida"""
+    if etag:
+        resposta.set_etag(etag)
+        resposta.cache_control.private = True
+        resposta.cache_control.no_cache = True
+    return resposta
+
+def _nao_modificado(etag):
+    """Resposta 304 se o If-None-Match do cliente já tem esta ETag, senão None"""
+    if etag and request.if_none_match.contains_weak(etag):
+        return _com_etag(Response(status=304), etag)
+    return None
+
+def _etag_listagem(filtros):
+    """ETag da listagem: versões dos chamados filtrados + usuário + parâmetros"""
+    try:
+        assinatura = chamado_controller.versao_chamados(filtros)
+    except ValueError:
+        # Filtros inválidos: a listagem responde com o erro, sem ETag
+        return None
+    escopo = 'admin' if current_user.is_admin else current_user.id
+    return gerar_etag('chamados', escopo, sorted(request.args.items(multi=True)), assinatura)
+
 @chamado_routes.route('/api/chamados', methods=['GET'])
 @login_required
 def api_listar_chamados():
     """
     API para listar chamados
+    
+    Com stream=1 a resposta (mesmo formato) é enviada enquanto os chamados são
+    lidos do banco, com uso de memória constante; indicado para listagens grandes.
+    Com fields=id,titulo,... só esses campos são lidos e devolvidos.
+    Com If-None-Match igual à ETag atual responde 304, sem montar a lista.
     """
+    try:
+        campos = campos_pedidos(request.args.get('fields'), CAMPOS_LISTAGEM)
+    except CamposInvalidos as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
     # Obter parâmetros de filtro
     filtros = {
         'status': request.args.get('status'),
@@ -213,17 +275,50 @@ def api_listar_chamados():
         'texto': request.args.get('texto')
     }
     
-    resultado = chamado_controller.get_chamados(filtros)
-    return jsonify(resultado)
+    etag = _etag_listagem(filtros)
+    nao_modificado = _nao_modificado(etag)
+    if nao_modificado:
+        return nao_modificado
+    
+    if request.args.get('stream') == '1':
+        try:
+            chamados = chamado_controller.iterar_chamados(filtros, campos)
+        except Exception as e:
+            return jsonify({'success': False, 'message': f"Erro ao obter chamados: {str(e)}"}), 400
+        resposta = Response(stream_with_context(_json_em_partes(chamados)), mimetype='application/json')
+        return _com_etag(resposta, etag)
+    
+    resultado = chamado_controller.get_chamados(filtros, campos)
+    if not resultado.get('success'):
+        return jsonify(resultado)
+    return _com_etag(jsonify(resultado), etag)
 
 @chamado_routes.route('/api/chamados/<int:chamado_id>', methods=['GET'])
 @login_required
 def api_get_chamado(chamado_id):
     """
-    API para obter um chamado específico
+    API para obter um chamado específico (fields=... limita os campos)
+    
+    Com If-None-Match igual à ETag atual responde 304, sem carregar o chamado.
     """
-    resultado = chamado_controller.get_chamado(chamado_id)
-    return jsonify(resultado)
+    try:
+        campos = campos_pedidos(request.args.get('fields'), CAMPOS_DETALHE)
+    except CamposInvalidos as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    versao = chamado_controller.versao_chamado(chamado_id)
+    etag = gerar_etag('chamado', chamado_id, versao, campos) if versao is not None else None
+    nao_modificado = _nao_modificado(etag)
+    if nao_modificado:
+        return nao_modificado
+    
+    resultado = chamado_controller.get_chamado(chamado_id, campos)
+    if isinstance(resultado, tuple):
+        resultado, codigo = resultado
+        return jsonify(resultado), codigo
+    if not resultado.get('success'):
+        return jsonify(resultado)
+    return _com_etag(jsonify(resultado), etag)
 
 @chamado_routes.route('/api/chamados', methods=['POST'])
 @login_required
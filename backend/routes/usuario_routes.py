@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
 from flask_login import login_required, current_user, login_user, logout_user
-from backend.controllers.usuario_controller import UsuarioController
+from backend.controllers.usuario_controller import UsuarioController, LIMITE_PADRAO
 from backend.models.usuario import Usuario
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
@@ -227,8 +227,17 @@ def marcar_notificacao_lida(notificacao_id):
 def api_listar_usuarios():
     """
     API para listar usuários (apenas para administradores)
-    """
-    resultado = usuario_controller.get_usuarios()
+    
+    Parâmetros: limit (padrão 50, máximo 200), cursor (next_cursor da página
+    anterior), sort (nome, email ou id) e order (asc ou desc)
+    """
+    limite = request.args.get('limit', LIMITE_PADRAO, type=int)
+    resultado = usuario_controller.get_usuarios(limite, request.args.get('cursor'),
+                                                request.args.get('sort', 'nome'),
+                                                request.args.get('order', 'asc'))
+    if isinstance(resultado, tuple):
+        resultado, codigo = resultado
+        return jsonify(resultado), codigo
     return jsonify(resultado)
 
 @usuario_routes.route('/api/usuarios/<int:usuario_id>', methods=['GET'])
@@ -292,8 +301,15 @@ def api_logout():
 def api_listar_notificacoes():
     """
     API para listar notificações do usuário atual
-    """
-    resultado = usuario_controller.get_notificacoes()
+    
+    Parâmetros: limit (padrão 50, máximo 200) e cursor (next_cursor da
+    página anterior)
+    """
+    limite = request.args.get('limit', LIMITE_PADRAO, type=int)
+    resultado = usuario_controller.get_notificacoes(limite, request.args.get('cursor'))
+    if isinstance(resultado, tuple):
+        resultado, codigo = resultado
+        return jsonify(resultado), codigo
     return jsonify(resultado)
 
 @usuario_routes.route('/api/notificacoes/<int:notificacao_id>/ler', methods=['POST'])
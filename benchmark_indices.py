@@ -0,0 +1,168 @@
+"""
+Mostra o plano (EXPLAIN QUERY PLAN) e a latência das consultas mais
+frequentes antes e depois dos índices de update_db_indices.py, num banco
+SQLite temporário com dados sintéticos.
+
+Uso:
+    python benchmark_indices.py [--chamados 50000] [--repeticoes 20]
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import statistics
+import time
+from datetime import datetime, timedelta
+
+# nome -> SQL, no formato gerado pelas telas/APIs correspondentes
+CONSULTAS = {
+    'dashboard status=Aberto': (
+        "SELECT id, titulo, status, criticidade, data_criacao, autor_id FROM chamado "
+        "WHERE status = :status ORDER BY data_criacao DESC, id DESC LIMIT 21"
+    ),
+    'dashboard criticidade=Urgente': (
+        "SELECT id, titulo, status, criticidade, data_criacao, autor_id FROM chamado "
+        "WHERE criticidade = :criticidade ORDER BY data_criacao DESC, id DESC LIMIT 21"
+    ),
+    'dashboard sort=criticidade': (
+        "SELECT id, titulo, status, criticidade, data_criacao, autor_id FROM chamado "
+        "ORDER BY criticidade DESC, data_criacao DESC, id DESC LIMIT 21"
+    ),
+    'meus_chamados': (
+        "SELECT id, titulo, status, criticidade, data_criacao FROM chamado "
+        "WHERE autor_id = :usuario_id ORDER BY data_criacao DESC"
+    ),
+    'busca desde:/ate:': (
+        "SELECT id FROM chamado WHERE data_criacao >= :desde AND data_criacao < :ate "
+        "ORDER BY data_criacao DESC LIMIT 21"
+    ),
+    'respostas do chamado': (
+        "SELECT id, conteudo FROM resposta WHERE chamado_id = :chamado_id ORDER BY id"
+    ),
+    'get_chamados (contagens)': (
+        "SELECT chamado.id, "
+        "(SELECT count(resposta.id) FROM resposta WHERE resposta.chamado_id = chamado.id), "
+        "EXISTS (SELECT 1 FROM anexo WHERE anexo.chamado_id = chamado.id) "
+        "FROM chamado WHERE autor_id = :usuario_id ORDER BY id DESC"
+    ),
+    'notificações não lidas': (
+        "SELECT id, mensagem FROM notificacao WHERE usuario_id = :usuario_id AND lida = 0 "
+        "ORDER BY data_criacao DESC"
+    ),
+    '/api/notifications': (
+        "SELECT id, mensagem, lida FROM notificacao WHERE usuario_id = :usuario_id "
+        "ORDER BY data_criacao DESC"
+    ),
+    'anexos da resposta': (
+        "SELECT id, nome FROM anexo WHERE resposta_id = :resposta_id"
+    ),
+}
+
+
+def argumentos():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chamados', type=int, default=50000)
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def popular(conn, text, args, rng):
+    from models import Chamado
+
+    # INSERT direto: status/criticidade vão como códigos (ver utils/enum_types.py)
+    codigo_status = Chamado.__table__.c.status.type.codigo
+    codigo_criticidade = Chamado.__table__.c.criticidade.type.codigo
+    inicio = datetime(2025, 1, 1)
+    conn.execute(text("INSERT INTO usuario (id, nome, email, senha, is_admin) VALUES (:id, :nome, :email, 'x', 0)"),
+                 [{'id': i, 'nome': f'Usuario {i}', 'email': f'u{i}@bench'} for i in range(1, args.usuarios + 1)])
+    chamados, respostas, notificacoes, anexos = [], [], [], []
+    for i in range(1, args.chamados + 1):
+        data = inicio + timedelta(minutes=10 * i)
+        autor = rng.randint(1, args.usuarios)
+        chamados.append({'id': i, 'titulo': f'Chamado {i}', 'descricao': 'Descrição', 'autor_id': autor,
+                         'status': codigo_status(rng.choice(('Aberto', 'Em Andamento', 'Encerrado', 'Encerrado', 'Reprovado'))),
+                         'criticidade': codigo_criticidade(rng.choice(('Baixa', 'Média', 'Média', 'Alta', 'Urgente'))),
+                         'data_criacao': data})
+        for _ in range(rng.randint(0, 4)):
+            respostas.append({'conteudo': 'Resposta', 'chamado_id': i, 'autor_id': autor, 'data_resposta': data})
+        notificacoes.append({'usuario_id': autor, 'chamado_id': i, 'tipo': 'novo', 'mensagem': f'Chamado {i}',
+                             'lida': rng.random() < 0.8, 'data_criacao': data})
+        if rng.random() < 0.1:
+            anexos.append({'nome': 'a.pdf', 'caminho': f'{i}.pdf', 'chamado_id': i, 'resposta_id': None})
+    conn.execute(text("INSERT INTO chamado (id, titulo, descricao, status, criticidade, data_criacao, autor_id) "
+                      "VALUES (:id, :titulo, :descricao, :status, :criticidade, :data_criacao, :autor_id)"), chamados)
+    conn.execute(text("INSERT INTO resposta (conteudo, data_resposta, chamado_id, autor_id) "
+                      "VALUES (:conteudo, :data_resposta, :chamado_id, :autor_id)"), respostas)
+    conn.execute(text("INSERT INTO notificacao (usuario_id, chamado_id, tipo, mensagem, lida, data_criacao) "
+                      "VALUES (:usuario_id, :chamado_id, :tipo, :mensagem, :lida, :data_criacao)"), notificacoes)
+    for n, anexo in enumerate(anexos):
+        anexo['resposta_id'] = n + 1 if n % 2 else None
+    conn.execute(text("INSERT INTO anexo (nome, caminho, chamado_id, resposta_id) "
+                      "VALUES (:nome, :caminho, :chamado_id, :resposta_id)"), anexos)
+
+
+def medir(engine, text, parametros, repeticoes):
+    """{consulta: (plano, mediana em ms)}"""
+    resultado = {}
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for nome, sql in CONSULTAS.items():
+            plano = '; '.join(linha[-1] for linha in conn.execute(text('EXPLAIN QUERY PLAN ' + sql), parametros))
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                conn.execute(text(sql), parametros).fetchall()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            resultado[nome] = (plano, statistics.median(tempos))
+    return resultado
+
+
+def main():
+    args = argumentos()
+    rng = random.Random(args.seed)
+
+    # Banco temporário: precisa ser definido antes de importar a aplicação
+    pasta = tempfile.mkdtemp(prefix='bench_indices_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from sqlalchemy import text
+    from app import app, db
+    from models import Chamado
+    from backend.models.anexo import Anexo
+    from update_db_indices import INDICES, criar_indices
+
+    with app.app_context():
+        engine = db.engine
+        db.create_all()
+        Anexo.__table__.create(engine, checkfirst=True)
+        with engine.begin() as conn:
+            # Parte do esquema sem os índices, como num banco anterior à migração
+            for nome in INDICES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {nome}"))
+            print(f"Gerando {args.chamados} chamados em {pasta}...")
+            popular(conn, text, args, rng)
+
+        tipos = Chamado.__table__.c
+        parametros = {'status': tipos.status.type.codigo('Aberto'),
+                      'criticidade': tipos.criticidade.type.codigo('Urgente'),
+                      'usuario_id': 7, 'chamado_id': args.chamados // 2, 'resposta_id': 3,
+                      'desde': datetime(2025, 3, 1), 'ate': datetime(2025, 3, 8)}
+        antes = medir(engine, text, parametros, args.repeticoes)
+        print()
+        criar_indices(engine)
+        depois = medir(engine, text, parametros, args.repeticoes)
+
+        for nome in CONSULTAS:
+            plano_antes, tempo_antes = antes[nome]
+            plano_depois, tempo_depois = depois[nome]
+            print(f"\n{nome}: {tempo_antes:.2f}ms -> {tempo_depois:.2f}ms")
+            print(f"  antes:  {plano_antes}")
+            print(f"  depois: {plano_depois}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Compara a latência dos backends de busca (sql, index e go) sobre o mesmo
+conjunto sintético de chamados, num banco SQLite temporário.
+
+Uso:
+    python benchmark_search.py [--chamados 5000] [--consultas 200] [--go-url http://localhost:8081]
+
+Para medir o backend go, inicie antes o go-search-api (go run main.go). O
+serviço atual responde com dados de exemplo, então o número mede o custo da
+ida e volta HTTP + filtro por ids no banco; se ele não responder, as buscas
+caem para o backend sql e a coluna "fallback" mostra quantas vezes.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import statistics
+import time
+from datetime import datetime, timedelta
+
+PALAVRAS = (
+    'impressora toner papel scanner rede wifi vpn senha login acesso email outlook '
+    'servidor backup arquivo pasta compartilhada sistema erro lento travando monitor '
+    'teclado mouse notebook desktop licenca office planilha relatorio certificado '
+    'telefone ramal celular cadastro cliente nota fiscal estoque pedido entrega '
+    'transporte caminhao rota motorista manutencao atualizacao instalacao'
+).split()
+
+
+def argumentos():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chamados', type=int, default=5000)
+    parser.add_argument('--respostas', type=int, default=3, help='respostas por chamado')
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--go-url', default=os.environ.get('SEARCH_GO_URL', 'http://localhost:8081'))
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def texto(rng, n):
+    return ' '.join(rng.choice(PALAVRAS) for _ in range(n))
+
+
+def popular(db, Usuario, Chamado, Resposta, args, rng):
+    usuarios = [Usuario(nome=f'Usuario {i}', email=f'u{i}@bench', senha='x', is_admin=(i == 0)) for i in range(20)]
+    db.session.add_all(usuarios)
+    db.session.commit()
+
+    inicio = datetime(2026, 1, 1)
+    for lote in range(0, args.chamados, 1000):
+        chamados = [
+            Chamado(titulo=texto(rng, 5).capitalize(), descricao=texto(rng, 60),
+                    status=rng.choice(('Aberto', 'Em Andamento', 'Encerrado', 'Reprovado')),
+                    criticidade=rng.choice(('Baixa', 'Média', 'Alta', 'Urgente')),
+                    data_criacao=inicio + timedelta(minutes=lote + i),
+                    autor_id=rng.choice(usuarios).id)
+            for i in range(min(1000, args.chamados - lote))
+        ]
+        db.session.add_all(chamados)
+        db.session.flush()
+        db.session.add_all(
+            Resposta(conteudo=texto(rng, 30), chamado_id=chamado.id, autor_id=chamado.autor_id)
+            for chamado in chamados for _ in range(args.respostas)
+        )
+        db.session.commit()
+
+
+def medir(app, db, Chamado, Usuario, backend, consultas):
+    tempos = []
+    for termo in consultas:
+        inicio = time.perf_counter()
+        query = db.session.query(Chamado, Usuario.nome).join(Usuario, Chamado.autor_id == Usuario.id)
+        filtro = backend.filtrar(app, db.session, query, termo)
+        chaves = filtro.chaves_relevancia or [(Chamado.data_criacao, True), (Chamado.id, True)]
+        filtro.query.order_by(*[e.desc() if d else e.asc() for e, d in chaves]).limit(10).all()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'media': statistics.mean(tempos),
+        'p50': tempos[len(tempos) // 2],
+        'p95': tempos[int(len(tempos) * 0.95) - 1],
+        'max': tempos[-1],
+    }
+
+
+def main():
+    args = argumentos()
+    rng = random.Random(args.seed)
+
+    # Banco temporário: precisa ser definido antes de importar a aplicação
+    pasta = tempfile.mkdtemp(prefix='bench_busca_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    os.environ['SEARCH_INDEX_PATH'] = os.path.join(pasta, 'search_index.bin')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app import app, db
+    from models import Usuario, Chamado, Resposta
+    from utils.search_fts import criar_indice_fts
+    from utils.search_backends import BACKENDS
+
+    app.config['SEARCH_GO_URL'] = args.go_url
+
+    with app.app_context():
+        db.create_all()
+        print(f"Gerando {args.chamados} chamados com {args.respostas} respostas cada em {pasta}...")
+        popular(db, Usuario, Chamado, Resposta, args, rng)
+        criar_indice_fts(db.engine)
+
+        consultas = [
+            ' '.join(rng.sample(PALAVRAS, rng.choice((1, 1, 2))))
+            for _ in range(args.consultas)
+        ]
+
+        print(f"\n{'backend':<8} {'média':>9} {'p50':>9} {'p95':>9} {'máx':>9} {'fallback':>9}")
+        for nome, backend in BACKENDS.items():
+            # Aquece caches e índices em memória antes de medir
+            medir(app, db, Chamado, Usuario, backend, consultas[:5])
+            desvios_antes = getattr(backend, 'desvios', 0)
+            resultado = medir(app, db, Chamado, Usuario, backend, consultas)
+            fallback = getattr(backend, 'desvios', 0) - desvios_antes
+            print(f"{nome:<8} {resultado['media']:>7.2f}ms {resultado['p50']:>7.2f}ms "
+                  f"{resultado['p95']:>7.2f}ms {resultado['max']:>7.2f}ms {fallback:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+from datetime import timedelta
+from app import app, db
+from models import Chamado, Resposta, RegistroAlteracao
+from utils.search_engine import motor_busca
+
+def build_search_index():
+    """Reconstrói o índice de busca em memória e grava o snapshot usado na inicialização dos workers"""
+    with app.app_context():
+        caminho = app.config['SEARCH_INDEX_PATH']
+        try:
+            atraso = timedelta(seconds=app.config.get('CHANGE_LOG_SAFETY_LAG', 2))
+            motor_busca.reconstruir(db.session, Chamado, Resposta, RegistroAlteracao, atraso)
+            motor_busca.salvar(caminho)
+            print(f"Snapshot do índice de busca gravado em '{caminho}'!")
+        except Exception as e:
+            print(f"Erro ao gerar o índice de busca: {str(e)}")
+
+if __name__ == '__main__':
+    build_search_index()
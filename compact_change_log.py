@@ -0,0 +1,27 @@
+"""
+Manutenção do log de alterações (/api/changes): compactação e retenção.
+Pode ser agendado (ex.: cron diário). Ver utils/change_log.py.
+
+Uso:
+    python compact_change_log.py [--dias N]
+"""
+import argparse
+from app import app, db
+from models import RegistroAlteracao
+from utils.change_log import compactar, aplicar_retencao
+
+def main():
+    parser = argparse.ArgumentParser(description='Compacta o log de alterações e aplica a retenção')
+    parser.add_argument('--dias', type=int, default=None,
+                        help='retenção das exclusões em dias (padrão: CHANGE_LOG_RETENTION_DAYS)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        dias = args.dias if args.dias is not None else app.config['CHANGE_LOG_RETENTION_DAYS']
+        substituidas = compactar(db.session, RegistroAlteracao)
+        print(f"{substituidas} entradas substituídas removidas")
+        exclusoes = aplicar_retencao(db.session, RegistroAlteracao, dias)
+        print(f"{exclusoes} exclusões com mais de {dias} dias removidas")
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,33 @@ class Config:
     EMAILJS_SERVICE_ID = os.environ.get('EMAILJS_SERVICE_ID')
     EMAILJS_TEMPLATE_ID = os.environ.get('EMAILJS_TEMPLATE_ID')
     
+    # Configurações de Busca
+    # Backend do /api/search: sql (FTS5/LIKE), index (índice em memória) ou go (go-search-api)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND')
+    # Índice invertido em memória; sem SEARCH_BACKEND, ativa o backend index quando o banco não tem FTS5
+    SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', '').lower() in ('1', 'true')
+    SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_index.bin')
+    # Intervalo mínimo (segundos) entre as consultas ao log de alterações que trazem ao índice os commits de outros processos
+    SEARCH_INDEX_POLL_INTERVAL = float(os.environ.get('SEARCH_INDEX_POLL_INTERVAL', 1))
+    # Serviço go-search-api (timeouts em segundos; após uma falha, espera SEARCH_GO_RETRY_AFTER antes de tentar de novo)
+    SEARCH_GO_URL = os.environ.get('SEARCH_GO_URL') or 'http://localhost:8081'
+    SEARCH_GO_CONNECT_TIMEOUT = float(os.environ.get('SEARCH_GO_CONNECT_TIMEOUT', 0.05))
+    SEARCH_GO_READ_TIMEOUT = float(os.environ.get('SEARCH_GO_READ_TIMEOUT', 0.3))
+    SEARCH_GO_RETRY_AFTER = int(os.environ.get('SEARCH_GO_RETRY_AFTER', 30))
+    SEARCH_GO_POOL_SIZE = int(os.environ.get('SEARCH_GO_POOL_SIZE', 10))
+    
+    # Log de alterações (/api/changes): exclusões ficam CHANGE_LOG_RETENTION_DAYS dias
+    # e entradas com menos de CHANGE_LOG_SAFETY_LAG segundos ainda não são entregues
+    # (precisa ser maior que o tempo entre o flush e o commit de qualquer escrita)
+    CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 7))
+    CHANGE_LOG_SAFETY_LAG = float(os.environ.get('CHANGE_LOG_SAFETY_LAG', 2))
+    
+    # Validade (segundos) das contagens de chamados exibidas nos cards
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 30))
+    
+    # Intervalo (segundos) entre as atualizações incrementais do dashboard (/dashboard/delta)
+    DASHBOARD_SYNC_INTERVAL = int(os.environ.get('DASHBOARD_SYNC_INTERVAL', 30))
+    
 class DevelopmentConfig(Config):
     DEBUG = True
     SESSION_COOKIE_SECURE = False
@@ -69,12 +69,17 @@ func searchHandler(w http.ResponseWriter, r *http.Request) {
 	if page <= 0 {
 		page = 1
 	}
+	// Máximo de chamados devolvidos (o Flask pede apenas os ids mais relevantes)
+	limit, _ := strconv.Atoi(r.URL.Query().Get("limit"))
 	
 	// Log para depuração
 	log.Printf("Busca recebida: %s (página %d)", query, page)
 
 	// Simulação de busca em Elastic Search (será substituída pela implementação real)
 	result := searchChamados(query, page)
+	if limit > 0 && len(result.Chamados) > limit {
+		result.Chamados = result.Chamados[:limit]
+	}
 	
 	// Retornando resultado como JSON
 	w.Header().Set("Content-Type", "application/json")
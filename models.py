@@ -1,6 +1,13 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import validates
+from utils.text_normalizer import normalizar_texto
+from utils.change_log import monitorar_alteracoes, monitorar_nomes
+from utils.contadores import monitorar_contadores
+from utils.versionamento import monitorar_versao
+from utils.enum_types import EnumInteiro, STATUS_CHAMADO, CRITICIDADES, validar_rotulo
 
 # Inicialização do SQLAlchemy
 db = SQLAlchemy()
@@ -17,6 +24,11 @@ class Usuario(db.Model, UserMixin):
     chamados = db.relationship('Chamado', backref='autor', lazy=True)
     respostas = db.relationship('Resposta', backref='autor_resposta', lazy=True)
     notificacoes = db.relationship('Notificacao', backref='usuario', lazy=True)
+
+    __table_args__ = (
+        # Listagem de usuários ordenada por nome (paginação por cursor)
+        db.Index('ix_usuario_nome', 'nome', 'id'),
+    )
     
     def has_role(self, role):
         if role == 'admin':
@@ -32,12 +44,40 @@ class Chamado(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(100), nullable=False)
     descricao = db.Column(db.Text, nullable=False)
-    status = db.Column(db.String(20), default='Aberto')
-    criticidade = db.Column(db.String(20), default='Média')
+    # Guardados como SMALLINT; o ORM vê os rótulos (ver utils/enum_types.py)
+    status = db.Column(EnumInteiro(STATUS_CHAMADO), default='Aberto')
+    criticidade = db.Column(EnumInteiro(CRITICIDADES), default='Média')
     data_criacao = db.Column(db.DateTime, default=datetime.now)
     autor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    # Versões em minúsculas e sem acentos de titulo/descricao, usadas nas buscas.
+    # Sem índice: o LIKE '%termo%' do fallback sem FTS5 lê a tabela de qualquer jeito
+    titulo_norm = db.Column(db.String(200))
+    descricao_norm = db.Column(db.Text)
+    # Incrementada a cada alteração do chamado, de suas respostas ou anexos (ETags)
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     respostas = db.relationship('Resposta', backref='chamado', lazy=True)
 
+    __table_args__ = (
+        # Filtros da busca estruturada (status:, criticidade:, autor:, desde:/ate:),
+        # todos combinados com a ordenação/intervalo por data de criação
+        db.Index('ix_chamado_data_criacao', 'data_criacao'),
+        db.Index('ix_chamado_status_data', 'status', 'data_criacao'),
+        db.Index('ix_chamado_criticidade_data', 'criticidade', 'data_criacao'),
+        db.Index('ix_chamado_autor_data', 'autor_id', 'data_criacao'),
+    )
+
+    @validates('status', 'criticidade')
+    def validar_enum(self, campo, valor):
+        """Só aceita os rótulos conhecidos de status/criticidade"""
+        return validar_rotulo(self.__table__.c[campo].type, campo, valor)
+
+@event.listens_for(Chamado, 'before_insert')
+@event.listens_for(Chamado, 'before_update')
+def normalizar_campos_busca(mapper, connection, target):
+    """Mantém as colunas normalizadas em sincronia com titulo/descricao"""
+    target.titulo_norm = normalizar_texto(target.titulo)
+    target.descricao_norm = normalizar_texto(target.descricao)
+
 class Resposta(db.Model):
     """Modelo para armazenar as respostas dos chamados"""
     __tablename__ = 'resposta'
@@ -46,6 +86,19 @@ class Resposta(db.Model):
     data_resposta = db.Column(db.DateTime, default=datetime.now)
     chamado_id = db.Column(db.Integer, db.ForeignKey('chamado.id'), nullable=False)
     autor_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    # Conteúdo em minúsculas e sem acentos, usado na busca sem FTS5
+    conteudo_norm = db.Column(db.Text)
+
+    __table_args__ = (
+        # Respostas de um chamado, contagem e última resposta (max id) por chamado
+        db.Index('ix_resposta_chamado', 'chamado_id', 'id'),
+    )
+
+@event.listens_for(Resposta, 'before_insert')
+@event.listens_for(Resposta, 'before_update')
+def normalizar_conteudo_busca(mapper, connection, target):
+    """Mantém conteudo_norm em sincronia com conteudo"""
+    target.conteudo_norm = normalizar_texto(target.conteudo)
 
 class Notificacao(db.Model):
     """Modelo para armazenar notificações dos usuários"""
@@ -57,3 +110,49 @@ class Notificacao(db.Model):
     mensagem = db.Column(db.String(200), nullable=False)
     lida = db.Column(db.Boolean, default=False)
     data_criacao = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        # Notificações do usuário (todas ou só as não lidas), mais recentes primeiro
+        db.Index('ix_notificacao_usuario_data', 'usuario_id', 'data_criacao'),
+        db.Index('ix_notificacao_usuario_lida_data', 'usuario_id', 'lida', 'data_criacao'),
+    )
+
+class RegistroAlteracao(db.Model):
+    """Log append-only das escritas em chamados e respostas (ver utils/change_log.py)"""
+    __tablename__ = 'registro_alteracao'
+    seq = db.Column(db.Integer, primary_key=True)
+    tabela = db.Column(db.String(30), nullable=False)
+    operacao = db.Column(db.String(10), nullable=False)
+    registro_id = db.Column(db.Integer, nullable=False)
+    chamado_id = db.Column(db.Integer)
+    data = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # Compactação: entradas do mesmo registro
+        db.Index('ix_registro_alteracao_registro', 'tabela', 'registro_id', 'seq'),
+        # Sem AUTOINCREMENT o SQLite pode reutilizar a maior seq após uma remoção
+        {'sqlite_autoincrement': True},
+    )
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'tabela': self.tabela,
+            'operacao': self.operacao,
+            'id': self.registro_id,
+            'chamado_id': self.chamado_id,
+            'data': self.data.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+class ContadorChamado(db.Model):
+    """Quantidade de chamados por status, criticidade e autor (ver utils/contadores.py)"""
+    __tablename__ = 'contador_chamado'
+    status = db.Column(db.String(20), primary_key=True)
+    criticidade = db.Column(db.String(20), primary_key=True)
+    autor_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+monitorar_alteracoes(RegistroAlteracao.__table__, Chamado, Resposta)
+monitorar_nomes(RegistroAlteracao.__table__, Usuario)
+monitorar_contadores(ContadorChamado.__table__, Chamado)
+monitorar_versao(Chamado, Resposta, Usuario)
@@ -42,6 +42,8 @@ const ListaChamados: React.FC = () => {
         const response = await api.get('/api/chamados', { 
           params: {
             ...filtros,
+            // Só os campos usados na tabela e no PDF
+            fields: 'id,titulo,status,criticidade,data_criacao',
             pagina: paginaAtual,
             por_pagina: 10
           }
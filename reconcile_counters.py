@@ -0,0 +1,31 @@
+"""
+Recalcula a tabela de contadores de chamados (contador_chamado) a partir da
+tabela `chamado`, corrigindo divergências causadas por escritas fora do ORM.
+Ver utils/contadores.py.
+
+Uso:
+    python reconcile_counters.py
+"""
+from app import app, db
+from models import Chamado, ContadorChamado
+from utils.contadores import reconstruir_contadores, somar_contadores
+from utils.stats_service import estatisticas_cache
+
+def main():
+    with app.app_context():
+        antes = {(status, criticidade): quantidade
+                 for status, criticidade, quantidade in somar_contadores(db.session, ContadorChamado)}
+        total = reconstruir_contadores(db.session, Chamado, ContadorChamado)
+        depois = {(status, criticidade): quantidade
+                  for status, criticidade, quantidade in somar_contadores(db.session, ContadorChamado)}
+        estatisticas_cache.invalidar()
+
+        divergentes = sorted(chave for chave in antes.keys() | depois.keys()
+                             if antes.get(chave, 0) != depois.get(chave, 0))
+        for status, criticidade in divergentes:
+            print(f"{status or '-'} / {criticidade or '-'}: "
+                  f"{antes.get((status, criticidade), 0)} -> {depois.get((status, criticidade), 0)}")
+        print(f"{total} chamados contados, {len(divergentes)} contadores corrigidos")
+
+if __name__ == '__main__':
+    main()
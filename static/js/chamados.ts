@@ -3,6 +3,11 @@ interface ChamadoFilters {
     searchTerm: string;
 }
 
+interface TituloSugestao {
+    id: number;
+    titulo: string;
+}
+
 class ChamadosManager {
     private filters: ChamadoFilters = {
         status: 'todos',
@@ -12,12 +17,21 @@ class ChamadosManager {
     private readonly tableBody: HTMLElement;
     private readonly searchInput: HTMLInputElement;
     private readonly filterButtons: NodeListOf<HTMLElement>;
+    private suggestionsList: HTMLDataListElement | null = null;
+    private suggestTimer: number | undefined;
 
     constructor() {
         this.tableBody = document.querySelector('.chamados-table tbody')!;
         this.searchInput = document.querySelector('.chamados-search')!;
         this.filterButtons = document.querySelectorAll('.filter-btn');
 
+        if (this.searchInput) {
+            this.suggestionsList = document.createElement('datalist');
+            this.suggestionsList.id = 'chamados-sugestoes';
+            this.searchInput.setAttribute('list', this.suggestionsList.id);
+            this.searchInput.after(this.suggestionsList);
+        }
+
         this.initializeEventListeners();
         this.initializeAnimations();
     }
@@ -28,6 +42,7 @@ class ChamadosManager {
             const target = e.target as HTMLInputElement;
             this.filters.searchTerm = target.value.toLowerCase();
             this.filterChamados();
+            this.scheduleSuggestions(target.value);
         });
 
         // Filter buttons
@@ -59,6 +74,35 @@ class ChamadosManager {
         });
     }
 
+    private scheduleSuggestions(prefix: string): void {
+        // Debounce para não disparar uma requisição a cada tecla
+        window.clearTimeout(this.suggestTimer);
+        this.suggestTimer = window.setTimeout(() => this.loadSuggestions(prefix), 150);
+    }
+
+    private async loadSuggestions(prefix: string): Promise<void> {
+        if (!this.suggestionsList) return;
+        if (prefix.trim().length < 2) {
+            this.suggestionsList.innerHTML = '';
+            return;
+        }
+
+        try {
+            const response = await fetch(`/api/search/suggest?prefix=${encodeURIComponent(prefix)}`);
+            if (!response.ok) return;
+            const data: { suggestions: TituloSugestao[] } = await response.json();
+
+            this.suggestionsList.innerHTML = '';
+            data.suggestions.forEach(sugestao => {
+                const option = document.createElement('option');
+                option.value = sugestao.titulo;
+                this.suggestionsList!.appendChild(option);
+            });
+        } catch (error) {
+            console.error('Erro ao carregar sugestões:', error);
+        }
+    }
+
     private initializeAnimations(): void {
         // Animate rows on page load
         const rows = this.tableBody?.querySelectorAll('tr');
@@ -0,0 +1,94 @@
+// Rolagem infinita das tabelas de chamados (dashboard, meus chamados)
+//
+// O elemento #carregar-mais fica logo abaixo da tabela, com:
+//   data-tabela: id do <tbody> que recebe as linhas
+//   data-url:    endpoint que devolve as linhas (HTML) com os filtros da página
+//   data-cursor: cursor da próxima página
+// Quando ele aparece na tela, a próxima página é buscada e acrescentada ao
+// <tbody>; o cursor seguinte vem no cabeçalho X-Proximo-Cursor.
+// Se o servidor limitar as requisições (429), tenta de novo com espera
+// crescente; outros erros voltam a oferecer o link.
+document.addEventListener('DOMContentLoaded', function() {
+    const sentinela = document.getElementById('carregar-mais');
+    if (!sentinela || !('IntersectionObserver' in window)) {
+        // Sem suporte, continua valendo o link "Próxima página"
+        return;
+    }
+
+    const tabela = document.getElementById(sentinela.dataset.tabela);
+    const esperaMaxima = 60 * 1000;
+    let carregando = false;
+    let espera = 2000;
+
+    // Com JavaScript o link é substituído pelo carregamento automático
+    sentinela.querySelectorAll('a').forEach(link => link.classList.add('hidden'));
+
+    function sentinelaVisivel() {
+        return sentinela.getBoundingClientRect().top < window.innerHeight + 200;
+    }
+
+    async function carregarProximaPagina() {
+        const cursor = sentinela.dataset.cursor;
+        if (carregando || !cursor) {
+            return;
+        }
+        carregando = true;
+
+        try {
+            const url = new URL(sentinela.dataset.url, window.location.origin);
+            url.searchParams.set('cursor', cursor);
+            const resposta = await fetch(url);
+            if (resposta.status === 429 && espera <= esperaMaxima) {
+                setTimeout(carregarProximaPagina, espera);
+                espera *= 2;
+                return;
+            }
+            if (!resposta.ok) {
+                throw new Error(`HTTP ${resposta.status}`);
+            }
+            espera = 2000;
+
+            const modelo = document.createElement('template');
+            modelo.innerHTML = await resposta.text();
+            modelo.content.querySelectorAll('tr[data-chamado-id]').forEach(linha => {
+                // Linhas já exibidas (ex.: inseridas pela atualização do dashboard) não se repetem
+                if (!tabela.querySelector(`tr[data-chamado-id="${linha.dataset.chamadoId}"]`)) {
+                    tabela.appendChild(linha);
+                }
+            });
+
+            const proximoCursor = resposta.headers.get('X-Proximo-Cursor');
+            if (proximoCursor) {
+                sentinela.dataset.cursor = proximoCursor;
+                sentinela.querySelectorAll('a').forEach(link => {
+                    const destino = new URL(link.href);
+                    destino.searchParams.set('cursor', proximoCursor);
+                    link.href = destino;
+                });
+            } else {
+                observador.disconnect();
+                sentinela.remove();
+            }
+        } catch (erro) {
+            console.error('Erro ao carregar mais chamados:', erro);
+            // Em caso de erro, volta a oferecer o link
+            sentinela.querySelectorAll('a').forEach(link => link.classList.remove('hidden'));
+            observador.disconnect();
+            return;
+        } finally {
+            carregando = false;
+        }
+
+        // Páginas curtas podem não tirar a sentinela da tela: continua carregando
+        if (sentinela.isConnected && sentinelaVisivel()) {
+            carregarProximaPagina();
+        }
+    }
+
+    const observador = new IntersectionObserver(entradas => {
+        if (entradas.some(entrada => entrada.isIntersecting)) {
+            carregarProximaPagina();
+        }
+    }, { rootMargin: '200px' });
+    observador.observe(sentinela);
+});
@@ -0,0 +1,109 @@
+"""
+Quantas consultas SQL as telas de listagem de chamados executam, num banco
+SQLite temporário. Cada tela é renderizada com poucos e com muitos chamados:
+o número de consultas não pode crescer com o número de linhas (N+1) nem
+passar do limite definido em LIMITES.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+CHAMADOS = 200
+
+# Tela -> (url, id do usuário logado, máximo de consultas)
+# load_user + cards (contadores, em cache após a primeira) + página; o
+# dashboard lê também a versão inicial de /dashboard/delta.
+# O usuário 1 é o administrador; o 2 é o primeiro autor criado por _popular()
+LIMITES = {
+    'dashboard': ('/dashboard?per_page=200', 1, 4),
+    'meus_chamados': ('/meus_chamados', 2, 2),
+    'listar_chamados': ('/listar_chamados/todos', 1, 3),
+}
+
+
+def _popular(db, Usuario, Chamado, Resposta, quantidade, inicio=0):
+    # Um autor a cada 5 chamados, para que o autor de cada linha precise ser carregado
+    usuarios = [Usuario(nome=f'Autor {i}', email=f'autor{i}@check', senha='x')
+                for i in range(inicio, inicio + max(quantidade // 5, 1))]
+    db.session.add_all(usuarios)
+    db.session.flush()
+    chamados = [
+        Chamado(titulo=f'Chamado {i}', descricao='Descrição longa ' * 50,
+                status=('Aberto', 'Em Andamento', 'Encerrado', 'Reprovado')[i % 4],
+                criticidade=('Baixa', 'Média', 'Alta', 'Urgente')[i % 4],
+                data_criacao=datetime(2026, 1, 1) + timedelta(minutes=i),
+                autor_id=usuarios[i % len(usuarios)].id)
+        for i in range(inicio, inicio + quantidade)
+    ]
+    db.session.add_all(chamados)
+    db.session.flush()
+    db.session.add_all(Resposta(conteudo='Resposta', chamado_id=chamado.id, autor_id=chamado.autor_id)
+                       for chamado in chamados)
+    db.session.commit()
+
+
+def _contar_consultas(app, db, url, usuario_id):
+    """Número de SELECTs executados ao renderizar `url` logado como `usuario_id`"""
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            consultas.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        resposta = cliente.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    assert resposta.status_code == 200, f"{url} respondeu {resposta.status_code}"
+    return len(consultas)
+
+
+@pytest.fixture(scope='module')
+def contagens(tmp_path_factory):
+    """({tela: consultas com CHAMADOS/2 chamados}, {tela: consultas com CHAMADOS})"""
+    import app as aplicacao
+    from models import db, Usuario, Chamado, Resposta
+
+    app = aplicacao.app
+    configuracao = dict(app.config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + str(tmp_path_factory.mktemp('query_counts') / 'check.db')
+    app.config['WTF_CSRF_ENABLED'] = False
+    aplicacao.limiter.enabled = False
+
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.add(Usuario(nome='Admin', email='admin@check', senha=generate_password_hash('x'),
+                                   is_admin=True))
+            db.session.commit()
+
+            metade = CHAMADOS // 2
+            _popular(db, Usuario, Chamado, Resposta, metade)
+            poucos = {tela: _contar_consultas(app, db, url, uid) for tela, (url, uid, _) in LIMITES.items()}
+            _popular(db, Usuario, Chamado, Resposta, CHAMADOS - metade, inicio=metade)
+            muitos = {tela: _contar_consultas(app, db, url, uid) for tela, (url, uid, _) in LIMITES.items()}
+            yield poucos, muitos
+            db.session.remove()
+    finally:
+        app.config.update(configuracao)
+        aplicacao.limiter.enabled = True
+
+
+@pytest.mark.parametrize('tela', list(LIMITES))
+def test_consultas_nao_crescem_com_as_linhas(contagens, tela):
+    poucos, muitos = contagens
+    assert muitos[tela] == poucos[tela], f"{poucos[tela]} consultas com {CHAMADOS // 2} chamados, {muitos[tela]} com {CHAMADOS}"
+
+
+@pytest.mark.parametrize('tela', list(LIMITES))
+def test_consultas_dentro_do_limite(contagens, tela):
+    _, muitos = contagens
+    assert muitos[tela] <= LIMITES[tela][2]
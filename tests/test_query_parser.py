@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+from utils.query_parser import interpretar_consulta, ConsultaInvalida
+
+
+def test_campos_e_texto_livre():
+    consulta = interpretar_consulta('status:aberto Criticidade:URGENTE autor:maria impressora '
+                                    'desde:2026-01-01 até:2026-01-31')
+    assert consulta.texto == 'impressora'
+    assert consulta.status == 'Aberto'
+    assert consulta.criticidade == 'Urgente'
+    assert consulta.autor == 'maria'
+    assert consulta.desde == datetime(2026, 1, 1)
+    assert consulta.ate == datetime(2026, 1, 31)
+
+
+def test_valor_entre_aspas():
+    consulta = interpretar_consulta('status:"em andamento" "sem papel"')
+    assert consulta.status == 'Em Andamento'
+    assert consulta.texto == 'sem papel'
+
+
+@pytest.mark.parametrize('texto', [
+    '10:30',
+    'erro:404',
+    'http://intranet',
+    'falha às 10:30 com erro:404 em http://intranet/chamados',
+    r'C:\temp\log.txt',
+    'ticket:123',
+])
+def test_palavra_com_dois_pontos_e_texto_livre(texto):
+    consulta = interpretar_consulta(texto)
+    assert consulta.texto == texto
+    assert consulta.status is None and consulta.autor is None
+
+
+def test_campo_conhecido_com_valor_invalido():
+    with pytest.raises(ConsultaInvalida):
+        interpretar_consulta('status:inexistente')
+    with pytest.raises(ConsultaInvalida):
+        interpretar_consulta('impressora desde:ontem')
+    with pytest.raises(ConsultaInvalida):
+        interpretar_consulta('autor: impressora')
+
+
+def test_consulta_sem_limite_de_custo():
+    with pytest.raises(ConsultaInvalida):
+        interpretar_consulta('desde:2020-01-01')
+    with pytest.raises(ConsultaInvalida):
+        interpretar_consulta('a')
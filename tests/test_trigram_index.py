@@ -0,0 +1,53 @@
+from utils.search_engine import MotorBusca
+from utils.trigram_index import IndiceTrigramas, MAX_CANDIDATOS, trigramas, minimo_comuns
+
+
+def _indice(chamados):
+    motor = MotorBusca()
+    for chamado_id, titulo, descricao in chamados:
+        motor.indexar_chamado(chamado_id, titulo, descricao)
+    indice = IndiceTrigramas()
+    indice.carregar(motor.termos())
+    return indice, motor
+
+
+def test_erros_de_digitacao():
+    indice, motor = _indice([
+        (1, 'Impressora sem papel', 'A impressão sai borrada'),
+        (2, 'Problema de login', 'Não consigo entrar no sistema'),
+    ])
+    assert set(indice.buscar('impresora', motor.chamados_do_termo)) == {1}
+    assert set(indice.buscar('lgoin', motor.chamados_do_termo)) == {2}
+    assert indice.buscar('xyzw', motor.chamados_do_termo) == {}
+
+
+def test_candidatos_limitados():
+    # Milhares de palavras com o mesmo início da consulta: todas dividem com
+    # ela o trigrama "  i", mas só MAX_CANDIDATOS podem ser avaliadas
+    ruido = [(i, f'i{i:05d}x', '') for i in range(1, 3 * MAX_CANDIDATOS)]
+    indice, motor = _indice(ruido + [(99999, 'impressora', '')])
+
+    candidatos = indice.candidatos('impresora')
+    assert len(candidatos) <= MAX_CANDIDATOS
+    assert 'impressora' in candidatos
+    assert set(indice.buscar('impresora', motor.chamados_do_termo)) == {99999}
+
+
+def test_termo_existente_sempre_candidato():
+    indice, _ = _indice([(i, f'i{i:05d}x', '') for i in range(1, 3 * MAX_CANDIDATOS)])
+    assert 'i00001x' in indice.candidatos('i00001x', limite=10)
+
+
+def test_minimo_de_trigramas_em_comum():
+    # Um trigrama em comum não basta, nem para consultas curtas
+    assert minimo_comuns(trigramas('ab')) == 2
+    assert minimo_comuns(trigramas('lgoin')) == 2
+    assert minimo_comuns(trigramas('impresora')) == 3
+    assert minimo_comuns(trigramas('a')) == 2
+
+
+def test_palavras_novas_depois_da_carga():
+    indice, motor = _indice([(1, 'Teclado', '')])
+    motor.indexar_chamado(2, 'Monitor piscando', '')
+    indice.adicionar_palavras(['monitor', 'piscando'])
+    assert set(indice.buscar('monitr', motor.chamados_do_termo)) == {2}
@@ -0,0 +1,121 @@
+import pytest
+from flask import Flask
+
+from models import db, Usuario, Chamado, Resposta, RegistroAlteracao
+from utils.change_log import marca_alteracoes
+from utils.versionamento import assinatura_versoes, CacheAssinaturas
+
+
+@pytest.fixture
+def sessao():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+
+
+def _criar(sessao, *titulos, autor_id=1):
+    chamados = [Chamado(titulo=titulo, descricao='x', autor_id=autor_id) for titulo in titulos]
+    sessao.add_all(chamados)
+    sessao.commit()
+    return chamados
+
+
+def _abertos(sessao):
+    return sessao.query(Chamado.id).filter(Chamado.status == 'Aberto').order_by(Chamado.id.desc())
+
+
+def test_chamado_que_sai_e_outro_que_entra(sessao):
+    sessao.add(Usuario(id=1, nome='Maria', email='m@x', senha='x'))
+    um, dois, tres = _criar(sessao, 'um', 'dois', 'tres')
+
+    # Abertos: [1, 3], com o chamado 1 na versão 2 e o 2 fora do filtro
+    dois.status = 'Encerrado'
+    sessao.commit()
+    um.titulo = 'um!'
+    sessao.commit()
+    antes = assinatura_versoes(_abertos(sessao), Chamado)
+
+    # Abertos: [2, 3], com o chamado 2 na versão 2. Quantidade, maior id e
+    # soma das versões continuam iguais (2, 3, 3)
+    um.status = 'Encerrado'
+    dois.status = 'Aberto'
+    sessao.commit()
+    sessao.execute(Chamado.__table__.update().where(Chamado.id == 2).values(versao=2))
+    sessao.execute(Chamado.__table__.update().where(Chamado.id == 1).values(versao=1))
+    sessao.commit()
+
+    assert [c.id for c in _abertos(sessao)] == [3, 2]
+    assert assinatura_versoes(_abertos(sessao), Chamado) != antes
+
+
+def test_resposta_altera_assinatura(sessao):
+    sessao.add(Usuario(id=1, nome='Maria', email='m@x', senha='x'))
+    um, dois = _criar(sessao, 'um', 'dois')
+    antes = assinatura_versoes(_abertos(sessao), Chamado)
+
+    sessao.add(Resposta(conteudo='ok', chamado_id=dois.id, autor_id=1))
+    sessao.commit()
+    assert assinatura_versoes(_abertos(sessao), Chamado) != antes
+
+
+def test_nome_do_autor_altera_versao(sessao):
+    maria = Usuario(id=1, nome='Maria', email='m@x', senha='x')
+    joao = Usuario(id=2, nome='João', email='j@x', senha='x')
+    sessao.add_all([maria, joao])
+    um, dois, tres = _criar(sessao, 'um', 'dois', 'tres')
+    tres.autor_id = 2
+    sessao.add(Resposta(conteudo='ok', chamado_id=dois.id, autor_id=2))
+    sessao.commit()
+    versoes = dict(sessao.query(Chamado.id, Chamado.versao))
+    antes = assinatura_versoes(_abertos(sessao), Chamado)
+
+    joao.nome = 'João Silva'
+    sessao.commit()
+    depois = dict(sessao.query(Chamado.id, Chamado.versao))
+
+    # Chamado do João e chamado com resposta dele mudam; o outro não
+    assert depois[1] == versoes[1]
+    assert depois[2] == versoes[2] + 1
+    assert depois[3] == versoes[3] + 1
+    assert assinatura_versoes(_abertos(sessao), Chamado) != antes
+
+    # Alterar outro campo do usuário não muda as versões
+    joao.email = 'joao@x'
+    sessao.commit()
+    assert dict(sessao.query(Chamado.id, Chamado.versao)) == depois
+
+
+def test_assinatura_recalculada_so_quando_o_log_muda(sessao):
+    maria = Usuario(id=1, nome='Maria', email='m@x', senha='x')
+    sessao.add(maria)
+    _criar(sessao, 'um', 'dois')
+    cache = CacheAssinaturas()
+    calculos = []
+
+    def calcular():
+        calculos.append(1)
+        return assinatura_versoes(_abertos(sessao), Chamado)
+
+    def obter():
+        return cache.obter('abertos', marca_alteracoes(sessao, RegistroAlteracao), calcular)
+
+    antes = obter()
+    assert obter() == antes
+    assert len(calculos) == 1
+
+    # Outro campo do usuário não entra no log; o nome entra
+    maria.email = 'maria@x'
+    sessao.commit()
+    assert obter() == antes
+    assert len(calculos) == 1
+
+    maria.nome = 'Maria Souza'
+    sessao.commit()
+    assert obter() != antes
+    assert len(calculos) == 2
@@ -0,0 +1,14 @@
+from app import app, db
+from models import RegistroAlteracao
+
+def add_change_log():
+    with app.app_context():
+        try:
+            # Cria a tabela do log de alterações (e seus índices), se ainda não existir
+            RegistroAlteracao.__table__.create(db.engine, checkfirst=True)
+            print("Tabela 'registro_alteracao' verificada com sucesso!")
+        except Exception as e:
+            print(f"Erro ao criar tabela do log de alterações: {str(e)}")
+
+if __name__ == '__main__':
+    add_change_log()
@@ -0,0 +1,17 @@
+from app import app, db
+from models import Chamado, ContadorChamado
+from utils.contadores import reconstruir_contadores
+
+def add_contadores():
+    with app.app_context():
+        try:
+            # Cria a tabela de contadores e a preenche a partir dos chamados existentes
+            ContadorChamado.__table__.create(db.engine, checkfirst=True)
+            total = reconstruir_contadores(db.session, Chamado, ContadorChamado)
+            print(f"Tabela 'contador_chamado' preenchida com {total} chamados!")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao criar tabela de contadores: {str(e)}")
+
+if __name__ == '__main__':
+    add_contadores()
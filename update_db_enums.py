@@ -0,0 +1,108 @@
+"""
+Converte chamado.status e chamado.criticidade de texto para SMALLINT (ver
+utils/enum_types.py). Rótulos desconhecidos viram o valor padrão da coluna;
+valores nulos continuam nulos. Pode ser executado de novo: colunas já
+convertidas são ignoradas.
+
+- PostgreSQL: ALTER COLUMN ... TYPE SMALLINT USING (CASE ...)
+- MySQL: UPDATE para os códigos + MODIFY SMALLINT
+- SQLite: a tabela é recriada (o SQLite não altera o tipo de uma coluna),
+  preservando ids, índices e gatilhos (busca full-text)
+"""
+from sqlalchemy import inspect, text, MetaData, Integer
+from sqlalchemy.schema import CreateTable
+from app import app, db
+from models import Chamado, Usuario
+from utils.enum_types import STATUS_CHAMADO, CRITICIDADES
+
+# coluna -> (rótulos na ordem dos códigos, rótulo padrão, grafias antigas)
+COLUNAS = {
+    'status': (STATUS_CHAMADO, 'Aberto', {'Fechado': 'Encerrado'}),
+    'criticidade': (CRITICIDADES, 'Média', {'Media': 'Média'}),
+}
+
+TABELA_TEMPORARIA = 'chamado_enum'
+
+def expressao_codigo(coluna):
+    """CASE que traduz o rótulo gravado em `coluna` para o código"""
+    rotulos, padrao, antigas = COLUNAS[coluna]
+    codigos = {rotulo: i for i, rotulo in enumerate(rotulos, start=1)}
+    codigos.update({antiga: codigos[atual] for antiga, atual in antigas.items()})
+    casos = ' '.join(f"WHEN {coluna} = '{rotulo}' THEN {codigo}" for rotulo, codigo in codigos.items())
+    return f"CASE WHEN {coluna} IS NULL THEN NULL {casos} ELSE {codigos[padrao]} END"
+
+def _desconhecidos(conn, coluna):
+    rotulos, _, antigas = COLUNAS[coluna]
+    conhecidos = ', '.join(f"'{r}'" for r in tuple(rotulos) + tuple(antigas))
+    return conn.execute(text(
+        f"SELECT {coluna}, COUNT(*) FROM chamado WHERE {coluna} IS NOT NULL "
+        f"AND {coluna} NOT IN ({conhecidos}) GROUP BY {coluna}"
+    )).fetchall()
+
+def _converter_postgresql(conn, colunas):
+    for coluna in colunas:
+        conn.execute(text(f"ALTER TABLE chamado ALTER COLUMN {coluna} DROP DEFAULT"))
+        conn.execute(text(f"ALTER TABLE chamado ALTER COLUMN {coluna} TYPE SMALLINT "
+                          f"USING ({expressao_codigo(coluna)})"))
+
+def _converter_mysql(conn, colunas):
+    for coluna in colunas:
+        conn.execute(text(f"UPDATE chamado SET {coluna} = {expressao_codigo(coluna)}"))
+        conn.execute(text(f"ALTER TABLE chamado MODIFY {coluna} SMALLINT NULL"))
+
+def _converter_sqlite(conn, colunas):
+    # Índices e gatilhos da tabela antiga, recriados depois da troca
+    objetos = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'chamado' "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )).scalars().all()
+    existentes = [c['name'] for c in inspect(conn).get_columns('chamado')]
+
+    metadata = MetaData()
+    Usuario.__table__.to_metadata(metadata)  # destino da chave estrangeira autor_id
+    nova = Chamado.__table__.to_metadata(metadata, name=TABELA_TEMPORARIA)
+    copiadas = [c.name for c in nova.columns if c.name in existentes]
+    valores = [expressao_codigo(c) if c in colunas else c for c in copiadas]
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABELA_TEMPORARIA}"))
+    conn.execute(CreateTable(nova))
+    conn.execute(text(f"INSERT INTO {TABELA_TEMPORARIA} ({', '.join(copiadas)}) "
+                      f"SELECT {', '.join(valores)} FROM chamado"))
+    conn.execute(text("DROP TABLE chamado"))
+    conn.execute(text(f"ALTER TABLE {TABELA_TEMPORARIA} RENAME TO chamado"))
+    for sql in objetos:
+        conn.execute(text(sql))
+
+CONVERSORES = {
+    'postgresql': _converter_postgresql,
+    'mysql': _converter_mysql,
+    'sqlite': _converter_sqlite,
+}
+
+def converter_enums():
+    with app.app_context():
+        engine = db.engine
+        tipos = {c['name']: c['type'] for c in inspect(engine).get_columns('chamado')}
+        pendentes = [c for c in COLUNAS if c in tipos and not isinstance(tipos[c], Integer)]
+        if not pendentes:
+            print("Colunas 'status' e 'criticidade' já são inteiras")
+            return
+
+        conversor = CONVERSORES.get(engine.dialect.name)
+        if conversor is None:
+            print(f"Banco '{engine.dialect.name}' não suportado por esta migração")
+            return
+
+        try:
+            with engine.begin() as conn:
+                for coluna in pendentes:
+                    for valor, quantidade in _desconhecidos(conn, coluna):
+                        print(f"Aviso: {quantidade} chamados com {coluna} '{valor}' "
+                              f"passarão a '{COLUNAS[coluna][1]}'")
+                conversor(conn, pendentes)
+            print(f"Colunas {', '.join(pendentes)} convertidas para SMALLINT com sucesso!")
+        except Exception as e:
+            print(f"Erro ao converter colunas: {str(e)}")
+
+if __name__ == '__main__':
+    converter_enums()
@@ -0,0 +1,17 @@
+from app import db, app
+from utils.search_fts import criar_indice_fts
+
+def add_fts_index():
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print("Banco não é SQLite: a busca continuará usando LIKE (índice FTS5 não criado).")
+            return
+        try:
+            # Cria as tabelas FTS5, os triggers de sincronização e indexa os chamados e respostas existentes
+            criar_indice_fts(db.engine)
+            print("Índices full-text 'chamado_fts' e 'resposta_fts' criados e reconstruídos com sucesso!")
+        except Exception as e:
+            print(f"Erro ao criar índice full-text: {str(e)}")
+            
+if __name__ == '__main__':
+    add_fts_index()
@@ -0,0 +1,77 @@
+"""
+Cria os índices compostos das consultas mais frequentes (ver INDICES).
+
+Em tabelas grandes a criação não bloqueia as escritas:
+- PostgreSQL: CREATE INDEX CONCURRENTLY, fora de transação
+- MySQL: ALGORITHM=INPLACE, LOCK=NONE (DDL online do InnoDB)
+- SQLite: CREATE INDEX comum (o SQLite não tem criação online; o banco fica
+  bloqueado para escrita durante a criação de cada índice)
+
+Índices já existentes são mantidos, então o script pode ser executado de novo.
+Compare os planos antes/depois com `python benchmark_indices.py`.
+"""
+from sqlalchemy import inspect, text
+from app import app, db
+
+# nome -> (tabela, colunas), seguindo as consultas que cada um atende
+INDICES = {
+    # Filtros da busca estruturada e do dashboard (status:, criticidade:, autor:,
+    # desde:/ate:), sempre com ordenação/intervalo por data de criação
+    'ix_chamado_data_criacao': ('chamado', ('data_criacao',)),
+    'ix_chamado_status_data': ('chamado', ('status', 'data_criacao')),
+    'ix_chamado_criticidade_data': ('chamado', ('criticidade', 'data_criacao')),
+    'ix_chamado_autor_data': ('chamado', ('autor_id', 'data_criacao')),
+    # Respostas de um chamado: listagem, contagem e última resposta por chamado
+    'ix_resposta_chamado': ('resposta', ('chamado_id', 'id')),
+    # Notificações do usuário (/api/notifications) e só as não lidas (/get-notifications)
+    'ix_notificacao_usuario_data': ('notificacao', ('usuario_id', 'data_criacao')),
+    'ix_notificacao_usuario_lida_data': ('notificacao', ('usuario_id', 'lida', 'data_criacao')),
+    # Listagem de usuários ordenada por nome
+    'ix_usuario_nome': ('usuario', ('nome', 'id')),
+    # Anexos de chamados e de respostas (módulo backend)
+    'ix_anexo_chamado': ('anexo', ('chamado_id',)),
+    'ix_anexo_resposta': ('anexo', ('resposta_id',)),
+}
+
+def comando_criacao(dialeto, nome, tabela, colunas):
+    """CREATE INDEX que não bloqueia escritas, quando o banco permite"""
+    lista = ', '.join(colunas)
+    if dialeto == 'postgresql':
+        return f"CREATE INDEX CONCURRENTLY {nome} ON {tabela} ({lista})"
+    if dialeto == 'mysql':
+        return f"CREATE INDEX {nome} ON {tabela} ({lista}) ALGORITHM=INPLACE LOCK=NONE"
+    return f"CREATE INDEX {nome} ON {tabela} ({lista})"
+
+def criar_indices(engine, indices=INDICES):
+    """Cria os índices que ainda não existirem; devolve os nomes criados"""
+    inspetor = inspect(engine)
+    tabelas = set(inspetor.get_table_names())
+    dialeto = engine.dialect.name
+    criados = []
+    for nome, (tabela, colunas) in indices.items():
+        if tabela not in tabelas:
+            print(f"Tabela '{tabela}' não existe, índice '{nome}' ignorado")
+            continue
+        if nome in {i['name'] for i in inspetor.get_indexes(tabela)}:
+            print(f"Índice '{nome}' já existe")
+            continue
+        # CONCURRENTLY não pode rodar dentro de uma transação
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            try:
+                conn.execute(text(comando_criacao(dialeto, nome, tabela, colunas)))
+            except Exception as e:
+                # Uma criação concorrente interrompida deixa um índice inválido para trás
+                if dialeto == 'postgresql':
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {nome}"))
+                print(f"Erro ao criar índice '{nome}': {str(e)}")
+                continue
+        criados.append(nome)
+        print(f"Índice '{nome}' criado com sucesso!")
+    return criados
+
+def add_indices():
+    with app.app_context():
+        criar_indices(db.engine)
+
+if __name__ == '__main__':
+    add_indices()
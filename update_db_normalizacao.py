@@ -0,0 +1,86 @@
+import sys
+from sqlalchemy import inspect, text
+from app import app, db
+from utils.text_normalizer import normalizar_texto
+
+TAMANHO_LOTE = 1000
+
+def add_colunas_normalizadas():
+    """
+    Cria as colunas titulo_norm/descricao_norm (e resposta.conteudo_norm),
+    se ainda não existirem, e
+    remove os índices antigos delas: a busca usa LIKE '%termo%', que não
+    aproveita índice B-tree, e eles só encareciam as escritas
+    """
+    colunas = {c['name'] for c in inspect(db.engine).get_columns('chamado')}
+    with db.engine.begin() as conn:
+        if 'titulo_norm' not in colunas:
+            conn.execute(text("ALTER TABLE chamado ADD COLUMN titulo_norm VARCHAR(200)"))
+            print("Coluna 'titulo_norm' adicionada com sucesso!")
+        if 'descricao_norm' not in colunas:
+            conn.execute(text("ALTER TABLE chamado ADD COLUMN descricao_norm TEXT"))
+            print("Coluna 'descricao_norm' adicionada com sucesso!")
+
+    colunas = {c['name'] for c in inspect(db.engine).get_columns('resposta')}
+    with db.engine.begin() as conn:
+        if 'conteudo_norm' not in colunas:
+            conn.execute(text("ALTER TABLE resposta ADD COLUMN conteudo_norm TEXT"))
+            print("Coluna 'conteudo_norm' adicionada com sucesso!")
+
+    indices = {i['name'] for i in inspect(db.engine).get_indexes('chamado')}
+    with db.engine.begin() as conn:
+        for nome in ('ix_chamado_titulo_norm', 'ix_chamado_descricao_norm'):
+            if nome in indices:
+                if db.engine.dialect.name == 'mysql':
+                    conn.execute(text(f"DROP INDEX {nome} ON chamado"))
+                else:
+                    conn.execute(text(f"DROP INDEX {nome}"))
+                print(f"Índice '{nome}' removido")
+
+def _backfill_tabela(tabela, colunas, todos):
+    """Preenche, em lotes, as colunas normalizadas {coluna_norm: coluna} de `tabela`"""
+    primeira = next(iter(colunas))
+    origens = ', '.join(colunas.values())
+    atribuicoes = ', '.join(f"{norm} = :{norm}" for norm in colunas)
+    ultimo_id = 0
+    total = 0
+    while True:
+        filtro = "" if todos else f"AND {primeira} IS NULL"
+        linhas = db.session.execute(text(
+            f"SELECT id, {origens} FROM {tabela} WHERE id > :ultimo {filtro} "
+            f"ORDER BY id LIMIT {TAMANHO_LOTE}"
+        ), {'ultimo': ultimo_id}).mappings().all()
+        if not linhas:
+            break
+
+        db.session.execute(
+            text(f"UPDATE {tabela} SET {atribuicoes} WHERE id = :id"),
+            [dict({'id': linha['id']},
+                  **{norm: normalizar_texto(linha[origem]) for norm, origem in colunas.items()})
+             for linha in linhas]
+        )
+        db.session.commit()
+
+        ultimo_id = linhas[-1]['id']
+        total += len(linhas)
+        print(f"{total} registros de '{tabela}' normalizados...")
+    return total
+
+def backfill(todos=False):
+    """
+    Preenche as colunas normalizadas dos chamados e respostas existentes, em
+    lotes. Por padrão só processa as linhas ainda não preenchidas; com
+    `todos=True` recalcula todas (ex.: após mudar a regra de normalização).
+    """
+    chamados = _backfill_tabela('chamado', {'titulo_norm': 'titulo', 'descricao_norm': 'descricao'}, todos)
+    respostas = _backfill_tabela('resposta', {'conteudo_norm': 'conteudo'}, todos)
+    print(f"Backfill concluído: {chamados} chamados e {respostas} respostas atualizados.")
+
+if __name__ == '__main__':
+    with app.app_context():
+        try:
+            add_colunas_normalizadas()
+            backfill(todos='--todos' in sys.argv)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao atualizar colunas normalizadas: {str(e)}")
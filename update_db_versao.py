@@ -0,0 +1,20 @@
+from sqlalchemy import inspect, text
+from app import app, db
+
+def add_coluna_versao():
+    """Cria a coluna chamado.versao (ver utils/versionamento.py), se ainda não existir"""
+    with app.app_context():
+        try:
+            colunas = {c['name'] for c in inspect(db.engine).get_columns('chamado')}
+            if 'versao' in colunas:
+                print("Coluna 'versao' já existe")
+                return
+            # Chamados existentes começam na versão 1
+            with db.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE chamado ADD COLUMN versao INTEGER NOT NULL DEFAULT 1"))
+            print("Coluna 'versao' adicionada com sucesso!")
+        except Exception as e:
+            print(f"Erro ao adicionar coluna 'versao': {str(e)}")
+
+if __name__ == '__main__':
+    add_coluna_versao()
@@ -0,0 +1,198 @@
+"""
+Log de alterações (change feed) de chamados, respostas e anexos
+
+Cada insert/update/delete dos modelos monitorados grava uma linha na tabela
+`registro_alteracao`, pela mesma conexão e na mesma transação da escrita: se
+a transação for desfeita, o registro também é. Mudanças de nome de usuário
+também entram (tabela `usuario`), pois alteram a listagem e o detalhe dos
+chamados dele. A sequência (`seq`) é
+crescente, e consumidores externos (go-search-api, caches) acompanham o log
+pedindo "tudo depois de seq X" em /api/changes, relendo do banco o estado
+atual dos registros alterados.
+
+Política de retenção:
+- compactação: de várias entradas do mesmo registro, só a mais recente é
+  mantida (o consumidor relê o estado atual, então as anteriores não trazem
+  informação). É segura a qualquer momento, para qualquer consumidor.
+- retenção: exclusões (tombstones) mais antigas que CHANGE_LOG_RETENTION_DAYS
+  são removidas. A maior seq removida fica registrada como marca de corte;
+  um consumidor que peça `since` anterior a ela precisa ressincronizar.
+
+Assim o log fica limitado ao número de registros existentes mais as
+exclusões recentes.
+
+Ordem de entrega: a seq é atribuída no flush, mas a entrada só fica visível
+no commit; uma transação mais lenta pode confirmar uma seq menor depois que
+um consumidor já passou dela. Por isso a leitura nunca entrega entradas a
+partir da menor seq ainda não confirmada por este processo, nem entradas
+mais novas que CHANGE_LOG_SAFETY_LAG (transações de outros processos).
+Esse atraso precisa ser maior que o intervalo entre o primeiro flush e o
+commit de qualquer escrita; as rotas não fazem I/O (e-mail, renderização)
+nesse intervalo. No SQLite as escritas são serializadas e as seqs sempre
+são confirmadas em ordem.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, and_
+from sqlalchemy.orm import Session, object_session, aliased, attributes
+
+# Entrada especial que guarda a maior seq removida pela retenção
+TABELA_CORTE = '_retencao'
+
+TAMANHO_LOTE = 1000
+
+_CHAVE_SESSAO = '_seqs_log_pendentes'
+
+# Seqs gravadas por transações deste processo que ainda não terminaram
+_seqs_pendentes = set()
+_lock_pendentes = threading.Lock()
+
+
+def menor_seq_pendente():
+    """Menor seq gravada e ainda não confirmada neste processo (None se não houver)"""
+    with _lock_pendentes:
+        return min(_seqs_pendentes, default=None)
+
+
+def _registrar(tabela_log, operacao):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if operacao == 'update':
+            if session is not None and not session.is_modified(target, include_collections=False):
+                return
+        nome = mapper.local_table.name
+        chamado_id = target.id if nome == 'chamado' else getattr(target, 'chamado_id', None)
+        resultado = connection.execute(tabela_log.insert().values(
+            tabela=nome, operacao=operacao, registro_id=target.id,
+            chamado_id=chamado_id, data=datetime.now()
+        ))
+        if session is not None:
+            seq = resultado.inserted_primary_key[0]
+            session.info.setdefault(_CHAVE_SESSAO, []).append(seq)
+            with _lock_pendentes:
+                _seqs_pendentes.add(seq)
+    return listener
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _liberar_seqs(session, transaction):
+    """Commit, rollback ou close: as seqs da transação deixam de estar pendentes"""
+    if transaction.parent is not None:
+        return
+    seqs = session.info.pop(_CHAVE_SESSAO, None)
+    if seqs:
+        with _lock_pendentes:
+            _seqs_pendentes.difference_update(seqs)
+
+
+def _limitar_entrega(consulta, modelo_log, atraso):
+    """Omite entradas a partir da menor seq pendente e as mais novas que `atraso`"""
+    pendente = menor_seq_pendente()
+    if pendente is not None:
+        consulta = consulta.filter(modelo_log.seq < pendente)
+    if atraso:
+        consulta = consulta.filter(modelo_log.data <= datetime.now() - atraso)
+    return consulta
+
+
+def monitorar_alteracoes(tabela_log, *modelos):
+    """Passa a registrar em `tabela_log` as escritas dos `modelos`"""
+    for modelo in modelos:
+        for operacao in ('insert', 'update', 'delete'):
+            event.listen(modelo, f'after_{operacao}', _registrar(tabela_log, operacao))
+
+
+def monitorar_nomes(tabela_log, usuario_model):
+    """Registra em `tabela_log` as mudanças de nome dos usuários (as demais colunas não)"""
+    registrar = _registrar(tabela_log, 'update')
+
+    @event.listens_for(usuario_model, 'after_update')
+    def _nome_alterado(mapper, connection, target):
+        if attributes.get_history(target, 'nome').has_changes():
+            registrar(mapper, connection, target)
+
+
+def marca_de_corte(session, modelo_log):
+    """Maior seq já removida pela retenção (0 se nada foi removido)"""
+    return session.query(func.max(modelo_log.registro_id)) \
+                  .filter(modelo_log.tabela == TABELA_CORTE).scalar() or 0
+
+
+def ultima_seq(session, modelo_log, atraso=timedelta(0)):
+    """
+    Maior seq que já pode ser entregue (0 se o log estiver vazio): ponto de
+    partida de quem vai acompanhar o log a partir do estado atual
+    """
+    consulta = session.query(func.max(modelo_log.seq)).filter(modelo_log.tabela != TABELA_CORTE)
+    return _limitar_entrega(consulta, modelo_log, atraso).scalar() or 0
+
+
+def marca_alteracoes(session, modelo_log, atraso=timedelta(0)):
+    """
+    Marca barata do estado do log: (ultima_seq, maior seq gravada). Muda a
+    cada commit de uma escrita monitorada, inclusive quando uma transação
+    confirma uma seq menor que a maior já vista (ultima_seq a alcança depois
+    de `atraso`).
+    """
+    maior = session.query(func.max(modelo_log.seq)).scalar() or 0
+    return ultima_seq(session, modelo_log, atraso), maior
+
+
+def listar_alteracoes(session, modelo_log, desde, limite, atraso=timedelta(0)):
+    """
+    Entradas com seq > `desde`, em ordem, no máximo `limite`. Para não pular
+    transações concorrentes que receberam seq menor mas ainda não foram
+    confirmadas, a lista para antes da menor seq pendente deste processo e
+    omite entradas mais novas que `atraso`.
+    """
+    consulta = session.query(modelo_log) \
+        .filter(modelo_log.seq > desde) \
+        .filter(modelo_log.tabela != TABELA_CORTE)
+    return _limitar_entrega(consulta, modelo_log, atraso).order_by(modelo_log.seq).limit(limite).all()
+
+
+def compactar(session, modelo_log, lote=TAMANHO_LOTE):
+    """Remove as entradas substituídas por uma mais recente do mesmo registro"""
+    posterior = aliased(modelo_log)
+    substituidas = [seq for seq, in session.query(modelo_log.seq).filter(
+        session.query(posterior.seq).filter(and_(
+            posterior.tabela == modelo_log.tabela,
+            posterior.registro_id == modelo_log.registro_id,
+            posterior.seq > modelo_log.seq
+        )).exists()
+    ).filter(modelo_log.tabela != TABELA_CORTE)]
+
+    # Em lotes (o MySQL não permite DELETE com subconsulta na mesma tabela)
+    for inicio in range(0, len(substituidas), lote):
+        session.query(modelo_log) \
+               .filter(modelo_log.seq.in_(substituidas[inicio:inicio + lote])) \
+               .delete(synchronize_session=False)
+        session.commit()
+    return len(substituidas)
+
+
+def aplicar_retencao(session, modelo_log, dias):
+    """Remove exclusões com mais de `dias` dias e atualiza a marca de corte"""
+    limite = datetime.now() - timedelta(days=dias)
+    antigas = session.query(modelo_log.seq) \
+        .filter(modelo_log.operacao == 'delete') \
+        .filter(modelo_log.tabela != TABELA_CORTE) \
+        .filter(modelo_log.data < limite)
+    maior = antigas.with_entities(func.max(modelo_log.seq)).scalar()
+    if maior is None:
+        return 0
+
+    removidas = session.query(modelo_log) \
+        .filter(modelo_log.operacao == 'delete') \
+        .filter(modelo_log.tabela != TABELA_CORTE) \
+        .filter(modelo_log.seq <= maior) \
+        .filter(modelo_log.data < limite) \
+        .delete(synchronize_session=False)
+    if maior > marca_de_corte(session, modelo_log):
+        session.query(modelo_log).filter(modelo_log.tabela == TABELA_CORTE) \
+               .delete(synchronize_session=False)
+        session.add(modelo_log(tabela=TABELA_CORTE, operacao='corte', registro_id=maior,
+                               data=datetime.now()))
+    session.commit()
+    return removidas
@@ -0,0 +1,132 @@
+"""
+Contadores de chamados por (status, criticidade, autor_id)
+
+A tabela `contador_chamado` guarda quantos chamados existem em cada
+combinação de status, criticidade e autor. Ela é ajustada pelos eventos de
+mapper de Chamado, pela mesma conexão e na mesma transação da escrita:
+criar um chamado soma 1 na sua chave, mudar status/criticidade/autor move 1
+da chave antiga para a nova e excluir subtrai 1. Assim os cards do
+dashboard leem algumas dezenas de linhas, qualquer que seja o tamanho de
+`chamado`.
+
+Escritas que não passam pelo ORM (UPDATE/DELETE em massa, SQL direto) não
+atualizam os contadores; `reconstruir_contadores` (reconcile_counters.py)
+recalcula a tabela a partir de `chamado`, com ela travada contra escritas
+concorrentes.
+"""
+from sqlalchemy import event, func, and_, text
+from sqlalchemy.orm import attributes
+
+# Colunas da chave; valores nulos são gravados como SEM_VALOR (a chave é a PK)
+CAMPOS_CHAVE = ('status', 'criticidade', 'autor_id')
+SEM_VALOR = {'status': '', 'criticidade': '', 'autor_id': 0}
+
+
+def _chave(valores):
+    return {campo: SEM_VALOR[campo] if valores[campo] is None else valores[campo] for campo in CAMPOS_CHAVE}
+
+
+def _valores_anteriores(target):
+    """Valores da chave antes da alteração em curso"""
+    anteriores = {}
+    for campo in CAMPOS_CHAVE:
+        removidos = attributes.get_history(target, campo).deleted
+        anteriores[campo] = removidos[0] if removidos else getattr(target, campo)
+    return anteriores
+
+
+def _ajustar(connection, tabela, chave, delta):
+    """Soma `delta` à linha de `chave`, criando-a se ainda não existir"""
+    dialeto = connection.dialect.name
+    if dialeto in ('sqlite', 'postgresql'):
+        if dialeto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        comando = insert(tabela).values(quantidade=delta, **chave)
+        connection.execute(comando.on_conflict_do_update(
+            index_elements=list(CAMPOS_CHAVE),
+            set_={'quantidade': tabela.c.quantidade + comando.excluded.quantidade}
+        ))
+    elif dialeto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        comando = insert(tabela).values(quantidade=delta, **chave)
+        connection.execute(comando.on_duplicate_key_update(
+            quantidade=tabela.c.quantidade + comando.inserted.quantidade
+        ))
+    else:
+        atualizados = connection.execute(
+            tabela.update()
+                  .where(and_(*[tabela.c[campo] == valor for campo, valor in chave.items()]))
+                  .values(quantidade=tabela.c.quantidade + delta)
+        ).rowcount
+        if not atualizados:
+            connection.execute(tabela.insert().values(quantidade=delta, **chave))
+
+
+def monitorar_contadores(tabela_contadores, chamado_model):
+    """Mantém `tabela_contadores` em dia com as escritas de `chamado_model`"""
+
+    @event.listens_for(chamado_model, 'after_insert')
+    def _inserido(mapper, connection, target):
+        atuais = {campo: getattr(target, campo) for campo in CAMPOS_CHAVE}
+        _ajustar(connection, tabela_contadores, _chave(atuais), 1)
+
+    @event.listens_for(chamado_model, 'after_update')
+    def _atualizado(mapper, connection, target):
+        antes = _chave(_valores_anteriores(target))
+        depois = _chave({campo: getattr(target, campo) for campo in CAMPOS_CHAVE})
+        if antes != depois:
+            _ajustar(connection, tabela_contadores, antes, -1)
+            _ajustar(connection, tabela_contadores, depois, 1)
+
+    @event.listens_for(chamado_model, 'after_delete')
+    def _removido(mapper, connection, target):
+        _ajustar(connection, tabela_contadores, _chave(_valores_anteriores(target)), -1)
+
+
+def _travar_contadores(session, contador_model):
+    """
+    Bloqueia as escritas nos contadores até o fim da transação: quem criar ou
+    alterar um chamado nesse meio tempo espera para somar na tabela já
+    recalculada, em vez de ter o ajuste apagado por ela.
+    """
+    dialeto = session.connection().dialect.name
+    if dialeto == 'postgresql':
+        session.execute(text(f'LOCK TABLE {contador_model.__tablename__} IN EXCLUSIVE MODE'))
+    elif dialeto == 'mysql':
+        # Trava as linhas e os intervalos do índice (inclusive chaves novas)
+        session.query(contador_model.autor_id).with_for_update().all()
+    # SQLite: o DELETE que vem em seguida já pega a trava de escrita do banco
+
+
+def reconstruir_contadores(session, chamado_model, contador_model):
+    """
+    Recalcula todos os contadores a partir de `chamado` (em uma transação).
+    A tabela é travada antes da contagem, para não perder os ajustes de
+    escritas concorrentes.
+    """
+    _travar_contadores(session, contador_model)
+    session.query(contador_model).delete(synchronize_session=False)
+
+    colunas = [getattr(chamado_model, campo) for campo in CAMPOS_CHAVE]
+    linhas = session.query(*colunas, func.count(chamado_model.id)).group_by(*colunas).all()
+    totais = {}
+    for *valores, quantidade in linhas:
+        chave = tuple(_chave(dict(zip(CAMPOS_CHAVE, valores))).values())
+        totais[chave] = totais.get(chave, 0) + quantidade
+    session.bulk_insert_mappings(contador_model, [
+        dict(zip(CAMPOS_CHAVE, chave), quantidade=quantidade) for chave, quantidade in totais.items()
+    ])
+    session.commit()
+    return sum(totais.values())
+
+
+def somar_contadores(session, contador_model, autor_id=None):
+    """[(status, criticidade, quantidade)] somando os autores (ou só de `autor_id`)"""
+    consulta = session.query(contador_model.status, contador_model.criticidade,
+                             func.sum(contador_model.quantidade)) \
+                      .filter(contador_model.quantidade != 0)
+    if autor_id is not None:
+        consulta = consulta.filter(contador_model.autor_id == autor_id)
+    return consulta.group_by(contador_model.status, contador_model.criticidade).all()
@@ -0,0 +1,71 @@
+"""
+Status e criticidade de chamados guardados como inteiros pequenos
+
+No banco as colunas são SMALLINT (1, 2, 3...); o tipo EnumInteiro converte
+nos dois sentidos, então o ORM, as comparações (`Chamado.status == 'Aberto'`)
+e os templates continuam vendo os rótulos. A ordem dos rótulos define os
+códigos e não pode ser alterada depois da migração (update_db_enums.py);
+novos valores entram no final.
+
+Para criticidade os códigos seguem a prioridade, de modo que ordenar pela
+coluna (e pelo índice ix_chamado_criticidade_data) é ordenar por prioridade.
+"""
+from sqlalchemy.types import TypeDecorator, SmallInteger
+
+STATUS_CHAMADO = ('Aberto', 'Em Andamento', 'Encerrado', 'Reprovado')
+
+# Em ordem crescente de prioridade
+CRITICIDADES = ('Baixa', 'Média', 'Alta', 'Urgente')
+
+# Código usado ao comparar com um rótulo desconhecido: nenhuma linha o tem
+CODIGO_INEXISTENTE = 0
+
+
+class EnumInteiro(TypeDecorator):
+    """Rótulo (str) no Python, código 1..n (SMALLINT) no banco"""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, rotulos):
+        super().__init__()
+        self.rotulos = tuple(rotulos)
+
+    @property
+    def python_type(self):
+        return str
+
+    def codigo(self, rotulo):
+        """Código de `rotulo` (CODIGO_INEXISTENTE se não for um rótulo válido)"""
+        try:
+            return self.rotulos.index(rotulo) + 1
+        except ValueError:
+            return CODIGO_INEXISTENTE
+
+    def rotulo(self, codigo):
+        """Rótulo de `codigo` (None se desconhecido)"""
+        if 1 <= codigo <= len(self.rotulos):
+            return self.rotulos[codigo - 1]
+        return None
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        # Filtros com valores inválidos (ex.: ?status=xyz) não casam com nada;
+        # a gravação de valores inválidos é barrada em validar_rotulo
+        return self.codigo(value)
+
+    def process_literal_param(self, value, dialect):
+        return 'NULL' if value is None else str(self.codigo(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.rotulo(int(value))
+
+
+def validar_rotulo(tipo, campo, valor):
+    """Recusa rótulos desconhecidos ao gravar (usado com @validates nos modelos)"""
+    if valor is not None and valor not in tipo.rotulos:
+        raise ValueError(f"{campo} inválido: '{valor}'. Use um de: {', '.join(tipo.rotulos)}")
+    return valor
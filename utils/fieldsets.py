@@ -0,0 +1,42 @@
+"""
+Parâmetro `fields` das APIs JSON (sparse fieldsets)
+
+O cliente pede só os campos que vai usar, ex.:
+`/api/chamados?fields=id,titulo,status,criticidade,data_criacao`. Cada API
+declara os campos aceitos e a coluna (ou colunas) de que cada um depende,
+para carregar do banco apenas o necessário; campos desconhecidos são
+recusados com 400.
+"""
+
+
+class CamposInvalidos(ValueError):
+    """`fields` com campos que a API não conhece"""
+
+
+def campos_pedidos(valor, permitidos, padrao=None):
+    """
+    Campos pedidos em `valor` ("a,b,c"), sem repetições e na ordem pedida.
+    Sem `fields` (ou vazio) devolve `padrao` (todos os `permitidos` se None).
+    """
+    campos = tuple(dict.fromkeys(c.strip() for c in (valor or '').split(',') if c.strip()))
+    if not campos:
+        return tuple(padrao if padrao is not None else permitidos)
+    desconhecidos = [c for c in campos if c not in permitidos]
+    if desconhecidos:
+        raise CamposInvalidos(f"Campos desconhecidos em fields: {', '.join(desconhecidos)}. "
+                              f"Disponíveis: {', '.join(permitidos)}")
+    return campos
+
+
+def colunas_necessarias(campos, dependencias, sempre=()):
+    """
+    Colunas das quais os `campos` dependem, sem repetições; `dependencias`
+    mapeia campo -> tupla de colunas e `sempre` entra em qualquer caso.
+    """
+    colunas = list(sempre)
+    for campo in campos:
+        for coluna in dependencias.get(campo, ()):
+            # Comparação por identidade: `==` entre colunas gera uma expressão SQL
+            if not any(coluna is existente for existente in colunas):
+                colunas.append(coluna)
+    return colunas
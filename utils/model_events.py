@@ -0,0 +1,74 @@
+"""
+Notificação de escritas nos modelos após o commit
+
+Os eventos de mapper (after_insert/after_update/after_delete) registram cada
+alteração na sessão; quando a transação é confirmada, as alterações são
+repassadas aos assinantes (caches, índices de busca, etc.). Em caso de
+rollback, as alterações pendentes são descartadas.
+"""
+import logging
+from collections import namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session, attributes
+
+from models import Chamado, Resposta
+
+logger = logging.getLogger("model_events")
+
+# modelo: nome da tabela; operacao: 'insert', 'update' ou 'delete'
+# dados: valores das colunas no momento do flush
+# anteriores: valores antigos das colunas alteradas (apenas em 'update')
+Alteracao = namedtuple('Alteracao', ['modelo', 'operacao', 'id', 'dados', 'anteriores'])
+
+_CHAVE_SESSAO = '_alteracoes_pendentes'
+
+_assinantes = []
+
+
+def ao_confirmar(callback):
+    """
+    Registra `callback(alteracoes)` para ser chamado após cada commit que
+    alterou algum dos modelos monitorados. Pode ser usado como decorator.
+    """
+    _assinantes.append(callback)
+    return callback
+
+
+def _registrar(operacao):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        dados = {attr.key: getattr(target, attr.key) for attr in mapper.column_attrs}
+        anteriores = {}
+        if operacao == 'update':
+            for attr in mapper.column_attrs:
+                removidos = attributes.get_history(target, attr.key).deleted
+                if removidos:
+                    anteriores[attr.key] = removidos[0]
+        session.info.setdefault(_CHAVE_SESSAO, []).append(
+            Alteracao(mapper.local_table.name, operacao, target.id, dados, anteriores)
+        )
+    return listener
+
+
+for _modelo in (Chamado, Resposta):
+    for _operacao in ('insert', 'update', 'delete'):
+        event.listen(_modelo, f'after_{_operacao}', _registrar(_operacao))
+
+
+@event.listens_for(Session, 'after_commit')
+def _despachar(session):
+    alteracoes = session.info.pop(_CHAVE_SESSAO, None)
+    if not alteracoes:
+        return
+    for callback in _assinantes:
+        try:
+            callback(alteracoes)
+        except Exception as e:
+            logger.error(f"Erro ao processar alterações em {callback.__name__}: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar(session):
+    session.info.pop(_CHAVE_SESSAO, None)
@@ -0,0 +1,150 @@
+"""
+Paginação por cursor (keyset) para listagens de chamados, usuários e
+notificações
+
+Em vez de OFFSET, cada página continua a partir dos valores das chaves de
+ordenação do último item da página anterior. O custo de qualquer página é o
+mesmo da primeira, pois o banco só percorre os registros retornados.
+"""
+import json
+import base64
+import hashlib
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+class CursorInvalido(ValueError):
+    """Cursor malformado ou gerado para outra ordenação"""
+
+
+def chaves_ordenacao_chamados(modelo, sort='data', order='desc'):
+    """
+    Retorna as chaves de ordenação (expressão, descendente) para os modos
+    de ordenação suportados pelas listagens (id, data e criticidade).
+
+    Todas terminam em `id`, garantindo uma ordem total e estável.
+    """
+    descendente = order != 'asc'
+
+    if sort == 'id':
+        return [(modelo.id, descendente)]
+    if sort == 'criticidade':
+        return [
+            # A coluna guarda o peso da criticidade: a ordem vem do índice
+            (modelo.criticidade, descendente),
+            (modelo.data_criacao, descendente),
+            (modelo.id, descendente)
+        ]
+    if sort != 'data':
+        # Ordenação padrão
+        descendente = True
+    return [(modelo.data_criacao, descendente), (modelo.id, descendente)]
+
+
+def chaves_ordenacao_usuarios(modelo, sort='nome', order='asc'):
+    """Chaves de ordenação da listagem de usuários (nome, email ou id)"""
+    descendente = order == 'desc'
+
+    if sort == 'id':
+        return [(modelo.id, descendente)]
+    if sort == 'email':
+        # email é único: dispensa o desempate por id
+        return [(modelo.email, descendente)]
+    return [(modelo.nome, descendente), (modelo.id, descendente)]
+
+
+def chaves_ordenacao_notificacoes(modelo):
+    """Notificações mais recentes primeiro (índice ix_notificacao_usuario_data)"""
+    return [(modelo.data_criacao, True), (modelo.id, True)]
+
+
+def _assinatura(chaves):
+    """Identifica a ordenação para recusar cursores de outra listagem"""
+    texto = '|'.join(f'{expr}:{int(desc)}' for expr, desc in chaves)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:12]
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    return valor
+
+
+def _desserializar_valor(valor):
+    if isinstance(valor, dict) and 'dt' in valor:
+        return datetime.fromisoformat(valor['dt'])
+    return valor
+
+
+def codificar_cursor(chaves, valores):
+    """Gera o cursor opaco a partir dos valores das chaves do último item"""
+    dados = {'s': _assinatura(chaves), 'v': [_serializar_valor(v) for v in valores]}
+    bruto = json.dumps(dados, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(chaves, cursor):
+    """Recupera os valores das chaves contidos no cursor"""
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        valores = [_desserializar_valor(v) for v in dados['v']]
+    except Exception:
+        raise CursorInvalido('Cursor inválido')
+
+    if dados.get('s') != _assinatura(chaves) or len(valores) != len(chaves):
+        raise CursorInvalido('Cursor não corresponde à ordenação solicitada')
+    return valores
+
+
+def _condicao_apos(chaves, valores):
+    """Condição "linha vem depois do cursor" expandida em OR/AND (portável)"""
+    condicoes = []
+    for i, (expressao, descendente) in enumerate(chaves):
+        anteriores = [chaves[j][0] == valores[j] for j in range(i)]
+        if descendente:
+            comparacao = expressao < valores[i]
+        else:
+            comparacao = expressao > valores[i]
+        condicoes.append(and_(*anteriores, comparacao))
+    return or_(*condicoes)
+
+
+def paginar_keyset(query, chaves, cursor=None, limite=20):
+    """
+    Executa uma página da query ordenada pelas `chaves`.
+
+    Retorna a tupla (itens, proximo_cursor); `proximo_cursor` é None quando
+    não há mais páginas. Os itens mantêm o formato original da query
+    (entidade ou tupla), sem as colunas auxiliares de ordenação.
+    """
+    num_entidades = len(query.column_descriptions)
+
+    if cursor:
+        valores = decodificar_cursor(chaves, cursor)
+        query = query.filter(_condicao_apos(chaves, valores))
+
+    query = query.order_by(*[
+        expressao.desc() if descendente else expressao.asc()
+        for expressao, descendente in chaves
+    ])
+    query = query.add_columns(*[
+        expressao.label(f'_cursor_{i}') for i, (expressao, _) in enumerate(chaves)
+    ])
+
+    linhas = query.limit(limite + 1).all()
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    itens = []
+    for linha in linhas:
+        if num_entidades == 1:
+            itens.append(linha[0])
+        else:
+            itens.append(tuple(linha[:num_entidades]))
+
+    proximo_cursor = None
+    if tem_mais and linhas:
+        proximo_cursor = codificar_cursor(chaves, list(linhas[-1][num_entidades:]))
+
+    return itens, proximo_cursor
@@ -0,0 +1,162 @@
+"""
+Sintaxe de busca estruturada
+
+Permite digitar filtros e texto livre numa única caixa de busca:
+
+    status:Aberto criticidade:Urgente autor:maria impressora desde:2026-01-01
+
+Campos aceitos (valores sem diferenciar acentos/maiúsculas; use aspas para
+valores com espaço, ex.: status:"em andamento"):
+
+- status / criticidade: igualdade com um dos valores conhecidos
+- autor: prefixo do nome ou do e-mail do autor
+- desde / ate: intervalo de data de criação (AAAA-MM-DD, ambos inclusivos)
+
+O restante é texto livre, pesquisado pelo backend de busca, inclusive
+outros `palavra:valor` (horários como 10:30, códigos como erro:404, URLs).
+Todos os
+filtros viram condições na mesma consulta SQL, sobre colunas indexadas ou
+com prefixo (LIKE 'x%'). Consultas que não poderiam usar índice ou que
+percorreriam a tabela inteira são rejeitadas com ConsultaInvalida antes de
+chegar ao banco.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from utils.enum_types import STATUS_CHAMADO, CRITICIDADES
+from utils.text_normalizer import normalizar_texto
+
+# Texto livre só com termos menores que isso casaria com quase tudo (prefixo)
+MIN_TAMANHO_TERMO = 2
+
+# Intervalo de datas máximo quando não há texto nem autor para restringir
+MAX_INTERVALO_DIAS = 366
+
+CAMPOS = ('status', 'criticidade', 'autor', 'desde', 'ate')
+
+# campo:valor, campo:"valor com espaço", "frase" ou palavra solta. Só os
+# CAMPOS (com ou sem acento/maiúsculas) são filtros
+_TOKEN_RE = re.compile(r'(status|criticidade|autor|desde|at[eé]):(?:"([^"]*)"|(\S*))|"([^"]*)"|(\S+)',
+                       re.UNICODE | re.IGNORECASE)
+
+ConsultaEstruturada = namedtuple('ConsultaEstruturada', ['texto', 'status', 'criticidade', 'autor', 'desde', 'ate'])
+
+
+class ConsultaInvalida(ValueError):
+    """Consulta com campo sem valor, valor inválido ou sem limite de custo"""
+
+
+def _valor_conhecido(campo, valor, conhecidos):
+    normalizado = normalizar_texto(valor.replace('_', ' ')).strip()
+    for conhecido in conhecidos:
+        if normalizar_texto(conhecido) == normalizado:
+            return conhecido
+    raise ConsultaInvalida(f"Valor inválido para {campo}: '{valor}' (use {', '.join(conhecidos)})")
+
+
+def _data(campo, valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d')
+    except ValueError:
+        raise ConsultaInvalida(f"Data inválida em {campo}: '{valor}' (use AAAA-MM-DD)")
+
+
+def _combinar(campo, atual, novo):
+    if atual is not None and novo is not None and atual != novo:
+        raise ConsultaInvalida(f"Valores conflitantes para {campo}: '{atual}' e '{novo}'")
+    return atual if atual is not None else novo
+
+
+def interpretar_consulta(texto, status=None, criticidade=None, data_inicio=None, data_fim=None):
+    """
+    Converte o texto digitado em uma ConsultaEstruturada. Os parâmetros
+    avulsos (status, criticidade, data_inicio, data_fim) são combinados com
+    os campos da consulta; valores diferentes para o mesmo campo são um erro.
+    """
+    termos = []
+    campos = dict.fromkeys(CAMPOS)
+
+    for campo, valor_aspas, valor, frase, palavra in _TOKEN_RE.findall(texto or ''):
+        if not campo:
+            termos.append(frase or palavra)
+            continue
+
+        campo = normalizar_texto(campo)
+        valor = (valor_aspas or valor).strip()
+        if not valor:
+            raise ConsultaInvalida(f"Campo {campo} sem valor")
+
+        if campo == 'status':
+            valor = _valor_conhecido(campo, valor, STATUS_CHAMADO)
+        elif campo == 'criticidade':
+            valor = _valor_conhecido(campo, valor, CRITICIDADES)
+        elif campo in ('desde', 'ate'):
+            valor = _data(campo, valor)
+        campos[campo] = _combinar(campo, campos[campo], valor)
+
+    if status:
+        campos['status'] = _combinar('status', campos['status'],
+                                     _valor_conhecido('status', status, STATUS_CHAMADO))
+    if criticidade:
+        campos['criticidade'] = _combinar('criticidade', campos['criticidade'],
+                                          _valor_conhecido('criticidade', criticidade, CRITICIDADES))
+    # Os parâmetros de data apenas estreitam o intervalo da consulta
+    if data_inicio:
+        inicio = _data('data_inicio', data_inicio)
+        campos['desde'] = max(inicio, campos['desde']) if campos['desde'] else inicio
+    if data_fim:
+        fim = _data('data_fim', data_fim)
+        campos['ate'] = min(fim, campos['ate']) if campos['ate'] else fim
+
+    consulta = ConsultaEstruturada(' '.join(termos), **campos)
+    _verificar_custo(consulta)
+    return consulta
+
+
+def _verificar_custo(consulta):
+    """Rejeita combinações que não têm como usar índice ou não têm limite"""
+    termos = re.findall(r'\w+', consulta.texto, re.UNICODE)
+    if termos and all(len(termo) < MIN_TAMANHO_TERMO for termo in termos):
+        raise ConsultaInvalida(f"Termo muito curto: '{consulta.texto}' (mínimo de {MIN_TAMANHO_TERMO} caracteres)")
+
+    if consulta.desde and consulta.ate and consulta.desde > consulta.ate:
+        raise ConsultaInvalida('Intervalo de datas vazio: desde é posterior a ate')
+
+    if consulta.autor is not None and len(consulta.autor) < MIN_TAMANHO_TERMO:
+        raise ConsultaInvalida(f"autor precisa de pelo menos {MIN_TAMANHO_TERMO} caracteres")
+
+    # Um intervalo de datas aberto ou muito longo só é aceito junto com um
+    # filtro seletivo (texto ou autor); sozinho, percorreria a tabela
+    if (consulta.desde or consulta.ate) and not (consulta.texto or consulta.autor):
+        if not (consulta.desde and consulta.ate):
+            raise ConsultaInvalida('Intervalo de datas aberto: informe desde e ate, ou combine com texto/autor')
+        if (consulta.ate - consulta.desde).days > MAX_INTERVALO_DIAS:
+            raise ConsultaInvalida(f'Intervalo de datas maior que {MAX_INTERVALO_DIAS} dias: '
+                                   'reduza o período ou combine com texto/autor')
+
+
+def aplicar_consulta(query, consulta, chamado_model, usuario_model):
+    """
+    Acrescenta à query os filtros de campo da consulta. A query já deve ter
+    o JOIN com o autor (usuario_model); o texto livre fica a cargo do backend
+    de busca.
+    """
+    if consulta.status:
+        query = query.filter(chamado_model.status == consulta.status)
+    if consulta.criticidade:
+        query = query.filter(chamado_model.criticidade == consulta.criticidade)
+    if consulta.desde:
+        query = query.filter(chamado_model.data_criacao >= consulta.desde)
+    if consulta.ate:
+        # `ate` é inclusivo: vai até o fim do dia
+        query = query.filter(chamado_model.data_criacao < consulta.ate + timedelta(days=1))
+    if consulta.autor:
+        prefixo = consulta.autor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(or_(
+            usuario_model.nome.like(f'{prefixo}%', escape='\\'),
+            usuario_model.email.like(f'{prefixo}%', escape='\\')
+        ))
+    return query
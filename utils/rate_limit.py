@@ -0,0 +1,14 @@
+"""
+Rate limiting da aplicação
+
+O Limiter é criado sem app (como o `db` de models.py) para que os
+blueprints possam declarar limites próprios; o app.py chama
+`limiter.init_app(app)`.
+"""
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"]
+)
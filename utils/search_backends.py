@@ -0,0 +1,229 @@
+"""
+Backends da busca de chamados
+
+Cada backend recebe a query base do /api/search (já com JOIN do autor e
+filtro de visibilidade) e a restringe aos chamados que casam com o texto,
+devolvendo também a ordenação por relevância. Filtros de campo, paginação e
+serialização continuam no Flask, iguais para todos os backends.
+
+- sql: FTS5 no SQLite, LIKE nas colunas normalizadas nos demais bancos
+- index: índice invertido em memória (utils/search_engine.py); termos que
+  casam com mais de MAX_IDS_FILTRO chamados são buscados pelo backend sql
+- go: serviço HTTP go-search-api, que devolve os ids dos chamados; se ele
+  estiver lento ou fora do ar, a busca cai automaticamente para o backend sql
+- trigram: busca aproximada (fuzzy=1), independente do backend configurado;
+  as palavras similares são procuradas no índice em memória se ele for o
+  backend ativo, senão no backend sql
+
+O backend é escolhido por SEARCH_BACKEND. Sem ele vale a ordem de antes dos
+backends: sql se o banco tem o índice FTS5; senão index se
+SEARCH_INDEX_ENABLED; senão sql (LIKE).
+"""
+import abc
+import time
+import logging
+import threading
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import or_
+
+from models import Chamado, Resposta, RegistroAlteracao
+from utils.search_fts import fts_disponivel, aplicar_busca_fts, respostas_correspondentes_fts, FTS_RESPOSTAS
+from utils.search_engine import garantir_motor_carregado, filtro_ids, MAX_IDS_FILTRO
+from utils.search_respostas import filtro_respostas, respostas_correspondentes
+from utils.text_normalizer import filtro_busca_normalizada
+from utils.trigram_index import garantir_trigramas_carregados, expressao_pontuacao
+
+logger = logging.getLogger("search_backends")
+
+# query: query restrita; chaves_relevancia: [(expressao, descendente)] ou None
+# inclui_respostas / confere_texto: ver utils/search_cache.PredicadoBusca
+# respostas: callable(session, chamado_ids, termo) -> {chamado_id: (resposta_id, trecho)}, ou None
+# backend: nome do backend que atendeu (pode ser 'sql' após fallback)
+FiltroTexto = namedtuple('FiltroTexto', ['query', 'chaves_relevancia', 'inclui_respostas',
+                                         'confere_texto', 'respostas', 'backend'])
+
+
+def _por_pontuacao(pontuacoes):
+    """Chaves de ordenação para um dict {id: pontuação} (maior primeiro)"""
+    return [(expressao_pontuacao(Chamado.id, pontuacoes), True),
+            (Chamado.data_criacao, True), (Chamado.id, True)]
+
+
+class BackendBusca(abc.ABC):
+    """Interface dos backends de busca"""
+
+    nome = None
+
+    @abc.abstractmethod
+    def filtrar(self, app, session, query, termo):
+        """Restringe `query` aos chamados que casam com `termo`; devolve um FiltroTexto"""
+
+
+class BackendSQL(BackendBusca):
+    """Busca no próprio banco: FTS5 (SQLite) ou LIKE nas colunas normalizadas"""
+
+    nome = 'sql'
+
+    # Bancos já avisados de que o índice resposta_fts não existe
+    _avisados = set()
+
+    def filtrar(self, app, session, query, termo):
+        engine = session.connection().engine
+        if fts_disponivel(engine):
+            if fts_disponivel(engine, FTS_RESPOSTAS):
+                filtrada, rank = aplicar_busca_fts(query, Chamado.id, termo)
+                if rank is not None:
+                    chaves = [(rank, False), (Chamado.data_criacao, True), (Chamado.id, True)]
+                    return FiltroTexto(filtrada, chaves, True, True, respostas_correspondentes_fts, self.nome)
+            elif str(engine.url) not in self._avisados:
+                # Sem resposta_fts o FTS não veria as respostas: usa o LIKE em tudo
+                self._avisados.add(str(engine.url))
+                logger.warning("Índice resposta_fts ausente (rode update_db_fts.py): "
+                               "buscando por LIKE nas colunas normalizadas")
+
+        query = query.filter(or_(
+            filtro_busca_normalizada(Chamado, termo),
+            filtro_respostas(Resposta, Chamado.id, termo)
+        ))
+        return FiltroTexto(query, None, True, True, self._respostas, self.nome)
+
+    @staticmethod
+    def _respostas(session, chamado_ids, termo):
+        return respostas_correspondentes(session, Resposta, chamado_ids, termo)
+
+
+class BackendIndice(BackendSQL):
+    """Índice invertido em memória, carregado do snapshot SEARCH_INDEX_PATH"""
+
+    nome = 'index'
+
+    def filtrar(self, app, session, query, termo):
+        motor = garantir_motor_carregado(app, session, Chamado, Resposta, RegistroAlteracao)
+        ids = motor.buscar(termo)
+        if len(ids) > MAX_IDS_FILTRO:
+            # Termo genérico demais para virar uma lista de ids no SQL
+            return super().filtrar(app, session, query, termo)
+        query = query.filter(filtro_ids(Chamado.id, ids))
+        return FiltroTexto(query, None, True, True, self._respostas, self.nome)
+
+
+class BackendTrigramas(BackendBusca):
+    """Busca aproximada por trigramas (tolerante a erros de digitação)"""
+
+    nome = 'trigram'
+
+    def filtrar(self, app, session, query, termo):
+        if backend_configurado(app, session).nome == BackendIndice.nome:
+            motor = garantir_motor_carregado(app, session, Chamado, Resposta, RegistroAlteracao)
+            indice = garantir_trigramas_carregados(session, Chamado, Resposta, motor)
+            chamados_da_palavra = motor.chamados_do_termo
+        else:
+            # Sem o índice em memória, que não é montado só para isso
+            indice = garantir_trigramas_carregados(session, Chamado, Resposta)
+
+            def chamados_da_palavra(palavra):
+                filtro = backend_sql.filtrar(app, session, session.query(Chamado.id), palavra)
+                return {chamado_id for chamado_id, in filtro.query}
+
+        pontuacoes = indice.buscar(termo, chamados_da_palavra)
+        query = query.filter(filtro_ids(Chamado.id, pontuacoes))
+        return FiltroTexto(query, _por_pontuacao(pontuacoes), True, False, None, self.nome)
+
+
+class BackendRemotoIndisponivel(Exception):
+    """Falha, lentidão ou resposta inválida do serviço de busca remoto"""
+
+
+class BackendGo(BackendBusca):
+    """
+    Delegação ao go-search-api. As conexões HTTP ficam num pool com
+    keep-alive (uma Session compartilhada) e cada chamada tem timeouts
+    curtos de conexão e leitura. Após uma falha o serviço fica em pausa por
+    SEARCH_GO_RETRY_AFTER segundos, para que um serviço fora do ar não custe
+    um timeout a cada busca; nesse período, e em qualquer falha, a busca é
+    feita pelo `reserva` (backend sql).
+    """
+
+    nome = 'go'
+
+    # Máximo de ids pedidos ao serviço (os mais relevantes)
+    MAX_RESULTADOS = 1000
+
+    def __init__(self, reserva):
+        self.reserva = reserva
+        self._sessao = None
+        self._lock = threading.Lock()
+        self._pausado_ate = 0.0
+        self.falhas = 0     # chamadas ao serviço que falharam
+        self.desvios = 0    # buscas atendidas pelo backend reserva
+
+    def _sessao_http(self, app):
+        with self._lock:
+            if self._sessao is None:
+                tamanho = app.config.get('SEARCH_GO_POOL_SIZE', 10)
+                sessao = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamanho, max_retries=0)
+                sessao.mount('http://', adaptador)
+                sessao.mount('https://', adaptador)
+                self._sessao = sessao
+            return self._sessao
+
+    def buscar_ids(self, app, termo):
+        """Ids dos chamados que casam com `termo`, na ordem de relevância do serviço"""
+        url = app.config.get('SEARCH_GO_URL', 'http://localhost:8081').rstrip('/') + '/api/search'
+        timeout = (app.config.get('SEARCH_GO_CONNECT_TIMEOUT', 0.05),
+                   app.config.get('SEARCH_GO_READ_TIMEOUT', 0.3))
+        try:
+            resposta = self._sessao_http(app).get(
+                url, params={'q': termo, 'limit': self.MAX_RESULTADOS}, timeout=timeout
+            )
+            resposta.raise_for_status()
+            chamados = resposta.json().get('chamados') or []
+            return [int(chamado['id']) for chamado in chamados[:self.MAX_RESULTADOS]]
+        except (requests.RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+            raise BackendRemotoIndisponivel(str(e)) from e
+
+    def filtrar(self, app, session, query, termo):
+        if time.monotonic() < self._pausado_ate:
+            self.desvios += 1
+            return self.reserva.filtrar(app, session, query, termo)
+
+        try:
+            ids = self.buscar_ids(app, termo)
+        except BackendRemotoIndisponivel as e:
+            self.falhas += 1
+            self.desvios += 1
+            self._pausado_ate = time.monotonic() + app.config.get('SEARCH_GO_RETRY_AFTER', 30)
+            logger.warning(f"go-search-api indisponível, usando busca local: {e}")
+            return self.reserva.filtrar(app, session, query, termo)
+
+        pontuacoes = {chamado_id: len(ids) - posicao for posicao, chamado_id in enumerate(ids)}
+        query = query.filter(filtro_ids(Chamado.id, pontuacoes))
+        return FiltroTexto(query, _por_pontuacao(pontuacoes), False, False, None, self.nome)
+
+
+backend_sql = BackendSQL()
+BACKENDS = {
+    'sql': backend_sql,
+    'index': BackendIndice(),
+    'go': BackendGo(reserva=backend_sql),
+}
+backend_trigramas = BackendTrigramas()
+
+
+def backend_configurado(app, session):
+    """
+    Backend definido em SEARCH_BACKEND. Sem ele, o FTS5 tem precedência:
+    index só é usado se SEARCH_INDEX_ENABLED e o banco não tiver FTS5.
+    """
+    nome = app.config.get('SEARCH_BACKEND')
+    if not nome:
+        usa_indice = app.config.get('SEARCH_INDEX_ENABLED') and not fts_disponivel(session.connection().engine)
+        nome = 'index' if usa_indice else 'sql'
+    if nome not in BACKENDS:
+        logger.warning(f"SEARCH_BACKEND desconhecido: '{nome}', usando sql")
+        return backend_sql
+    return BACKENDS[nome]
@@ -0,0 +1,232 @@
+"""
+Caches da busca de chamados
+
+- CacheContagem: total de resultados de cada combinação (termo normalizado +
+  filtros), para que as páginas seguintes de uma mesma busca não repitam o
+  COUNT. É esvaziado sempre que um chamado ou resposta é criado, alterado ou
+  removido.
+- CacheResultados: páginas de resultado prontas. A invalidação é seletiva:
+  só descarta as buscas em que o chamado alterado aparece ou passa/deixa de
+  satisfazer os filtros.
+
+Ambos são locais ao processo e limitados em tamanho e tempo de vida.
+"""
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+from utils.model_events import ao_confirmar
+from utils.text_normalizer import normalizar_texto, tokenizar
+
+
+def normalizar_termo(termo):
+    """Minúsculas e espaços colapsados, para que variações triviais compartilhem a chave"""
+    return ' '.join((termo or '').lower().split())
+
+
+def chave_busca(termo, filtros):
+    """Chave de cache a partir do termo e dos filtros (valores vazios são ignorados)"""
+    filtros_validos = tuple(sorted((k, str(v)) for k, v in filtros.items() if v))
+    return (normalizar_termo(termo), filtros_validos)
+
+
+class CacheContagem:
+    """Cache LRU com expiração por tempo para totais de busca"""
+
+    def __init__(self, max_itens=1000, ttl=60):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+            total, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return total
+
+    def guardar(self, chave, total):
+        with self._lock:
+            self._itens[chave] = (total, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._itens),
+                'max_size': self.max_itens,
+                'ttl': self.ttl
+            }
+
+
+contagem_cache = CacheContagem()
+
+
+@ao_confirmar
+def _invalidar_contagens(alteracoes):
+    # Qualquer escrita em chamado ou resposta (a busca também olha as
+    # respostas) pode mudar o total de qualquer busca
+    if any(alteracao.modelo in ('chamado', 'resposta') for alteracao in alteracoes):
+        contagem_cache.invalidar()
+
+
+# Filtros de um grupo de páginas em cache, usados para decidir se uma escrita
+# pode mudar o resultado. `inclui_respostas` indica que o backend também casa
+# texto das respostas; `confere_texto` indica que todo resultado contém os
+# termos literalmente no título/descrição (falso na busca aproximada e quando
+# as respostas também contam), caso contrário o texto não é usado para decidir.
+PredicadoBusca = namedtuple('PredicadoBusca', ['termos', 'status', 'criticidade', 'autor_id',
+                                               'inclui_respostas', 'confere_texto'])
+
+
+def predicado_busca(termo, status=None, criticidade=None, autor_id=None,
+                    inclui_respostas=False, confere_texto=True):
+    return PredicadoBusca(tuple(tokenizar(termo)), status or None, criticidade or None,
+                          autor_id, inclui_respostas, confere_texto and not inclui_respostas)
+
+
+def _chamado_satisfaz(predicado, valores):
+    """
+    Verificação conservadora: pode retornar True para um chamado que a busca
+    real não retornaria, mas nunca False para um que ela retornaria.
+    """
+    if predicado.status and valores.get('status') != predicado.status:
+        return False
+    if predicado.criticidade and valores.get('criticidade') != predicado.criticidade:
+        return False
+    if predicado.autor_id is not None and valores.get('autor_id') != predicado.autor_id:
+        return False
+    if predicado.termos and predicado.confere_texto:
+        texto = normalizar_texto(f"{valores.get('titulo') or ''} {valores.get('descricao') or ''}")
+        return all(termo in texto for termo in predicado.termos)
+    return True
+
+
+class CacheResultados:
+    """
+    Cache LRU com expiração por tempo para páginas de resultado da busca.
+
+    As páginas de uma mesma busca (mesmo termo, filtros e escopo de
+    visibilidade) formam um grupo; uma escrita relevante invalida o grupo
+    inteiro, pois pode deslocar itens entre páginas e alterar o total.
+    """
+
+    def __init__(self, max_itens=500, ttl=60):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()     # chave -> (payload, expira_em, grupo)
+        self._grupos = {}               # grupo -> {'predicado', 'ids', 'chaves'}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        self._geracao = 0
+
+    def geracao(self):
+        """Marca a ser passada para `guardar`, que descarta resultados calculados antes de uma escrita"""
+        return self._geracao
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    self._remover_chave(chave)
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[0]
+
+    def guardar(self, chave, grupo, predicado, payload, ids, geracao):
+        with self._lock:
+            if geracao != self._geracao:
+                # Houve escrita enquanto o resultado era calculado
+                return
+            if chave in self._itens:
+                self._remover_chave(chave)
+            self._itens[chave] = (payload, time.monotonic() + self.ttl, grupo)
+            info = self._grupos.setdefault(grupo, {'predicado': predicado, 'ids': set(), 'chaves': set()})
+            info['ids'].update(ids)
+            info['chaves'].add(chave)
+            while len(self._itens) > self.max_itens:
+                self._remover_chave(next(iter(self._itens)))
+
+    def _remover_chave(self, chave):
+        _, _, grupo = self._itens.pop(chave)
+        info = self._grupos.get(grupo)
+        if info is not None:
+            info['chaves'].discard(chave)
+            if not info['chaves']:
+                del self._grupos[grupo]
+
+    def _remover_grupo(self, grupo):
+        info = self._grupos.pop(grupo)
+        for chave in info['chaves']:
+            self._itens.pop(chave, None)
+        self.invalidacoes += 1
+
+    def invalidar_alteracoes(self, alteracoes):
+        with self._lock:
+            self._geracao += 1
+            for alteracao in alteracoes:
+                if alteracao.modelo == 'chamado':
+                    atuais = alteracao.dados
+                    antigos = {**alteracao.dados, **(alteracao.anteriores or {})}
+                    for grupo, info in list(self._grupos.items()):
+                        if (alteracao.id in info['ids']
+                                or _chamado_satisfaz(info['predicado'], atuais)
+                                or (alteracao.operacao == 'update'
+                                    and _chamado_satisfaz(info['predicado'], antigos))):
+                            self._remover_grupo(grupo)
+                elif alteracao.modelo == 'resposta':
+                    # Só afeta buscas cujo backend também procura nas respostas
+                    for grupo, info in list(self._grupos.items()):
+                        if info['predicado'].termos and info['predicado'].inclui_respostas:
+                            self._remover_grupo(grupo)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._grupos.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / consultas, 4) if consultas else None,
+                'invalidations': self.invalidacoes,
+                'size': len(self._itens),
+                'groups': len(self._grupos),
+                'max_size': self.max_itens,
+                'ttl': self.ttl
+            }
+
+
+resultados_cache = CacheResultados()
+
+
+@ao_confirmar
+def _invalidar_resultados(alteracoes):
+    resultados_cache.invalidar_alteracoes(alteracoes)
@@ -0,0 +1,548 @@
+"""
+Motor de busca em memória (índice invertido) para chamados
+
+Alternativa independente de banco para quando o FTS5 não está disponível
+(ex.: MySQL). Indexa titulo/descricao dos chamados e o conteúdo das
+respostas, com termos em minúsculas e sem acentos.
+
+Estrutura:
+- segmento base: snapshot em disco com postings em arrays de uint32,
+  acessado via mmap (carrega instantaneamente, sem reconstruir o índice);
+- camada incremental: dicionários em memória com os documentos inseridos ou
+  alterados depois do snapshot, mais um conjunto de documentos "removidos"
+  que mascara as entradas antigas do segmento base.
+
+O snapshot guarda a seq do log de alterações (utils/change_log.py) lida
+antes de indexar o banco; ao abri-lo, as entradas do log posteriores a essa
+seq são reaplicadas (criações, edições e exclusões). Se a retenção do log já
+tiver removido entradas depois dela, o snapshot é descartado e o índice
+reconstruído.
+
+A carga (snapshot ou banco) é montada numa instância separada, sem segurar o
+lock; as alterações confirmadas nesse meio tempo ficam guardadas e são
+aplicadas depois da troca. Com vários processos, cada um só recebe os
+próprios commits pelos eventos: antes de responder a uma busca o log é
+consultado a partir da última seq aplicada (ver `acompanhar_log`).
+
+Os documentos são identificados por uma chave inteira: chamados usam
+`id * 2` e respostas `id * 2 + 1`. A busca sempre devolve ids de chamados.
+"""
+import os
+import mmap
+import json
+import struct
+import bisect
+import logging
+import threading
+import time
+from datetime import timedelta
+from array import array
+from collections import defaultdict
+
+from sqlalchemy import bindparam
+
+from utils.text_normalizer import tokenizar
+from utils.model_events import ao_confirmar
+from utils.change_log import ultima_seq, marca_de_corte
+
+logger = logging.getLogger("search_engine")
+
+# Máximo de ids que filtro_ids coloca no SQL; acima disso a busca usa o backend sql
+MAX_IDS_FILTRO = 5000
+
+_MAGICO = b'CHIX'
+_VERSAO = 2
+# magico, versao, n_termos, n_respostas, tamanho do blob de termos, tamanho do metadado JSON
+_CABECALHO = struct.Struct('<4sIIIQI')
+
+
+def chave_chamado(chamado_id):
+    return chamado_id * 2
+
+
+def chave_resposta(resposta_id):
+    return resposta_id * 2 + 1
+
+
+def _alinhar(n):
+    return (n + 3) & ~3
+
+
+class SegmentoBase:
+    """Snapshot imutável do índice, lido diretamente do arquivo mapeado em memória"""
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, 'rb')
+        self._mm = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, versao, n_termos, n_respostas, tam_termos, tam_meta = \
+            _CABECALHO.unpack_from(self._mm, 0)
+        if magico != _MAGICO or versao != _VERSAO:
+            self.fechar()
+            raise ValueError(f'Snapshot de índice inválido: {caminho}')
+
+        pos = _CABECALHO.size
+        self.meta = json.loads(bytes(self._mm[pos:pos + tam_meta]))
+        pos = _alinhar(pos + tam_meta)
+
+        self._visao = visao = memoryview(self._mm)
+        self._termos = visao[pos:pos + tam_termos]
+        pos = _alinhar(pos + tam_termos)
+
+        def arranjo(n):
+            nonlocal pos
+            dados = visao[pos:pos + n * 4].cast('I')
+            pos += n * 4
+            return dados
+
+        self._offsets_termos = arranjo(n_termos + 1)
+        self._offsets_postings = arranjo(n_termos + 1)
+        self._postings = arranjo(self._offsets_postings[n_termos])
+        self._respostas_ids = arranjo(n_respostas)
+        self._respostas_chamados = arranjo(n_respostas)
+        self.n_termos = n_termos
+
+    def termo(self, i):
+        return bytes(self._termos[self._offsets_termos[i]:self._offsets_termos[i + 1]]).decode('utf-8')
+
+    def _posicao(self, termo):
+        """Primeira posição cujo termo é >= `termo` (busca binária)"""
+        baixo, alto = 0, self.n_termos
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            if self.termo(meio) < termo:
+                baixo = meio + 1
+            else:
+                alto = meio
+        return baixo
+
+    def indice(self, termo):
+        """Posição exata do termo no segmento, ou None"""
+        i = self._posicao(termo)
+        if i < self.n_termos and self.termo(i) == termo:
+            return i
+        return None
+
+    def postings(self, i):
+        return self._postings[self._offsets_postings[i]:self._offsets_postings[i + 1]]
+
+    def termos_com_prefixo(self, prefixo):
+        i = self._posicao(prefixo)
+        while i < self.n_termos:
+            if not self.termo(i).startswith(prefixo):
+                break
+            yield i
+            i += 1
+
+    def chamado_da_resposta(self, resposta_id):
+        i = bisect.bisect_left(self._respostas_ids, resposta_id)
+        if i < len(self._respostas_ids) and self._respostas_ids[i] == resposta_id:
+            return self._respostas_chamados[i]
+        return None
+
+    def iterar(self):
+        """(termo, postings) de todo o segmento, em ordem"""
+        for i in range(self.n_termos):
+            yield self.termo(i), self.postings(i)
+
+    def iterar_respostas(self):
+        return zip(self._respostas_ids, self._respostas_chamados)
+
+    def fechar(self):
+        try:
+            for nome in ('_termos', '_offsets_termos', '_offsets_postings', '_postings',
+                         '_respostas_ids', '_respostas_chamados', '_visao'):
+                visao = getattr(self, nome, None)
+                if visao is not None:
+                    visao.release()
+            self._mm.close()
+        except BufferError:
+            # Ainda há fatias do mmap em uso; o arquivo é fechado pelo coletor de lixo
+            logger.debug("Snapshot ainda referenciado; fechamento adiado")
+        self._arquivo.close()
+
+
+class MotorBusca:
+    """Índice invertido de chamados com atualização incremental"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._base = None
+        self._postings = defaultdict(set)     # termo -> chaves de documento
+        self._termos_doc = {}                 # chave -> termos do documento
+        self._removidos = set()               # chaves mascaradas no segmento base
+        self._respostas = {}                  # resposta_id -> chamado_id
+        self._termos_ordenados = None
+        self.seq = 0                          # seq do log já refletida no índice
+        self.carregado = False
+        self._pendentes = None                # alterações recebidas durante a carga
+        self._carga = threading.Lock()        # uma carga por vez
+        self._ultima_consulta_log = 0.0
+
+    # Atualização
+
+    def indexar_chamado(self, chamado_id, titulo, descricao):
+        self._indexar(chave_chamado(chamado_id), f'{titulo or ""} {descricao or ""}')
+
+    def indexar_resposta(self, resposta_id, chamado_id, conteudo):
+        with self._lock:
+            self._respostas[resposta_id] = chamado_id
+            self._indexar(chave_resposta(resposta_id), conteudo)
+
+    def remover_chamado(self, chamado_id):
+        self._remover(chave_chamado(chamado_id))
+
+    def remover_resposta(self, resposta_id):
+        with self._lock:
+            self._respostas.pop(resposta_id, None)
+            self._remover(chave_resposta(resposta_id))
+
+    def _indexar(self, chave, texto):
+        termos = frozenset(tokenizar(texto))
+        with self._lock:
+            self._remover(chave)
+            self._termos_doc[chave] = termos
+            for termo in termos:
+                if termo not in self._postings:
+                    self._termos_ordenados = None
+                self._postings[termo].add(chave)
+
+    def _remover(self, chave):
+        with self._lock:
+            if self._base is not None:
+                self._removidos.add(chave)
+            for termo in self._termos_doc.pop(chave, ()):
+                documentos = self._postings.get(termo)
+                if documentos is not None:
+                    documentos.discard(chave)
+                    if not documentos:
+                        del self._postings[termo]
+                        self._termos_ordenados = None
+
+    def aplicar_alteracoes(self, alteracoes):
+        """
+        Aplica as alterações confirmadas no banco (ver utils.model_events).
+        Durante uma carga também são guardadas, para serem reaplicadas sobre
+        o índice novo; antes da primeira carga, só guardadas.
+        """
+        with self._lock:
+            if self._pendentes is not None:
+                self._pendentes.extend(alteracoes)
+            if not self.carregado:
+                return
+            for alteracao in alteracoes:
+                dados = alteracao.dados
+                if alteracao.modelo == 'chamado':
+                    if alteracao.operacao == 'delete':
+                        self.remover_chamado(alteracao.id)
+                    else:
+                        self.indexar_chamado(alteracao.id, dados.get('titulo'), dados.get('descricao'))
+                elif alteracao.modelo == 'resposta':
+                    if alteracao.operacao == 'delete':
+                        self.remover_resposta(alteracao.id)
+                    else:
+                        self.indexar_resposta(alteracao.id, dados.get('chamado_id'), dados.get('conteudo'))
+
+    # Consulta
+
+    def _documentos_do_termo(self, termo, prefixo):
+        """Chaves de documento que contêm o termo (ou termos com esse prefixo)"""
+        documentos = set()
+
+        if prefixo:
+            if self._termos_ordenados is None:
+                self._termos_ordenados = sorted(self._postings)
+            i = bisect.bisect_left(self._termos_ordenados, termo)
+            while i < len(self._termos_ordenados) and self._termos_ordenados[i].startswith(termo):
+                documentos |= self._postings[self._termos_ordenados[i]]
+                i += 1
+        elif termo in self._postings:
+            documentos |= self._postings[termo]
+
+        if self._base is not None:
+            if prefixo:
+                indices = self._base.termos_com_prefixo(termo)
+            else:
+                indice = self._base.indice(termo)
+                indices = [] if indice is None else [indice]
+            for i in indices:
+                documentos.update(c for c in self._base.postings(i) if c not in self._removidos)
+
+        return documentos
+
+    def _chamado_do_documento(self, chave):
+        if chave % 2 == 0:
+            return chave // 2
+        resposta_id = chave // 2
+        chamado_id = self._respostas.get(resposta_id)
+        if chamado_id is None and self._base is not None:
+            chamado_id = self._base.chamado_da_resposta(resposta_id)
+        return chamado_id
+
+    def chamados_do_termo(self, termo, prefixo=False):
+        """Ids dos chamados com o termo (já normalizado) no título, na descrição ou numa resposta"""
+        with self._lock:
+            chamados = set()
+            for chave in self._documentos_do_termo(termo, prefixo):
+                chamado_id = self._chamado_do_documento(chave)
+                if chamado_id is not None:
+                    chamados.add(chamado_id)
+            return chamados
+
+    def termos(self):
+        """Vocabulário do índice (segmento base e camada incremental)"""
+        with self._lock:
+            termos = set(self._postings)
+            if self._base is not None:
+                termos.update(self._base.termo(i) for i in range(self._base.n_termos))
+            return termos
+
+    def buscar(self, texto, prefixo=True):
+        """
+        Ids dos chamados em que todos os termos de `texto` aparecem no título,
+        na descrição ou em alguma resposta. Com `prefixo=True`, cada termo
+        também casa com palavras que começam por ele (como no FTS5).
+        """
+        termos = tokenizar(texto)
+        if not termos:
+            return set()
+
+        with self._lock:
+            resultado = None
+            for termo in sorted(set(termos), key=len, reverse=True):
+                chamados = self.chamados_do_termo(termo, prefixo)
+                resultado = chamados if resultado is None else resultado & chamados
+                if not resultado:
+                    break
+            return resultado or set()
+
+    # Persistência
+
+    def reconstruir(self, session, chamado_model, resposta_model, modelo_log, atraso=None):
+        """
+        Recria o índice inteiro a partir do banco. A seq do log é lida antes
+        dos dados (com o mesmo `atraso` de /api/changes), de modo que o que
+        for gravado durante a leitura seja reaplicado ao abrir o snapshot.
+        """
+        def montar(novo):
+            novo.seq = ultima_seq(session, modelo_log, atraso)
+            novo._indexar_do_banco(session, chamado_model, resposta_model)
+
+        self._trocar(montar)
+
+    def _trocar(self, montar):
+        """
+        Monta um índice novo com `montar(novo)` sem segurar o lock (buscas e
+        commits seguem usando o atual) e o coloca no lugar deste, aplicando
+        por cima as alterações confirmadas durante a montagem.
+        """
+        with self._carga:
+            with self._lock:
+                self._pendentes = []
+            novo = MotorBusca()
+            try:
+                montar(novo)
+            except Exception:
+                with self._lock:
+                    self._pendentes = None
+                raise
+
+            with self._lock:
+                antigo = self._base
+                self._base, self._postings, self._termos_doc = novo._base, novo._postings, novo._termos_doc
+                self._removidos, self._respostas = novo._removidos, novo._respostas
+                self._termos_ordenados = None
+                self.seq = novo.seq
+                pendentes, self._pendentes = self._pendentes, None
+                self.carregado = True
+                self.aplicar_alteracoes(pendentes)
+                if antigo is not None:
+                    antigo.fechar()
+
+    def _indexar_do_banco(self, session, chamado_model, resposta_model):
+        """Indexa todos os chamados e respostas do banco"""
+        chamados = session.query(chamado_model.id, chamado_model.titulo, chamado_model.descricao)
+        respostas = session.query(resposta_model.id, resposta_model.chamado_id, resposta_model.conteudo)
+        for chamado_id, titulo, descricao in chamados.yield_per(1000):
+            self.indexar_chamado(chamado_id, titulo, descricao)
+        for resposta_id, chamado_id, conteudo in respostas.yield_per(1000):
+            self.indexar_resposta(resposta_id, chamado_id, conteudo)
+
+    def _reaplicar_log(self, session, chamado_model, resposta_model, modelo_log, atraso=None, lote=1000):
+        """
+        Reindexa os registros alterados no log depois de `self.seq`, relendo
+        o estado atual do banco; os que não existem mais são removidos. O
+        banco é lido fora do lock, e cada lote é trocado de uma vez.
+        """
+        # Todas as entradas são reaplicadas, mas só as com mais de `atraso`
+        # contam como refletidas (transações concorrentes podem ter seq menor).
+        # Assim, um lote lido antes de um commit mais novo é corrigido na
+        # próxima consulta ao log.
+        seq_segura = ultima_seq(session, modelo_log, atraso)
+        entradas = session.query(modelo_log.tabela, modelo_log.registro_id) \
+            .filter(modelo_log.seq > self.seq) \
+            .filter(modelo_log.tabela.in_(('chamado', 'resposta'))) \
+            .distinct().all()
+        alterados = {'chamado': [], 'resposta': []}
+        for tabela, registro_id in entradas:
+            alterados[tabela].append(registro_id)
+
+        for inicio in range(0, len(alterados['chamado']), lote):
+            parte = alterados['chamado'][inicio:inicio + lote]
+            linhas = session.query(chamado_model.id, chamado_model.titulo, chamado_model.descricao) \
+                            .filter(chamado_model.id.in_(parte)).all()
+            with self._lock:
+                for chamado_id in parte:
+                    self.remover_chamado(chamado_id)
+                for chamado_id, titulo, descricao in linhas:
+                    self.indexar_chamado(chamado_id, titulo, descricao)
+        for inicio in range(0, len(alterados['resposta']), lote):
+            parte = alterados['resposta'][inicio:inicio + lote]
+            linhas = session.query(resposta_model.id, resposta_model.chamado_id, resposta_model.conteudo) \
+                            .filter(resposta_model.id.in_(parte)).all()
+            with self._lock:
+                for resposta_id in parte:
+                    self.remover_resposta(resposta_id)
+                for resposta_id, chamado_id, conteudo in linhas:
+                    self.indexar_resposta(resposta_id, chamado_id, conteudo)
+
+        with self._lock:
+            self.seq = max(self.seq, seq_segura)
+        return len(entradas)
+
+    def acompanhar_log(self, session, chamado_model, resposta_model, modelo_log, atraso=None, intervalo=1):
+        """
+        Aplica as alterações gravadas no log por outros processos desde a
+        última seq aplicada. Consulta o banco no máximo uma vez a cada
+        `intervalo` segundos.
+        """
+        agora = time.monotonic()
+        if not self.carregado or agora - self._ultima_consulta_log < intervalo:
+            return 0
+        self._ultima_consulta_log = agora
+        return self._reaplicar_log(session, chamado_model, resposta_model, modelo_log, atraso)
+
+    def _limpar(self):
+        if self._base is not None:
+            self._base.fechar()
+        self._base = None
+        self._postings = defaultdict(set)
+        self._termos_doc = {}
+        self._removidos = set()
+        self._respostas = {}
+        self._termos_ordenados = None
+        self.seq = 0
+
+    def salvar(self, caminho):
+        """
+        Grava um snapshot compacto (segmento base + alterações) no disco.
+        A escrita é atômica: o arquivo antigo só é substituído no final.
+        """
+        with self._lock:
+            postings = defaultdict(set)
+            respostas = dict(self._respostas)
+            if self._base is not None:
+                for termo, docs in self._base.iterar():
+                    postings[termo].update(c for c in docs if c not in self._removidos)
+                for resposta_id, chamado_id in self._base.iterar_respostas():
+                    respostas.setdefault(resposta_id, chamado_id)
+                for chave in self._removidos:
+                    if chave % 2 == 1 and chave not in self._termos_doc:
+                        respostas.pop(chave // 2, None)
+            for termo, docs in self._postings.items():
+                postings[termo].update(docs)
+
+            termos = sorted(t for t, docs in postings.items() if docs)
+            blob = bytearray()
+            offsets_termos = array('I', [0])
+            offsets_postings = array('I', [0])
+            todos_postings = array('I')
+            for termo in termos:
+                blob += termo.encode('utf-8')
+                offsets_termos.append(len(blob))
+                todos_postings.extend(sorted(postings[termo]))
+                offsets_postings.append(len(todos_postings))
+
+            ids_respostas = sorted(respostas)
+            respostas_ids = array('I', ids_respostas)
+            respostas_chamados = array('I', (respostas[r] for r in ids_respostas))
+
+            meta = json.dumps({'seq': self.seq}).encode('utf-8')
+
+            temporario = f'{caminho}.tmp'
+            with open(temporario, 'wb') as f:
+                f.write(_CABECALHO.pack(_MAGICO, _VERSAO, len(termos), len(ids_respostas),
+                                        len(blob), len(meta)))
+                f.write(meta)
+                f.write(b'\0' * (_alinhar(f.tell()) - f.tell()))
+                f.write(blob)
+                f.write(b'\0' * (_alinhar(f.tell()) - f.tell()))
+                for dados in (offsets_termos, offsets_postings, todos_postings,
+                              respostas_ids, respostas_chamados):
+                    dados.tofile(f)
+            os.replace(temporario, caminho)
+
+    def carregar(self, caminho, session=None, chamado_model=None, resposta_model=None,
+                 modelo_log=None, atraso=None):
+        """
+        Abre o snapshot via mmap. Se a sessão for informada, reaplica as
+        alterações do log feitas depois do snapshot; ValueError se o log já
+        tiver sido podado além da seq do snapshot (é preciso reconstruir).
+        """
+        def montar(novo):
+            novo._base = SegmentoBase(caminho)
+            novo.seq = novo._base.meta.get('seq', 0)
+            if session is not None:
+                if marca_de_corte(session, modelo_log) > novo.seq:
+                    novo._limpar()
+                    raise ValueError(f'Log de alterações podado depois do snapshot {caminho}')
+                try:
+                    novo._reaplicar_log(session, chamado_model, resposta_model, modelo_log, atraso)
+                except Exception:
+                    novo._limpar()
+                    raise
+
+        self._trocar(montar)
+
+
+motor_busca = MotorBusca()
+
+
+@ao_confirmar
+def _atualizar_indice(alteracoes):
+    motor_busca.aplicar_alteracoes(alteracoes)
+
+
+def garantir_motor_carregado(app, session, chamado_model, resposta_model, modelo_log):
+    """
+    Carrega o snapshot configurado em SEARCH_INDEX_PATH ou reconstrói o
+    índice; se já estiver carregado, aplica o que outros processos gravaram
+    no log (no máximo a cada SEARCH_INDEX_POLL_INTERVAL segundos).
+    """
+    atraso = timedelta(seconds=app.config.get('CHANGE_LOG_SAFETY_LAG', 2))
+    if motor_busca.carregado:
+        motor_busca.acompanhar_log(session, chamado_model, resposta_model, modelo_log, atraso,
+                                   app.config.get('SEARCH_INDEX_POLL_INTERVAL', 1))
+        return motor_busca
+
+    caminho = app.config.get('SEARCH_INDEX_PATH')
+    if caminho and os.path.exists(caminho):
+        try:
+            motor_busca.carregar(caminho, session, chamado_model, resposta_model, modelo_log, atraso)
+            logger.info(f"Índice de busca carregado de {caminho}")
+            return motor_busca
+        except Exception as e:
+            logger.warning(f"Não foi possível carregar o snapshot {caminho}: {e}")
+
+    motor_busca.reconstruir(session, chamado_model, resposta_model, modelo_log, atraso)
+    logger.info("Índice de busca reconstruído a partir do banco")
+    return motor_busca
+
+
+def filtro_ids(coluna, ids):
+    """
+    Filtro IN com os ids renderizados diretamente no SQL (sem limite de
+    parâmetros). Cabe a quem chama limitar `ids` a MAX_IDS_FILTRO.
+    """
+    if len(ids) > MAX_IDS_FILTRO:
+        raise ValueError(f'{len(ids)} ids para o filtro (máximo {MAX_IDS_FILTRO})')
+    return coluna.in_(bindparam('ids_motor_busca', value=sorted(ids), expanding=True, literal_execute=True))
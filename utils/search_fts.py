@@ -0,0 +1,211 @@
+"""
+Índice full-text dos chamados usando SQLite FTS5
+
+A tabela virtual `chamado_fts` espelha titulo/descricao da tabela `chamado`
+e `resposta_fts` espelha o conteúdo das respostas (external content); ambas
+são mantidas em sincronia por triggers, de modo que qualquer escrita - ORM,
+scripts de manutenção ou SQL direto - atualiza o índice.
+Em bancos que não são SQLite (ex.: MySQL) o índice não existe e a busca
+continua usando o filtro LIKE tradicional.
+"""
+import re
+import logging
+from sqlalchemy import text, table, column, literal_column, func, select, union_all
+
+from utils.snippets import MARCA_INICIO, MARCA_FIM, RETICENCIAS
+
+logger = logging.getLogger("search_fts")
+
+FTS_TABLE = 'chamado_fts'
+FTS_RESPOSTAS = 'resposta_fts'
+
+# Peso do título em relação à descrição no ranking bm25
+PESO_TITULO = 10.0
+PESO_DESCRICAO = 1.0
+
+# Fator aplicado ao bm25 das respostas: casar só numa resposta vale menos
+# do que casar no próprio chamado
+PESO_RESPOSTA = 0.5
+
+# Palavras do trecho devolvido para a resposta encontrada
+PALAVRAS_TRECHO = 24
+
+_DDL_FTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        titulo,
+        descricao,
+        content='chamado',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chamado_fts_ai AFTER INSERT ON chamado BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, titulo, descricao)
+        VALUES (new.id, new.titulo, new.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chamado_fts_ad AFTER DELETE ON chamado BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, titulo, descricao)
+        VALUES ('delete', old.id, old.titulo, old.descricao);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chamado_fts_au AFTER UPDATE OF titulo, descricao ON chamado BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, titulo, descricao)
+        VALUES ('delete', old.id, old.titulo, old.descricao);
+        INSERT INTO {FTS_TABLE}(rowid, titulo, descricao)
+        VALUES (new.id, new.titulo, new.descricao);
+    END
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_RESPOSTAS} USING fts5(
+        conteudo,
+        content='resposta',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resposta_fts_ai AFTER INSERT ON resposta BEGIN
+        INSERT INTO {FTS_RESPOSTAS}(rowid, conteudo) VALUES (new.id, new.conteudo);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resposta_fts_ad AFTER DELETE ON resposta BEGIN
+        INSERT INTO {FTS_RESPOSTAS}({FTS_RESPOSTAS}, rowid, conteudo)
+        VALUES ('delete', old.id, old.conteudo);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resposta_fts_au AFTER UPDATE OF conteudo ON resposta BEGIN
+        INSERT INTO {FTS_RESPOSTAS}({FTS_RESPOSTAS}, rowid, conteudo)
+        VALUES ('delete', old.id, old.conteudo);
+        INSERT INTO {FTS_RESPOSTAS}(rowid, conteudo) VALUES (new.id, new.conteudo);
+    END
+    """,
+]
+
+# Tabelas "leves" usadas apenas para montar os JOINs com o ORM. A coluna
+# oculta `rank` (bm25) pode ser usada em agregações, ao contrário de bm25()
+chamado_fts = table(FTS_TABLE, column('rowid'), column('rank'))
+resposta_fts = table(FTS_RESPOSTAS, column('rowid'), column('rank'))
+resposta = table('resposta', column('id'), column('chamado_id'))
+
+# Cache da verificação de disponibilidade, por URL do banco
+_disponibilidade = {}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_disponivel(engine, tabela=FTS_TABLE):
+    """Indica se o banco é SQLite e se a tabela FTS5 `tabela` já foi criada"""
+    chave = (str(engine.url), tabela)
+    if chave not in _disponibilidade:
+        disponivel = False
+        if engine.dialect.name == 'sqlite':
+            try:
+                with engine.connect() as conn:
+                    disponivel = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:nome"),
+                        {'nome': tabela}
+                    ).first() is not None
+            except Exception as e:
+                logger.warning(f"Não foi possível verificar o índice FTS5: {e}")
+        _disponibilidade[chave] = disponivel
+    return _disponibilidade[chave]
+
+
+def criar_indice_fts(engine):
+    """Cria as tabelas FTS5 e os triggers, e reconstrói os índices a partir de `chamado` e `resposta`"""
+    if engine.dialect.name != 'sqlite':
+        raise RuntimeError('O índice FTS5 só está disponível para bancos SQLite')
+
+    with engine.begin() as conn:
+        for ddl in _DDL_FTS:
+            conn.execute(text(ddl))
+        for tabela in (FTS_TABLE, FTS_RESPOSTAS):
+            conn.execute(text(f"INSERT INTO {tabela}({tabela}) VALUES ('rebuild')"))
+
+    for tabela in (FTS_TABLE, FTS_RESPOSTAS):
+        _disponibilidade.pop((str(engine.url), tabela), None)
+
+
+def montar_consulta_fts(termo):
+    """
+    Converte o texto digitado pelo usuário em uma expressão MATCH segura.
+
+    Cada palavra vira um termo entre aspas com busca por prefixo, e todas
+    precisam estar presentes (AND implícito). Retorna None se não houver
+    nenhuma palavra pesquisável.
+    """
+    tokens = _TOKEN_RE.findall(termo or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def aplicar_busca_fts(query, chamado_id_col, termo):
+    """
+    Restringe a query aos chamados que casam com `termo` no índice FTS5, no
+    próprio chamado ou em alguma resposta. As correspondências são agrupadas
+    por chamado antes do JOIN (uma linha por chamado, qualquer que seja o
+    número de respostas), com a melhor pontuação entre o chamado e suas
+    respostas.
+
+    Retorna a tupla (query, expressao_rank); a expressão deve ser usada
+    no ORDER BY (menor valor = mais relevante).
+    """
+    expressao = montar_consulta_fts(termo)
+    if expressao is None:
+        return query, None
+
+    nos_chamados = select(chamado_fts.c.rowid.label('chamado_id'), chamado_fts.c.rank.label('rank')) \
+        .where(literal_column(FTS_TABLE).op('MATCH')(expressao)) \
+        .where(chamado_fts.c.rank.op('MATCH')(f'bm25({PESO_TITULO}, {PESO_DESCRICAO})'))
+    nas_respostas = select(resposta.c.chamado_id, (resposta_fts.c.rank * PESO_RESPOSTA).label('rank')) \
+        .select_from(resposta_fts.join(resposta, resposta.c.id == resposta_fts.c.rowid)) \
+        .where(literal_column(FTS_RESPOSTAS).op('MATCH')(expressao))
+    todas = union_all(nos_chamados, nas_respostas).subquery()
+    correspondencias = select(todas.c.chamado_id, func.min(todas.c.rank).label('rank')) \
+        .group_by(todas.c.chamado_id).subquery('correspondencias')
+
+    query = query.join(correspondencias, correspondencias.c.chamado_id == chamado_id_col)
+    return query, correspondencias.c.rank
+
+
+def respostas_correspondentes_fts(session, chamado_ids, termo):
+    """
+    Melhor resposta de cada chamado em `chamado_ids` que casa com `termo`,
+    como {chamado_id: (resposta_id, trecho)}. Usa duas consultas limitadas
+    aos chamados informados: uma agrupada para escolher a resposta e outra
+    para gerar os trechos apenas das respostas escolhidas.
+    """
+    expressao = montar_consulta_fts(termo)
+    if expressao is None or not chamado_ids:
+        return {}
+
+    # No SQLite, a coluna "solta" resposta.id vem da linha com o menor rank
+    melhores = session.execute(
+        select(resposta.c.chamado_id, resposta.c.id, func.min(resposta_fts.c.rank))
+        .select_from(resposta_fts.join(resposta, resposta.c.id == resposta_fts.c.rowid))
+        .where(literal_column(FTS_RESPOSTAS).op('MATCH')(expressao))
+        .where(resposta.c.chamado_id.in_(list(chamado_ids)))
+        .group_by(resposta.c.chamado_id)
+    ).all()
+    if not melhores:
+        return {}
+
+    trecho = func.snippet(literal_column(FTS_RESPOSTAS), 0, MARCA_INICIO, MARCA_FIM,
+                          RETICENCIAS, PALAVRAS_TRECHO)
+    trechos = dict(session.execute(
+        select(resposta_fts.c.rowid, trecho)
+        .where(literal_column(FTS_RESPOSTAS).op('MATCH')(expressao))
+        .where(resposta_fts.c.rowid.in_([resposta_id for _, resposta_id, _ in melhores]))
+    ).all())
+    return {
+        chamado_id: (resposta_id, trechos.get(resposta_id, ''))
+        for chamado_id, resposta_id, _ in melhores
+    }
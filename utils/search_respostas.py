@@ -0,0 +1,47 @@
+"""
+Busca no conteúdo das respostas sem o índice FTS5 (ex.: MySQL)
+
+A comparação é feita em `conteudo_norm` (minúsculas e sem acentos), como a
+dos chamados em titulo_norm/descricao_norm. Como lá, é um LIKE '%termo%':
+o EXISTS chega às respostas de cada chamado pelo índice (chamado_id, id),
+mas o texto delas é lido por inteiro.
+
+O filtro usa EXISTS, de modo que um chamado com centenas de respostas
+continua gerando uma única linha no resultado. A resposta exibida para cada
+chamado da página é escolhida numa consulta separada, limitada aos chamados
+da página, que devolve no máximo uma linha por chamado.
+"""
+from sqlalchemy import func, exists
+
+from utils.text_normalizer import padrao_like, normalizar_texto
+from utils.snippets import gerar_trecho
+
+
+def filtro_respostas(resposta_model, chamado_id_col, termo):
+    """Condição "o chamado tem alguma resposta contendo `termo`" (sem acentos/maiúsculas)"""
+    padrao = padrao_like(normalizar_texto(termo))
+    return exists().where(resposta_model.chamado_id == chamado_id_col) \
+                   .where(resposta_model.conteudo_norm.like(padrao, escape='\\'))
+
+
+def respostas_correspondentes(session, resposta_model, chamado_ids, termo):
+    """
+    Resposta mais recente de cada chamado em `chamado_ids` que contém
+    `termo`, como {chamado_id: (resposta_id, trecho)}.
+    """
+    if not termo or not chamado_ids:
+        return {}
+
+    padrao = padrao_like(normalizar_texto(termo))
+    ultimas = session.query(resposta_model.chamado_id, func.max(resposta_model.id).label('resposta_id')) \
+        .filter(resposta_model.chamado_id.in_(list(chamado_ids))) \
+        .filter(resposta_model.conteudo_norm.like(padrao, escape='\\')) \
+        .group_by(resposta_model.chamado_id) \
+        .subquery()
+    linhas = session.query(resposta_model.chamado_id, resposta_model.id, resposta_model.conteudo) \
+        .join(ultimas, ultimas.c.resposta_id == resposta_model.id) \
+        .all()
+    return {
+        chamado_id: (resposta_id, gerar_trecho(conteudo, termo))
+        for chamado_id, resposta_id, conteudo in linhas
+    }
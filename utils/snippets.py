@@ -0,0 +1,107 @@
+"""
+Trechos de texto para resultados de busca
+
+Em vez de devolver o texto inteiro (descrições e respostas podem conter logs
+com dezenas de KB), a busca devolve uma janela curta em torno da primeira
+ocorrência dos termos, com as ocorrências destacadas por marcadores.
+"""
+import re
+from functools import lru_cache
+
+from utils.text_normalizer import normalizar_texto, tokenizar
+
+# Marcadores de destaque (texto puro, seguros para qualquer cliente)
+MARCA_INICIO = '[['
+MARCA_FIM = ']]'
+RETICENCIAS = '…'
+
+# Tamanho aproximado do trecho, em caracteres
+TAMANHO_TRECHO = 160
+
+
+def _variantes_letras():
+    """Letra base -> variantes acentuadas (ex.: 'a' -> 'áàâãä...')"""
+    variantes = {}
+    for codigo in range(0xC0, 0x250):
+        caractere = chr(codigo)
+        base = normalizar_texto(caractere)
+        if len(base) == 1 and base.isalpha() and base != caractere:
+            variantes[base] = variantes.get(base, '') + caractere
+    return variantes
+
+
+_VARIANTES = _variantes_letras()
+
+
+@lru_cache(maxsize=256)
+def _regex_termos(termo):
+    """
+    Regex que encontra os termos ignorando acentos e maiúsculas, sem
+    normalizar o texto inteiro (a busca roda no motor de regex)
+    """
+    termos = tokenizar(termo)
+    if not termos:
+        return None
+    alternativas = '|'.join(
+        ''.join(f'[{c}{_VARIANTES[c]}]' if c in _VARIANTES else re.escape(c) for c in t)
+        for t in termos
+    )
+    return re.compile(alternativas, re.IGNORECASE | re.UNICODE)
+
+
+def _palavra_em(texto, comeco, final):
+    """Estende (comeco, final) até as bordas da palavra que contém o trecho"""
+    while comeco > 0 and (texto[comeco - 1].isalnum() or texto[comeco - 1] == '_'):
+        comeco -= 1
+    while final < len(texto) and (texto[final].isalnum() or texto[final] == '_'):
+        final += 1
+    return comeco, final
+
+
+def gerar_trecho(texto, termo, tamanho=TAMANHO_TRECHO):
+    """
+    Janela de até `tamanho` caracteres de `texto` em torno da primeira
+    palavra que contém algum termo de `termo` (sem diferenciar acentos e
+    maiúsculas), com as palavras encontradas entre MARCA_INICIO e MARCA_FIM.
+    Sem ocorrências, devolve o início do texto.
+    """
+    if not texto:
+        return ''
+    regex = _regex_termos(termo or '')
+
+    primeira = regex.search(texto) if regex else None
+    if primeira is None:
+        inicio, fim = 0, min(len(texto), tamanho)
+        ocorrencias = []
+    else:
+        inicio = max(0, primeira.start() - tamanho // 4)
+        fim = min(len(texto), inicio + tamanho)
+        inicio = max(0, fim - tamanho)
+        ocorrencias = []
+        for encontrado in regex.finditer(texto, primeira.start(), fim):
+            comeco, final = _palavra_em(texto, encontrado.start(), encontrado.end())
+            if final > fim:
+                break
+            if ocorrencias and comeco < ocorrencias[-1][1]:
+                continue
+            ocorrencias.append((max(comeco, inicio), final))
+
+    # Evita cortar palavras nas bordas da janela
+    if inicio > 0:
+        espaco = texto.find(' ', inicio, ocorrencias[0][0] if ocorrencias else fim)
+        if espaco != -1:
+            inicio = espaco + 1
+    if fim < len(texto):
+        espaco = texto.rfind(' ', ocorrencias[-1][1] if ocorrencias else inicio, fim)
+        if espaco != -1:
+            fim = espaco
+
+    partes = [RETICENCIAS] if inicio > 0 else []
+    posicao = inicio
+    for comeco, final in ocorrencias:
+        partes.extend((texto[posicao:comeco], MARCA_INICIO, texto[comeco:final], MARCA_FIM))
+        posicao = final
+    partes.append(texto[posicao:fim])
+    if fim < len(texto):
+        partes.append(RETICENCIAS)
+    return ' '.join(''.join(partes).split())
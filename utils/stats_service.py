@@ -0,0 +1,82 @@
+"""
+Estatísticas de chamados para os cards de home, dashboard e listagens
+
+Todas as contagens (total, por status e por criticidade) saem de uma única
+consulta à tabela de contadores (utils/contadores.py), que tem uma linha por
+status/criticidade/autor e não cresce com o número de chamados. O resultado
+fica em cache por alguns segundos; o cache é descartado sempre que um commit
+cria ou remove um chamado, ou altera seu status ou criticidade (novo
+chamado, encerramento, reprovação, edição).
+"""
+import time
+import threading
+from collections import namedtuple, Counter
+
+from utils.model_events import ao_confirmar
+from utils.contadores import somar_contadores
+
+# Campos que, alterados, mudam as contagens
+CAMPOS_CONTADOS = ('status', 'criticidade')
+
+EstatisticasChamados = namedtuple('EstatisticasChamados', ['total', 'por_status', 'por_criticidade'])
+
+
+def contar_chamados(session, contador_model):
+    """Total, contagem por status e por criticidade em uma única consulta"""
+    por_status, por_criticidade = Counter(), Counter()
+    for status, criticidade, quantidade in somar_contadores(session, contador_model):
+        por_status[status] += quantidade
+        por_criticidade[criticidade] += quantidade
+    return EstatisticasChamados(sum(por_status.values()), por_status, por_criticidade)
+
+
+class CacheEstatisticas:
+    """Último resultado de `contar_chamados`, válido por `ttl` segundos"""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._valor = None
+        self._expira_em = 0.0
+        self._versao = 0
+        self._lock = threading.Lock()
+
+    def obter(self, session, contador_model):
+        with self._lock:
+            if self._valor is not None and self._expira_em > time.monotonic():
+                return self._valor
+            versao = self._versao
+
+        valor = contar_chamados(session, contador_model)
+
+        with self._lock:
+            # Uma invalidação durante a consulta torna o resultado suspeito:
+            # devolve, mas não guarda
+            if versao == self._versao:
+                self._valor = valor
+                self._expira_em = time.monotonic() + self.ttl
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._valor = None
+            self._versao += 1
+
+
+estatisticas_cache = CacheEstatisticas()
+
+
+def estatisticas_chamados(session, contador_model, ttl=None):
+    """Contagens de chamados, do cache quando ainda válidas"""
+    if ttl is not None:
+        estatisticas_cache.ttl = ttl
+    return estatisticas_cache.obter(session, contador_model)
+
+
+@ao_confirmar
+def _invalidar_estatisticas(alteracoes):
+    for alteracao in alteracoes:
+        if alteracao.modelo != 'chamado':
+            continue
+        if alteracao.operacao != 'update' or any(campo in alteracao.anteriores for campo in CAMPOS_CONTADOS):
+            estatisticas_cache.invalidar()
+            return
@@ -0,0 +1,216 @@
+"""
+Índice de prefixos dos títulos dos chamados (autocompletar)
+
+Mantém em memória o vocabulário das palavras dos títulos normalizados, com
+a lista ordenada das palavras para responder "títulos com palavra começando
+por X" com uma busca binária. Há um vocabulário global (administradores) e
+um por autor, de modo que usuários comuns só percorrem os próprios chamados.
+Cada palavra aponta para os ids dos chamados; o título fica guardado uma
+única vez, junto com o chamado.
+
+Os títulos confirmados enquanto a carga inicial lê o banco ficam guardados e
+são aplicados ao final dela, para que não se percam.
+"""
+import bisect
+import heapq
+import logging
+import threading
+from collections import defaultdict
+
+from utils.text_normalizer import normalizar_texto
+from utils.model_events import ao_confirmar
+
+logger = logging.getLogger("suggest_index")
+
+
+def _palavras(titulo_norm):
+    """Palavras (sequências alfanuméricas) do título normalizado, sem repetição"""
+    palavras = []
+    inicio = None
+    for i, caractere in enumerate(titulo_norm + ' '):
+        if caractere.isalnum():
+            if inicio is None:
+                inicio = i
+        elif inicio is not None:
+            palavras.append(titulo_norm[inicio:i])
+            inicio = None
+    return list(dict.fromkeys(palavras))
+
+
+def _comeca_palavra_com(titulo_norm, prefixo):
+    """Se `prefixo` aparece no título a partir do início de alguma palavra"""
+    i = titulo_norm.find(prefixo)
+    while i >= 0:
+        if i == 0 or not titulo_norm[i - 1].isalnum():
+            return True
+        i = titulo_norm.find(prefixo, i + 1)
+    return False
+
+
+class _Vocabulario:
+    """Palavra -> ids dos chamados, com as palavras em ordem para busca por prefixo"""
+
+    def __init__(self, chamados_por_palavra=None):
+        self.chamados = chamados_por_palavra or {}
+        self.ordenadas = sorted(self.chamados)
+
+    def adicionar(self, palavra, chamado_id):
+        ids = self.chamados.get(palavra)
+        if ids is None:
+            ids = self.chamados[palavra] = set()
+            bisect.insort(self.ordenadas, palavra)
+        ids.add(chamado_id)
+
+    def remover(self, palavra, chamado_id):
+        ids = self.chamados.get(palavra)
+        if ids is None:
+            return
+        ids.discard(chamado_id)
+        if not ids:
+            del self.chamados[palavra]
+            i = bisect.bisect_left(self.ordenadas, palavra)
+            del self.ordenadas[i]
+
+    def com_prefixo(self, prefixo):
+        """Conjuntos de ids das palavras que começam por `prefixo`, em ordem alfabética"""
+        i = bisect.bisect_left(self.ordenadas, prefixo)
+        while i < len(self.ordenadas) and self.ordenadas[i].startswith(prefixo):
+            yield self.chamados[self.ordenadas[i]]
+            i += 1
+
+
+class IndicePrefixos:
+    """Vocabulário dos títulos (global e por autor) para busca por prefixo"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._global = _Vocabulario()
+        self._por_autor = defaultdict(_Vocabulario)
+        self._chamados = {}     # id -> (titulo, autor_id, palavras)
+        self._pendentes = None  # alterações recebidas durante a carga
+        self.carregado = False
+
+    def adicionar(self, chamado_id, titulo, autor_id):
+        with self._lock:
+            self.remover(chamado_id)
+            palavras = _palavras(normalizar_texto(titulo))
+            self._chamados[chamado_id] = (titulo, autor_id, palavras)
+            for palavra in palavras:
+                self._global.adicionar(palavra, chamado_id)
+                self._por_autor[autor_id].adicionar(palavra, chamado_id)
+
+    def remover(self, chamado_id):
+        with self._lock:
+            registro = self._chamados.pop(chamado_id, None)
+            if registro is None:
+                return
+            _, autor_id, palavras = registro
+            for palavra in palavras:
+                self._global.remover(palavra, chamado_id)
+                self._por_autor[autor_id].remover(palavra, chamado_id)
+
+    def aplicar_alteracoes(self, alteracoes):
+        """Aplica as alterações confirmadas (ver utils.model_events); durante a carga, guarda-as"""
+        with self._lock:
+            if self._pendentes is not None:
+                self._pendentes.extend(alteracoes)
+                return
+            if not self.carregado:
+                return
+            for alteracao in alteracoes:
+                if alteracao.modelo != 'chamado':
+                    continue
+                if alteracao.operacao == 'delete':
+                    self.remover(alteracao.id)
+                else:
+                    self.adicionar(alteracao.id, alteracao.dados.get('titulo'),
+                                   alteracao.dados.get('autor_id'))
+
+    def carregar(self, linhas):
+        """
+        Monta o índice a partir de (id, titulo, autor_id) de todos os chamados.
+        As linhas são lidas sem segurar o lock; as alterações confirmadas nesse
+        meio tempo são aplicadas por cima, na ordem em que chegaram.
+        """
+        with self._lock:
+            self._pendentes = []
+        try:
+            globais = defaultdict(set)
+            por_autor = defaultdict(lambda: defaultdict(set))
+            chamados = {}
+            for chamado_id, titulo, autor_id in linhas:
+                palavras = _palavras(normalizar_texto(titulo))
+                chamados[chamado_id] = (titulo, autor_id, palavras)
+                for palavra in palavras:
+                    globais[palavra].add(chamado_id)
+                    por_autor[autor_id][palavra].add(chamado_id)
+            vocabulario = _Vocabulario(dict(globais))
+            vocabularios_autor = defaultdict(_Vocabulario, {
+                autor_id: _Vocabulario(dict(palavras)) for autor_id, palavras in por_autor.items()
+            })
+        except Exception:
+            with self._lock:
+                self._pendentes = None
+            raise
+
+        with self._lock:
+            self._global, self._por_autor, self._chamados = vocabulario, vocabularios_autor, chamados
+            pendentes, self._pendentes = self._pendentes, None
+            self.carregado = True
+            self.aplicar_alteracoes(pendentes)
+
+    def sugerir(self, prefixo, autor_id=None, limite=8):
+        """
+        Até `limite` chamados com alguma palavra do título começando por
+        `prefixo`. Com `autor_id`, considera apenas os chamados desse autor.
+        Um prefixo com várias palavras casa com títulos que têm esse trecho
+        a partir do início de uma palavra.
+        """
+        prefixo = normalizar_texto(prefixo).strip()
+        palavras = _palavras(prefixo)
+        if not palavras or not prefixo[0].isalnum():
+            return []
+
+        with self._lock:
+            vocabulario = self._global if autor_id is None else self._por_autor.get(autor_id)
+            if vocabulario is None:
+                return []
+
+            if palavras[0] == prefixo:
+                grupos = vocabulario.com_prefixo(prefixo)
+                confere = None
+            else:
+                # A primeira palavra do prefixo está completa; o trecho todo é conferido no título
+                grupos = [vocabulario.chamados.get(palavras[0], ())]
+
+                def confere(chamado_id):
+                    return _comeca_palavra_com(normalizar_texto(self._chamados[chamado_id][0]), prefixo)
+
+            vistos = set()
+            sugestoes = []
+            for ids in grupos:
+                candidatos = (c for c in ids if c not in vistos and (confere is None or confere(c)))
+                for chamado_id in heapq.nsmallest(limite - len(sugestoes), candidatos):
+                    vistos.add(chamado_id)
+                    sugestoes.append({'id': chamado_id, 'titulo': self._chamados[chamado_id][0]})
+                if len(sugestoes) >= limite:
+                    break
+            return sugestoes
+
+
+indice_prefixos = IndicePrefixos()
+
+
+@ao_confirmar
+def _atualizar_prefixos(alteracoes):
+    indice_prefixos.aplicar_alteracoes(alteracoes)
+
+
+def garantir_prefixos_carregados(session, chamado_model):
+    """Carrega o índice na primeira utilização"""
+    if not indice_prefixos.carregado:
+        linhas = session.query(chamado_model.id, chamado_model.titulo, chamado_model.autor_id) \
+                        .yield_per(1000)
+        indice_prefixos.carregar(linhas)
+        logger.info("Índice de prefixos de títulos carregado")
+    return indice_prefixos
@@ -0,0 +1,47 @@
+"""
+Normalização de texto para busca
+
+Converte para minúsculas e remove acentos, para que "Impressão", "impressao"
+e "IMPRESSÃO" sejam tratados como o mesmo termo.
+"""
+import re
+import unicodedata
+from sqlalchemy import or_
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos (ex.: 'Média' -> 'media')"""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return sem_acentos.lower()
+
+
+def tokenizar(texto):
+    """Lista de termos normalizados do texto"""
+    return _TOKEN_RE.findall(normalizar_texto(texto))
+
+
+def padrao_like(termo):
+    """Padrão LIKE '%termo%' com os curingas do próprio termo escapados"""
+    escapado = termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escapado}%'
+
+
+def filtro_busca_normalizada(modelo, termo):
+    """
+    Filtro de texto sobre as colunas normalizadas do chamado
+    (titulo_norm/descricao_norm), ignorando acentos e maiúsculas.
+
+    É um LIKE '%termo%': casa no meio das palavras, mas percorre a tabela
+    inteira (nenhum índice ajuda). Serve de fallback para bancos sem FTS5;
+    para volume maior use os backends index ou go (utils/search_backends.py).
+    """
+    padrao = padrao_like(normalizar_texto(termo))
+    return or_(
+        modelo.titulo_norm.like(padrao, escape='\\'),
+        modelo.descricao_norm.like(padrao, escape='\\')
+    )
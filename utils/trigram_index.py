@@ -0,0 +1,256 @@
+"""
+Índice de trigramas para busca tolerante a erros de digitação
+
+Cada palavra distinta de títulos, descrições e respostas é decomposta em
+trigramas (como no pg_trgm). O índice guarda só o vocabulário: com o motor de
+busca em memória (utils/search_engine.py) ativo, as palavras vêm do
+dicionário de termos dele; senão, são lidas do banco. Os chamados de cada
+palavra são obtidos por quem chama (`buscar` recebe a função), dos postings
+do motor ou de uma consulta ao banco. Uma palavra digitada com erro
+("impresora") é comparada apenas com as palavras do vocabulário que
+compartilham trigramas com ela, e a similaridade é o coeficiente de Jaccard
+entre os conjuntos de trigramas.
+
+Para limitar o custo:
+- um candidato precisa compartilhar pelo menos ceil(limiar * |trigramas da
+  consulta|) trigramas com ela, e no mínimo 2 (um trigrama só, como "  l",
+  é comum a boa parte do vocabulário). Basta então olhar os
+  (|Q| - mínimo + 1) trigramas menos frequentes da consulta;
+- no máximo MAX_CANDIDATOS palavras são avaliadas por termo: as que
+  aparecem em mais desses trigramas.
+
+Como letras trocadas de posição ("lgoin") destroem vários trigramas, os
+candidatos também são avaliados pela distância de edição (com transposição),
+e a similaridade final é a maior das duas medidas.
+
+Palavras que deixam de existir só saem do vocabulário na próxima carga; até
+lá não têm chamados e não geram resultados.
+"""
+import math
+import heapq
+import logging
+import threading
+from collections import defaultdict, Counter
+
+from sqlalchemy import case
+
+from utils.text_normalizer import tokenizar
+from utils.model_events import ao_confirmar
+
+logger = logging.getLogger("trigram_index")
+
+# Similaridade mínima para considerar duas palavras equivalentes
+LIMIAR_SIMILARIDADE = 0.3
+
+# Máximo de palavras do vocabulário avaliadas para cada termo da consulta
+MAX_CANDIDATOS = 500
+
+# Quantas palavras do vocabulário cada termo da consulta pode expandir
+MAX_EXPANSOES = 5
+
+# Máximo de chamados devolvidos por uma busca aproximada (os mais similares)
+MAX_RESULTADOS = 1000
+
+
+def trigramas(palavra):
+    """Conjunto de trigramas da palavra, com as bordas marcadas por espaços"""
+    texto = f'  {palavra} '
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+def minimo_comuns(consulta, limiar=LIMIAR_SIMILARIDADE):
+    """Trigramas que um candidato precisa ter em comum com a `consulta`"""
+    return min(len(consulta), max(2, math.ceil(limiar * len(consulta))))
+
+
+def similaridade_edicao(a, b):
+    """1 - distância de edição (com transposição de vizinhos) / maior comprimento"""
+    if a == b:
+        return 1.0
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = 0 if a[i - 1] == b[j - 1] else 1
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        anterior2, anterior = anterior, atual
+    return 1 - anterior[len(b)] / max(len(a), len(b))
+
+
+def _adicionar(palavras_indice, trigramas_indice, palavra):
+    if palavra not in palavras_indice:
+        palavras_indice.add(palavra)
+        for trigrama in trigramas(palavra):
+            trigramas_indice[trigrama].add(palavra)
+
+
+class IndiceTrigramas:
+    """Índice trigrama -> palavras sobre o vocabulário dos chamados"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._palavras = set()
+        self._trigramas = defaultdict(set)      # trigrama -> palavras
+        self._pendentes = None                  # palavras recebidas durante a carga
+        self.carregado = False
+
+    def adicionar_palavras(self, palavras):
+        """Inclui no vocabulário palavras novas (depois da carga; durante ela, guarda-as)"""
+        with self._lock:
+            if self._pendentes is not None:
+                self._pendentes.extend(palavras)
+                return
+            if not self.carregado:
+                return
+            for palavra in palavras:
+                _adicionar(self._palavras, self._trigramas, palavra)
+
+    def carregar(self, palavras):
+        """
+        Monta o índice a partir do vocabulário `palavras` (iterável, pode
+        repetir), sem segurar o lock; as palavras confirmadas nesse meio
+        tempo são incluídas ao final.
+        """
+        with self._lock:
+            self._pendentes = []
+        try:
+            novas, indice = set(), defaultdict(set)
+            for palavra in palavras:
+                _adicionar(novas, indice, palavra)
+        except Exception:
+            with self._lock:
+                self._pendentes = None
+            raise
+
+        with self._lock:
+            self._palavras, self._trigramas = novas, indice
+            pendentes, self._pendentes = self._pendentes, None
+            self.carregado = True
+            self.adicionar_palavras(pendentes)
+
+    def candidatos(self, termo, limiar=LIMIAR_SIMILARIDADE, limite=MAX_CANDIDATOS):
+        """
+        Palavras que podem ser similares a `termo`: as que têm algum dos
+        trigramas mais raros da consulta, no máximo `limite` (as que têm
+        mais deles).
+        """
+        consulta = trigramas(termo)
+        minimo = minimo_comuns(consulta, limiar)
+
+        with self._lock:
+            # Trigramas mais raros primeiro; os demais não geram candidatos novos
+            raros = sorted(consulta, key=lambda t: len(self._trigramas.get(t, ())))
+            ocorrencias = Counter()
+            for trigrama in raros[:len(consulta) - minimo + 1]:
+                ocorrencias.update(self._trigramas.get(trigrama, ()))
+            if termo in self._palavras:
+                # A própria palavra sempre entra, à frente das demais
+                ocorrencias[termo] = len(consulta) + 1
+
+        if len(ocorrencias) <= limite:
+            return set(ocorrencias)
+        mais_comuns = heapq.nlargest(limite, ocorrencias.items(), key=lambda item: (item[1], item[0]))
+        return {palavra for palavra, _ in mais_comuns}
+
+    def expandir(self, termo, limiar=LIMIAR_SIMILARIDADE, limite=MAX_EXPANSOES):
+        """Palavras do vocabulário similares a `termo`, como [(palavra, similaridade)]"""
+        consulta = trigramas(termo)
+        similares = []
+        for palavra in self.candidatos(termo, limiar):
+            outros = trigramas(palavra)
+            comuns = len(consulta & outros)
+            similaridade = comuns / (len(consulta) + len(outros) - comuns)
+            if similaridade < limiar:
+                similaridade = max(similaridade, similaridade_edicao(termo, palavra))
+            if similaridade >= limiar:
+                similares.append((palavra, similaridade))
+
+        similares.sort(key=lambda item: (-item[1], item[0]))
+        return similares[:limite]
+
+    def buscar(self, texto, chamados_da_palavra, limiar=LIMIAR_SIMILARIDADE, limite=MAX_RESULTADOS):
+        """
+        Chamados em que cada termo de `texto` casa (exata ou aproximadamente)
+        com alguma palavra, como {chamado_id: pontuação}. A pontuação soma,
+        para cada termo, a maior similaridade encontrada no chamado.
+        `chamados_da_palavra(palavra)` devolve os ids dos chamados que a contêm.
+        """
+        termos = list(dict.fromkeys(tokenizar(texto)))
+        if not termos:
+            return {}
+
+        pontuacoes = None
+        for termo in termos:
+            melhores = {}
+            for palavra, similaridade in self.expandir(termo, limiar):
+                for chamado_id in chamados_da_palavra(palavra):
+                    if similaridade > melhores.get(chamado_id, 0):
+                        melhores[chamado_id] = similaridade
+
+            if pontuacoes is None:
+                pontuacoes = melhores
+            else:
+                pontuacoes = {
+                    chamado_id: pontuacao + melhores[chamado_id]
+                    for chamado_id, pontuacao in pontuacoes.items()
+                    if chamado_id in melhores
+                }
+            if not pontuacoes:
+                return {}
+
+        if len(pontuacoes) > limite:
+            mantidos = sorted(pontuacoes.items(), key=lambda item: (-item[1], -item[0]))[:limite]
+            pontuacoes = dict(mantidos)
+        return pontuacoes
+
+
+indice_trigramas = IndiceTrigramas()
+
+
+@ao_confirmar
+def _atualizar_trigramas(alteracoes):
+    palavras = set()
+    for alteracao in alteracoes:
+        dados = alteracao.dados
+        if alteracao.operacao == 'delete':
+            continue
+        if alteracao.modelo == 'chamado':
+            palavras.update(tokenizar(f'{dados.get("titulo") or ""} {dados.get("descricao") or ""}'))
+        elif alteracao.modelo == 'resposta':
+            palavras.update(tokenizar(dados.get('conteudo')))
+    if palavras:
+        indice_trigramas.adicionar_palavras(palavras)
+
+
+def vocabulario_do_banco(session, chamado_model, resposta_model):
+    """Palavras de títulos, descrições e respostas, lidas do banco em lotes"""
+    for titulo, descricao in session.query(chamado_model.titulo, chamado_model.descricao).yield_per(1000):
+        yield from tokenizar(f'{titulo or ""} {descricao or ""}')
+    for conteudo, in session.query(resposta_model.conteudo).yield_per(1000):
+        yield from tokenizar(conteudo)
+
+
+def garantir_trigramas_carregados(session, chamado_model, resposta_model, motor=None):
+    """
+    Carrega o índice na primeira utilização: do vocabulário do `motor` de
+    busca, se informado (já carregado), ou do banco.
+    """
+    if not indice_trigramas.carregado:
+        if motor is not None:
+            indice_trigramas.carregar(motor.termos())
+        else:
+            indice_trigramas.carregar(vocabulario_do_banco(session, chamado_model, resposta_model))
+        logger.info("Índice de trigramas carregado")
+    return indice_trigramas
+
+
+def expressao_pontuacao(coluna_id, pontuacoes):
+    """Expressão SQL com a pontuação de similaridade de cada id (0 para os demais)"""
+    if not pontuacoes:
+        return case([(coluna_id.is_(None), 0.0)], else_=0.0)
+    return case({chamado_id: round(p, 6) for chamado_id, p in pontuacoes.items()},
+                value=coluna_id, else_=0.0)
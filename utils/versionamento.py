@@ -0,0 +1,139 @@
+"""
+Versão por chamado (`chamado.versao`) e ETags das APIs de chamados
+
+A coluna `versao` começa em 1 e é incrementada, pela mesma conexão e na
+mesma transação da escrita:
+- a cada UPDATE do chamado que altere alguma coluna (status, criticidade,
+  título...);
+- a cada resposta ou anexo criado, alterado ou excluído no chamado (ou numa
+  resposta dele);
+- quando muda o nome do autor do chamado ou de alguma resposta dele (o nome
+  aparece na listagem e no detalhe).
+
+O incremento é feito no banco (`versao = versao + 1`), então escritas
+concorrentes no mesmo chamado não se perdem. Com ela as APIs montam ETags
+fortes e respondem 304 a um If-None-Match igual sem consultar nem serializar
+o restante dos dados (ver backend/routes/chamado_routes.py).
+
+A ETag de uma listagem resume os pares (id, versão) dos chamados filtrados,
+o que exige percorrê-los. Para não fazer isso a cada GET condicional, a
+assinatura de cada filtro fica em cache junto com a marca do log de
+alterações (utils/change_log.py) em que foi calculada, e só é recalculada
+quando a marca muda.
+
+Escritas que não passam pelo ORM (UPDATE em massa, SQL direto) não
+incrementam a versão.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event, select, or_
+from sqlalchemy.orm import object_session, attributes
+
+
+def _incrementar(connection, tabela_chamado, chamado_id):
+    connection.execute(
+        tabela_chamado.update()
+                      .where(tabela_chamado.c.id == chamado_id)
+                      .values(versao=tabela_chamado.c.versao + 1)
+    )
+
+
+def monitorar_versao(chamado_model, resposta_model, usuario_model, anexo_model=None):
+    """
+    Incrementa `chamado.versao` nas escritas do chamado, de suas respostas e
+    anexos, e nos chamados afetados por uma mudança de nome de usuário
+    """
+    tabela_chamado = chamado_model.__table__
+    tabela_resposta = resposta_model.__table__
+
+    @event.listens_for(chamado_model, 'before_update')
+    def _chamado_alterado(mapper, connection, target):
+        session = object_session(target)
+        if session is not None and session.is_modified(target, include_collections=False):
+            # Expressão SQL: o valor é relido do banco no próximo acesso
+            target.versao = chamado_model.versao + 1
+
+    def _filho_alterado(mapper, connection, target):
+        chamado_id = getattr(target, 'chamado_id', None)
+        if chamado_id is None and getattr(target, 'resposta_id', None) is not None:
+            # Anexo de resposta: o chamado é o da resposta
+            chamado_id = select(tabela_resposta.c.chamado_id) \
+                .where(tabela_resposta.c.id == target.resposta_id) \
+                .scalar_subquery()
+        if chamado_id is not None:
+            _incrementar(connection, tabela_chamado, chamado_id)
+
+    for modelo in filter(None, (resposta_model, anexo_model)):
+        for operacao in ('insert', 'update', 'delete'):
+            event.listen(modelo, f'after_{operacao}', _filho_alterado)
+
+    @event.listens_for(usuario_model, 'after_update')
+    def _usuario_alterado(mapper, connection, target):
+        if not attributes.get_history(target, 'nome').has_changes():
+            return
+        respondidos = select(tabela_resposta.c.chamado_id) \
+            .where(tabela_resposta.c.autor_id == target.id)
+        connection.execute(
+            tabela_chamado.update()
+                          .where(or_(tabela_chamado.c.autor_id == target.id,
+                                     tabela_chamado.c.id.in_(respondidos)))
+                          .values(versao=tabela_chamado.c.versao + 1)
+        )
+
+
+def gerar_etag(*partes):
+    """ETag forte (sem aspas) a partir das `partes` que identificam a representação"""
+    return hashlib.sha1('|'.join(map(str, partes)).encode('utf-8')).hexdigest()
+
+
+def assinatura_versoes(query, chamado_model, lote=1000):
+    """
+    Resumo (sha1) dos pares (id, versão) dos chamados de `query`, na ordem
+    da query: muda quando algum chamado entra ou sai do conjunto, ou é
+    alterado, respondido ou excluído. Só essas duas colunas são lidas.
+
+    Agregados (quantidade, soma das versões...) não bastam: um chamado que
+    sai do filtro e outro que entra podem deixar os mesmos totais.
+    """
+    resumo = hashlib.sha1()
+    for chamado_id, versao in query.with_entities(chamado_model.id, chamado_model.versao).yield_per(lote):
+        resumo.update(f'{chamado_id}:{versao},'.encode('ascii'))
+    return resumo.hexdigest()
+
+
+class CacheAssinaturas:
+    """
+    Assinaturas de listagens por chave (escopo + filtros), válidas enquanto
+    a marca do log for a mesma em que foram calculadas. LRU, local ao
+    processo.
+    """
+
+    def __init__(self, max_itens=1000):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave, marca, calcular):
+        """Assinatura de `chave` na `marca` atual; chama `calcular()` se ainda não houver"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] == marca:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+
+        assinatura = calcular()
+        with self._lock:
+            self._itens[chave] = (marca, assinatura)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return assinatura
+
+
+assinaturas_listagem = CacheAssinaturas()